@@ -2,18 +2,90 @@
 import os
 import csv
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
 from dotenv import load_dotenv
 from py_clob_client.client import ClobClient
 from py_clob_client.clob_types import ApiCreds, OrderArgs, MarketOrderArgs, OrderType
-from py_clob_client.constants import AMOY
-from py_clob_client.order_builder.constants import BUY
+from py_clob_client.constants import POLYGON
+from py_clob_client.order_builder.constants import BUY, SELL
 from colorama import init, Fore, Style
+from backtest import BacktestClient, load_book_snapshots, record_order_books, write_report
+from clob_stub import start_stub_server
+from positions import PositionSnapshot
+from books import BookCache, BookView
+from triggers import CONDITIONS, TriggerEngine
+from screener import MarketScreener, NUMERIC_FIELDS
+from risk import RiskEngine, RiskLimits, RiskRejected
+from order_store import OrderStore
+from amend import amend_orders, resolve_amendments, shift_amendments
+from quoter import QuoteEngine, load_ladders
+from accounts import AccountRegistry
+from signer_pool import SignerPool, sign_orders
+from signing import FastSigner
+from metadata import MetadataCache
+from readcache import ReadCache
+from clock import GTD_SECURITY_SECONDS, ServerClock
+from precision import FireTimer, fire_all, fire_spread, percentile, warm_executor
+from dashboard import Dashboard
+from events import ConsoleSink, EventLog, JsonlSink
+from trades import TradeStore
+from pnl import PnlBook, market_marks
+from arbitrage import ArbScanner, market_baskets
+from routing import COMPLEMENT, NATIVE, complement_map, execute_plan, plan_buy, synthetic_asks
+from presize import FITS, POLICIES, SKIPPED, presize_order
+from checkpoint import DONE, FAILED, INTENT, INTENT_WINDOW, Checkpoint, outcome_uncertain, reconcile, row_keys
 
 init(autoreset=True)
 
 CSV_FILENAME = "scheduled_tasks.csv"
+ORDERS_CSV_FILENAME = "orders_to_run.csv"
+BOOKS_FILENAME = "recorded_books.jsonl"
+BACKTEST_REPORT_FILENAME = "backtest_report.csv"
+TASK_FIELDNAMES = ["scheduled_datetime", "token_id", "order_type", "amount", "price", "size", "expire_seconds", "side", "account", "critical", "priority"]
+SCHEDULE_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M")
+ORDER_TYPES = ("FOK", "GTC", "GTD", "FOK_MAX", "FOK_MIN")
+TRIGGERS_CSV_FILENAME = "triggered_orders.csv"
+TRIGGER_FIELDNAMES = ["watch_token_id", "condition", "threshold", "ticks", "token_id", "order_type", "amount", "price", "size", "expire_seconds", "side"]
+TRIGGER_POLL_SECONDS = 0.5
+AMEND_CSV_FILENAME = "amend_orders.csv"
+LADDERS_CSV_FILENAME = "quote_ladders.csv"
+ACCOUNTS_FILENAME = "accounts.json"
+TRADES_DB_FILENAME = "trades.db"
+SCREENER_TTL_SECONDS = 300
+SCREENER_PAGE_SIZE = 20
+PNL_TOP_POSITIONS = 25
+ARB_BOOK_SECONDS = 2.0
+ARB_SCAN_SECONDS = 0.5
+ARB_TOP = 15
+ORDER_SYNC_SECONDS = 5
+CLOCK_SYNC_SECONDS = 300
+FIRE_PREPARE_SECONDS = 2.0
+FIRE_WORKERS = 16
+DASHBOARD_BOOK_SECONDS = 1.0
+EVENTS_FILENAME = "polybot_events.jsonl"
+EVENT_COLORS = {"info": Fore.CYAN, "ok": Fore.GREEN, "warn": Fore.YELLOW, "error": Fore.RED, "summary": Fore.BLUE}
+
+market_screener = None
+risk_engine = RiskEngine()
+order_store = OrderStore()
+account_registry = None
+signer_pool = None
+metadata_cache = None
+read_cache = None
+trade_store = None
+pnl_book = None
+server_clock = None
+fire_timer = FireTimer()
+# FOK_MAX rows also buy through the complement's bids (POLYBOT_ROUTE_COMPLEMENT).
+route_complement = False
+# Plain FOK orders are checked against the book before signing (POLYBOT_FOK_PRESIZE: downsize, fok_max or skip).
+fok_presize = None
+# Order loops only queue events; a background writer prints them and appends them to EVENTS_FILENAME.
+event_log = EventLog([ConsoleSink(EVENT_COLORS)])
 
 def clear_screen():
     """Clears the terminal screen."""
@@ -34,6 +106,7 @@ def display_header():
 
 def pause():
     """Pauses the execution until the user presses Enter."""
+    event_log.flush()
     input(Fore.YELLOW + "\nPress Enter to return to the main menu...")
 
 def format_number(value: str) -> str:
@@ -99,19 +172,244 @@ def display_api_calls(client):
         print(client.get_sampling_markets())
     except Exception as e:
         print(Fore.RED + f"Error calling API: {str(e)}")
+    if read_cache is not None:
+        stats = read_cache.stats()
+        hit_rate = f"{stats['hit_rate'] * 100:.1f}%" if stats["hit_rate"] is not None else "-"
+        print(Fore.BLUE + f"\nRead cache: {stats['entries']} entries, {stats['bytes'] / 1e6:.1f} MB, hit rate {hit_rate}, "
+                          f"{stats['evictions']} eviction(s)")
+        for method, counts in sorted(stats["methods"].items()):
+            print(Fore.BLUE + f"  {method:<32} hits {counts['hits']:>5} | misses {counts['misses']:>5} | "
+                              f"shared {counts['coalesced']:>4} | errors {counts['errors']:>3}")
+    pause()
+
+def get_account_registry(client):
+    """Returns the account registry, or a registry holding only client (e.g. a backtest or stub client)."""
+    if account_registry is not None and account_registry.get().client is client:
+        return account_registry
+    registry = AccountRegistry()
+    registry.add("default", client)
+    return registry
+
+def client_order_store(client):
+    """Returns the order store of client's account, or None when the client has none."""
+    if account_registry is None:
+        return None
+    return next((a.store for a in account_registry.accounts.values() if a.client is client), None)
+
+def position_snapshot(client, ttl=30.0):
+    """Returns a PositionSnapshot of client that takes its open and recent SELLs from the client's order store."""
+    return PositionSnapshot(client, ttl=ttl, orders=client_order_store(client))
+
+def get_trade_store():
+    """Returns the shared trade store, opening TRADES_DB_FILENAME on first use."""
+    global trade_store
+    if trade_store is None:
+        trade_store = TradeStore(TRADES_DB_FILENAME)
+    return trade_store
+
+def sync_trades(client):
+    """Syncs the trade history of every account into the trade store; returns the fills added per account."""
+    store = get_trade_store()
+    added = {}
+    for account in get_account_registry(client).accounts.values():
+        before = store.count(account.name)
+        try:
+            result = store.sync(account.client, account.name,
+                                lambda pages, fills: print(Fore.CYAN + f"\r{account.name}: {pages} page(s), {fills} fill(s)...", end=""))
+            added[account.name] = store.count(account.name) - before
+            print(Fore.GREEN + f"\r{account.name}: {result['trades']} trade(s) in {result['pages']} page(s), "
+                               f"{added[account.name]} new fill(s) in {result['seconds']:.2f}s")
+        except Exception as e:
+            print(Fore.RED + f"\nError syncing trades for {account.name}: {str(e)}")
+    return added
+
+def trade_history(client):
+    """Syncs fills from the trades endpoint and shows them per token."""
+    clear_screen()
+    display_header()
+    print(Fore.GREEN + "--- Trade History ---\n")
+    sync_trades(client)
+    store = get_trade_store()
+    summary = store.token_summary()
+    print(Fore.MAGENTA + f"\n{'Token':<14} | {'Fills':>6} | {'Bought':>12} | {'Avg Buy':>7} | {'Sold':>12} | {'Avg Sell':>8} | Last Fill")
+    print(Fore.MAGENTA + "-" * 90)
+    for row in summary:
+        avg_buy = f"{row['avg_buy']:.4f}" if row["avg_buy"] is not None else "-"
+        avg_sell = f"{row['avg_sell']:.4f}" if row["avg_sell"] is not None else "-"
+        print(Fore.CYAN + f"{row['token_id'][:12] + '..':<14} | {row['fills']:>6} | {row['bought']:>12.2f} | {avg_buy:>7} | "
+                          f"{row['sold']:>12.2f} | {avg_sell:>8} | {datetime.fromtimestamp(row['last_match_time']):%Y-%m-%d %H:%M:%S}")
+    if not summary:
+        print(Fore.YELLOW + "No fills recorded.")
+        pause()
+        return
+    token_id = input(Fore.YELLOW + "\nToken ID to list its latest fills (Enter to skip): ").strip()
+    if token_id:
+        fills = store.fills(token_id=token_id, limit=50)
+        print(Fore.MAGENTA + f"\n{'Time':<19} | {'Account':<10} | {'Side':<4} | {'Role':<5} | {'Price':>6} | {'Size':>10} | Status")
+        print(Fore.MAGENTA + "-" * 80)
+        for fill in fills:
+            print(Fore.CYAN + f"{datetime.fromtimestamp(fill.match_time):%Y-%m-%d %H:%M:%S} | {fill.account:<10} | {fill.side:<4} | "
+                              f"{fill.role:<5} | {fill.price:>6.3f} | {fill.size:>10.2f} | {fill.status}")
+        if not fills:
+            print(Fore.YELLOW + "No fills for this token.")
+    pause()
+
+def portfolio_pnl(client):
+    """Syncs fills and shows positions, average cost and realized/unrealized PnL per event and token."""
+    global pnl_book
+    clear_screen()
+    display_header()
+    print(Fore.GREEN + "--- Portfolio PnL ---\n")
+    sync_trades(client)
+    if pnl_book is None:
+        pnl_book = PnlBook()
+    try:
+        started = time.perf_counter()
+        applied = pnl_book.refresh(get_trade_store())
+        refreshed = time.perf_counter() - started
+        prices, events, labels = market_marks(get_market_screener(client).fetch_markets())
+        started = time.perf_counter()
+        valuation = pnl_book.value(prices, events)
+        by_event = valuation.by_event()
+        valued = time.perf_counter() - started
+    except Exception as e:
+        print(Fore.RED + f"Error computing PnL: {str(e)}")
+        pause()
+        return
+    totals = valuation.totals()
+    print(Fore.CYAN + f"\n{applied} new fill(s) applied in {refreshed * 1000:.1f} ms; "
+                      f"{len(valuation)} token(s) marked in {valued * 1000:.1f} ms.")
+    if not totals["positions"] and not totals["realized"]:
+        print(Fore.YELLOW + "No positions recorded.")
+        pause()
+        return
+    print(Fore.MAGENTA + f"\n{'Event':<40} | {'Pos':>4} | {'Value':>11} | {'Realized':>11} | {'Unrealized':>11}")
+    print(Fore.MAGENTA + "-" * 88)
+    for row in by_event[:PNL_TOP_POSITIONS]:
+        color = Fore.GREEN if row["realized"] + row["unrealized"] >= 0 else Fore.RED
+        print(color + f"{labels.get(row['event'], row['event'])[:40]:<40} | {row['positions']:>4} | {row['value']:>11.2f} | "
+                      f"{row['realized']:>11.2f} | {row['unrealized']:>11.2f}")
+    print(Fore.MAGENTA + f"\n{'Token':<14} | {'Position':>11} | {'Avg Cost':>8} | {'Mark':>6} | {'Value':>11} | {'Unrealized':>11}")
+    print(Fore.MAGENTA + "-" * 80)
+    for row in valuation.rows(limit=PNL_TOP_POSITIONS):
+        mark = f"{row['mark']:.3f}" if row["marked"] else "-"
+        color = Fore.YELLOW if not row["marked"] else Fore.GREEN if row["unrealized"] >= 0 else Fore.RED
+        print(color + f"{row['token_id'][:12] + '..':<14} | {row['position']:>11.2f} | {row['avg_cost']:>8.4f} | {mark:>6} | "
+                      f"{row['value']:>11.2f} | {row['unrealized']:>11.2f}")
+    print(Fore.BLUE + f"\nOpen positions: {totals['positions']} ({totals['unmarked']} unmarked) | Value: {totals['value']:.2f} | "
+                      f"Realized: {totals['realized']:.2f} | Unrealized: {totals['unrealized']:.2f} | Volume: {totals['volume']:.2f}")
+    if totals["unmarked"]:
+        print(Fore.YELLOW + "Unmarked positions belong to markets no longer sampled and are left out of value and unrealized PnL.")
+    pause()
+
+def arbitrage_scanner(client):
+    """Watches every sampling market for baskets of exclusive outcomes priced away from 1 until Ctrl+C."""
+    clear_screen()
+    display_header()
+    print(Fore.GREEN + "--- Arbitrage Scanner ---\n")
+    try:
+        min_edge = float(input(Fore.YELLOW + "Minimum edge per unit (e.g. 0.005, Enter for 0): ").strip() or 0)
+        baskets = market_baskets(get_market_screener(client).fetch_markets())
+    except ValueError:
+        print(Fore.RED + "Invalid number.")
+        pause()
+        return
+    except Exception as e:
+        print(Fore.RED + f"Error loading markets: {str(e)}")
+        pause()
+        return
+    if not baskets:
+        print(Fore.YELLOW + "No active markets to scan.")
+        pause()
+        return
+    scanner = ArbScanner(baskets, min_edge)
+    books = BookCache(client)
+    books.add_listener(scanner.on_book)
+    if metadata_cache is not None:
+        books.add_listener(metadata_cache.observe_book)
+    events = sum(1 for b in baskets if b.kind == "event")
+    print(Fore.BLUE + f"Scanning {len(baskets) - events} complement and {events} event basket(s) over "
+                      f"{len(scanner.token_ids())} book(s). Press Ctrl+C to stop.")
+    stop_event = threading.Event()
+    threading.Thread(target=books.poll, args=(scanner.token_ids(), ARB_BOOK_SECONDS, stop_event,
+                                              lambda e: event_log.emit("books_error", f"Error refreshing order books: {str(e)}", "error", error=str(e))),
+                     daemon=True).start()
+    shown = [None]
+
+    def show(opportunities):
+        top = opportunities[:ARB_TOP]
+        signature = [(o.basket.key, o.side, round(o.profit, 2)) for o in top]
+        if signature == shown[0]:
+            return
+        shown[0] = signature
+        print(Fore.MAGENTA + f"\n[{datetime.now():%H:%M:%S}] {len(opportunities)} opportunit(ies); {len(scanner.views)} book(s), "
+                             f"rescan {scanner.last_scan_seconds * 1000:.2f} ms")
+        if not top:
+            return
+        print(Fore.MAGENTA + f"{'Basket':<40} | {'Kind':<10} | {'Side':<4} | {'Edge':>6} | {'Units':>10} | {'Avg Price':>9} | {'Profit':>9}")
+        for o in top:
+            print(Fore.GREEN + f"{o.basket.label[:40]:<40} | {o.basket.kind:<10} | {o.side:<4} | {o.edge:>6.3f} | {o.size:>10.2f} | "
+                               f"{o.price:>9.4f} | {o.profit:>9.2f}")
+
+    try:
+        scanner.run(ARB_SCAN_SECONDS, stop_event, show)
+    except KeyboardInterrupt:
+        print(Fore.BLUE + "\nScanner stopped.")
+    finally:
+        stop_event.set()
     pause()
 
+def get_market_screener(client):
+    """Returns the shared market screener, so the market table is downloaded once per TTL."""
+    global market_screener
+    if market_screener is None or market_screener.client is not client:
+        market_screener = MarketScreener(client, ttl=SCREENER_TTL_SECONDS)
+    return market_screener
+
+def browse_markets(screener, **query):
+    """Prints screener results one page at a time."""
+    page = 1
+    while True:
+        rows, total = screener.search(page=page, page_size=SCREENER_PAGE_SIZE, **query)
+        pages = max(1, -(-total // SCREENER_PAGE_SIZE))
+        print(Fore.GREEN + f"\n{total} market(s) | page {page}/{pages}")
+        print(Fore.MAGENTA + f"{'End Date':<11} | {'Price':<6} | {'Reward/day':<10} | {'Liquidity':<12} | Event")
+        print(Fore.MAGENTA + "-" * 80)
+        for row in rows:
+            price = f"{row['price']:.3f}" if row["price"] is not None else "N/A"
+            reward = format_number(str(row["rewards_daily_rate"])) if row["rewards_daily_rate"] is not None else "N/A"
+            liquidity = format_number(str(row["liquidity"])) if row["liquidity"] is not None else "N/A"
+            print(Fore.CYAN + f"{row['end_date'] or 'N/A':<11} | {price:<6} | {reward:<10} | {liquidity:<12} | {row['market_slug']} ({row['condition_id']})")
+        if pages == 1:
+            return
+        choice = input(Fore.YELLOW + "[n]ext, [p]revious or Enter to stop: ").strip().lower()
+        if choice == "n" and page < pages:
+            page += 1
+        elif choice == "p" and page > 1:
+            page -= 1
+        elif choice not in ("n", "p"):
+            return
+
+def prompt_range(label):
+    """Asks for an optional 'low-high' range; either side may be left empty."""
+    value = input(Fore.YELLOW + f"{label} range (low-high, Enter to skip): ").strip()
+    if not value:
+        return None
+    low, _, high = value.partition("-")
+    return (float(low) if low.strip() else None, float(high) if high.strip() else None)
+
 def filter_markets(client):
-    """Filters markets by end date or keyword."""
+    """Filters markets by end date, keyword or a compound screener query."""
     clear_screen()
     display_header()
     print(Fore.GREEN + "Filter Criteria:")
     print(Fore.GREEN + "1. End Date")
     print(Fore.GREEN + "2. Keyword")
-    option = input(Fore.YELLOW + "Select an option (1 or 2): ").strip()
+    print(Fore.GREEN + "3. Screener (keywords, price, rewards, liquidity, sorting)")
+    option = input(Fore.YELLOW + "Select an option (1, 2 or 3): ").strip()
+    screener = get_market_screener(client)
     try:
-        sampling_response = client.get_sampling_markets()
-        markets = sampling_response.get("data", []) if isinstance(sampling_response, dict) else sampling_response
+        screener.ensure_loaded()
     except Exception as e:
         print(Fore.RED + f"Error retrieving markets: {str(e)}")
         pause()
@@ -119,16 +417,12 @@ def filter_markets(client):
     if option == "1":
         date_filter = input(Fore.YELLOW + "Enter end date (YYYY-MM-DD): ").strip()
         date_filter = datetime.strptime(date_filter, "%Y-%m-%d").date()
-        filtered = []
         today = datetime.now().date()
-        for m in markets:
-            date = m.get("end_date_iso")
-            if date:
-                date = datetime.strptime(date[:10], "%Y-%m-%d").date()
-                # Filter for events ending between now and the provided date
-                if today <= date <= date_filter:
-                    print(Fore.CYAN + f"Event: {m.get('market_slug', 'N/A')} | End Date: {date}")
-                    filtered.append(m)
+        # Events ending between now and the provided date
+        filtered, total = screener.search(ranges={"end_date": (today.isoformat(), date_filter.isoformat())},
+                                          sort_by="end_date", page_size=len(screener.rows))
+        for m in filtered:
+            print(Fore.CYAN + f"Event: {m['market_slug'] or 'N/A'} | End Date: {m['end_date']}")
         if not filtered:
             print(Fore.RED + "No markets found with that end date.")
         else:
@@ -138,22 +432,45 @@ def filter_markets(client):
                     csvwriter = csv.writer(csvfile)
                     csvwriter.writerow(["event_slug", "link"])
                     for m in filtered:
-                        event_slug = m.get("market_slug", "N/A")
+                        event_slug = m["market_slug"] or "N/A"
                         link = f"https://polymarket.com/event/{event_slug}"
                         csvwriter.writerow([event_slug, link])
                 print(Fore.GREEN + f"CSV file '{filename}' created successfully.")
             except Exception as e:
                 print(Fore.RED + f"Error writing CSV file: {str(e)}")
     elif option == "2":
-        keyword = input(Fore.YELLOW + "Keyword (Filter): ").strip().lower()
-        filtered = [m for m in markets if keyword in m.get("market_slug", "").lower()]
-        if not filtered:
-            print(Fore.RED + "No markets found with that keyword.")
+        keyword = input(Fore.YELLOW + "Keyword (Filter): ").strip()
+        if screener.search(text=keyword, page_size=0)[1]:
+            browse_markets(screener, text=keyword)
         else:
-            for m in filtered:
-                market_slug = m.get("market_slug", "N/A")
-                condition_id = m.get("condition_id", "N/A")
-                print(Fore.CYAN + f"Event: {market_slug} | condition_id: {condition_id}")
+            # Words match as prefixes; a keyword from the middle of a word still matches the slug.
+            browse_markets(screener, slug_contains=keyword)
+    elif option == "3":
+        try:
+            query = {"text": input(Fore.YELLOW + "Keywords (question/slug/category, Enter to skip): ").strip(), "ranges": {}}
+            start = input(Fore.YELLOW + "Ends on or after (YYYY-MM-DD, Enter to skip): ").strip()
+            end = input(Fore.YELLOW + "Ends on or before (YYYY-MM-DD, Enter to skip): ").strip()
+            if start or end:
+                query["ranges"]["end_date"] = (start or None, end or None)
+            for field, label in (("price", "Price"), ("rewards_daily_rate", "Daily reward"),
+                                 ("max_spread", "Max spread"), ("min_size", "Min size")):
+                bounds = prompt_range(label)
+                if bounds:
+                    query["ranges"][field] = bounds
+            if input(Fore.YELLOW + "Filter or sort by book liquidity? (y/n): ").strip().lower() == "y":
+                print(Fore.CYAN + "Fetching order books for active markets...")
+                screener.load_liquidity()
+                bounds = prompt_range("Liquidity (USD)")
+                if bounds:
+                    query["ranges"]["liquidity"] = bounds
+            query["active_only"] = input(Fore.YELLOW + "Active markets only? (y/n): ").strip().lower() == "y"
+            sort_by = input(Fore.YELLOW + f"Sort by ({', '.join(NUMERIC_FIELDS)}; Enter for none): ").strip()
+            if sort_by:
+                query["sort_by"] = sort_by
+                query["descending"] = input(Fore.YELLOW + "Descending? (y/n): ").strip().lower() == "y"
+            browse_markets(screener, **query)
+        except Exception as e:
+            print(Fore.RED + f"Error: {str(e)}")
     else:
         print(Fore.RED + "Invalid selection.")
     pause()
@@ -264,11 +581,11 @@ def fetch_all_market_data(client):
         print(Fore.RED + f"Error retrieving market data: {str(e)}")
     pause()
 
-def create_buy_order(client):
-    """Handles creation of buy orders with FOK, GTC, and GTD options."""
+def place_order(client, side):
+    """Handles creation of buy or sell orders with FOK, GTC, and GTD options."""
     clear_screen()
     display_header()
-    print(Fore.GREEN + "--- Create Buy Order ---\n")
+    print(Fore.GREEN + f"--- Create {side.capitalize()} Order ---\n")
     print(Fore.GREEN + "Select order type:")
     print(Fore.GREEN + "1. FOK (Market Order)")
     print(Fore.GREEN + "2. GTC (Limit Order)")
@@ -277,46 +594,37 @@ def create_buy_order(client):
     order_type_choice = input(Fore.YELLOW + "Choose an option: ").strip()
     if order_type_choice == '4':
         return
+    order_type = {'1': "FOK", '2': "GTC", '3': "GTD"}.get(order_type_choice)
+    if order_type is None:
+        print(Fore.RED + "Invalid selection.")
+        pause()
+        return
     try:
-        token_id = input(Fore.YELLOW + "\nEnter Token ID: ").strip()
-        if order_type_choice == '1':
-            amount = float(input(Fore.YELLOW + "Enter amount in USD: "))
-            order_args = MarketOrderArgs(
-                token_id=token_id,
-                amount=amount,
-                side=BUY,
-            )
-            signed_order = client.create_market_order(order_args)
-            resp = client.post_order(signed_order, OrderType.FOK)
-        elif order_type_choice == '2':
-            price = float(input(Fore.YELLOW + "Enter price per token: "))
-            size = float(input(Fore.YELLOW + "Enter number of tokens: "))
-            order_args = OrderArgs(
-                price=price,
-                size=size,
-                side=BUY,
-                token_id=token_id,
-            )
-            signed_order = client.create_order(order_args)
-            resp = client.post_order(signed_order, OrderType.GTC)
-        elif order_type_choice == '3':
-            price = float(input(Fore.YELLOW + "Enter price per token: "))
-            size = float(input(Fore.YELLOW + "Enter number of tokens: "))
-            expire_seconds = int(input(Fore.YELLOW + "Enter valid duration in seconds: "))
-            expiration = int(datetime.now().timestamp()) + expire_seconds + 60
-            order_args = OrderArgs(
-                price=price,
-                size=size,
-                side=BUY,
-                token_id=token_id,
-                expiration=str(expiration),
-            )
-            signed_order = client.create_order(order_args)
-            resp = client.post_order(signed_order, OrderType.GTD)
+        order = {"token_id": input(Fore.YELLOW + "\nEnter Token ID: ").strip(), "order_type": order_type, "side": side}
+        if order_type == "FOK":
+            prompt = "Enter amount in USD: " if side == BUY else "Enter number of tokens to sell (or 'all'): "
+            order["amount"] = input(Fore.YELLOW + prompt).strip()
         else:
-            print(Fore.RED + "Invalid selection.")
-            pause()
-            return
+            order["price"] = input(Fore.YELLOW + "Enter price per token: ").strip()
+            prompt = "Enter number of tokens: " if side == BUY else "Enter number of tokens to sell (or 'all'): "
+            order["size"] = input(Fore.YELLOW + prompt).strip()
+            if order_type == "GTD":
+                order["expire_seconds"] = input(Fore.YELLOW + "Enter valid duration in seconds: ").strip()
+        if order_type == "FOK" and fok_presize is not None:
+            order, estimate, action = presize_fok_orders(client, [order], fok_presize)[0]
+            if estimate is not None:
+                average = f"{estimate.average_price:.4f}" if estimate.average_price is not None else "-"
+                unit = "USD" if side == BUY else "tokens"
+                print(Fore.CYAN + f"\nBook fills {estimate.fillable:.4f} of {estimate.amount:.4f} {unit} at {average} average "
+                                  f"(worst level {estimate.worst_price if estimate.worst_price is not None else '-'}).")
+            if action == SKIPPED:
+                print(Fore.RED + "Order skipped: the book cannot fill it.")
+                pause()
+                return
+            if action is not None and action != FITS:
+                print(Fore.YELLOW + f"Order {action}: {order['order_type']} for {order['amount']} {unit}.")
+        positions = position_snapshot(client) if side == SELL else None
+        resp = execute_order(client, order, positions, risk_engine)
         print(Fore.GREEN + "\nResponse from server:")
         print(Fore.CYAN + f"Success: {resp.get('success', 'N/A')}")
         print(Fore.CYAN + f"Error message: {resp.get('errorMsg', 'None')}")
@@ -327,143 +635,206 @@ def create_buy_order(client):
         print(Fore.RED + f"\nError creating order: {str(e)}")
     pause()
 
+def save_tasks(tasks, csv_filename=CSV_FILENAME):
+    """Writes scheduled tasks to CSV, upgrading older files to the current columns."""
+    save_csv_rows(csv_filename, tasks, TASK_FIELDNAMES)
+
+def parse_schedule(value):
+    """Parses a scheduled_datetime, with or without seconds."""
+    for fmt in SCHEDULE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), fmt)
+        except ValueError:
+            pass
+    raise ValueError(f"invalid scheduled_datetime '{value}'")
+
+def is_critical(task):
+    return str(task.get("critical") or "").strip().lower() in ("y", "yes", "true", "1")
+
 def schedule_task(client):
     """Interactively schedule an order and save it to a CSV file."""
     clear_screen()
     display_header()
     print(Fore.GREEN + "--- Schedule Order ---\n")
-    scheduled_str = input(Fore.YELLOW + "Enter planned date and time (YYYY-MM-DD HH:MM): ").strip()
+    scheduled_str = input(Fore.YELLOW + "Enter planned date and time (YYYY-MM-DD HH:MM[:SS]): ").strip()
     try:
-        scheduled_datetime = datetime.strptime(scheduled_str, "%Y-%m-%d %H:%M")
+        scheduled_datetime = parse_schedule(scheduled_str)
     except ValueError:
         print(Fore.RED + "Invalid date/time format.")
         pause()
         return
     token_id = input(Fore.YELLOW + "Enter Token ID: ").strip()
+    side = input(Fore.YELLOW + "Side (BUY/SELL) [BUY]: ").strip().upper() or BUY
+    if side not in (BUY, SELL):
+        print(Fore.RED + "Invalid side.")
+        pause()
+        return
+    account = ""
+    registry = get_account_registry(client)
+    if len(registry.names) > 1:
+        account = input(Fore.YELLOW + f"Account ({', '.join(registry.names)}) [{registry.names[0]}]: ").strip()
+        try:
+            registry.get(account)
+        except ValueError as e:
+            print(Fore.RED + str(e))
+            pause()
+            return
     print(Fore.GREEN + "Select order type:")
     print(Fore.GREEN + "1. FOK (Market Order)")
     print(Fore.GREEN + "2. GTC (Limit Order)")
     print(Fore.GREEN + "3. GTD (Limit Order with Expiration)")
     order_type_choice = input(Fore.YELLOW + "Option: ").strip()
+    task = {
+        "scheduled_datetime": scheduled_datetime.strftime(SCHEDULE_FORMATS[0] if scheduled_datetime.second else SCHEDULE_FORMATS[1]),
+        "token_id": token_id,
+        "order_type": "",
+        "amount": "",
+        "price": "",
+        "size": "",
+        "expire_seconds": "",
+        "side": side,
+        "account": account,
+        "critical": "",
+        "priority": ""
+    }
     if order_type_choice == '1':
-        order_type = "FOK"
-        amount = input(Fore.YELLOW + "Enter amount in USD: ").strip()
-        task = {
-            "scheduled_datetime": scheduled_datetime.strftime("%Y-%m-%d %H:%M"),
-            "token_id": token_id,
-            "order_type": order_type,
-            "amount": amount,
-            "price": "",
-            "size": "",
-            "expire_seconds": ""
-        }
-    elif order_type_choice == '2':
-        order_type = "GTC"
-        price = input(Fore.YELLOW + "Enter price per token: ").strip()
-        size = input(Fore.YELLOW + "Enter number of tokens: ").strip()
-        task = {
-            "scheduled_datetime": scheduled_datetime.strftime("%Y-%m-%d %H:%M"),
-            "token_id": token_id,
-            "order_type": order_type,
-            "amount": "",
-            "price": price,
-            "size": size,
-            "expire_seconds": ""
-        }
-    elif order_type_choice == '3':
-        order_type = "GTD"
-        price = input(Fore.YELLOW + "Enter price per token: ").strip()
-        size = input(Fore.YELLOW + "Enter number of tokens: ").strip()
-        expire_seconds = input(Fore.YELLOW + "Enter valid duration in seconds: ").strip()
-        task = {
-            "scheduled_datetime": scheduled_datetime.strftime("%Y-%m-%d %H:%M"),
-            "token_id": token_id,
-            "order_type": order_type,
-            "amount": "",
-            "price": price,
-            "size": size,
-            "expire_seconds": expire_seconds
-        }
+        task["order_type"] = "FOK"
+        prompt = "Enter amount in USD: " if side == BUY else "Enter number of tokens to sell (or 'all'): "
+        task["amount"] = input(Fore.YELLOW + prompt).strip()
+    elif order_type_choice in ('2', '3'):
+        task["order_type"] = "GTC" if order_type_choice == '2' else "GTD"
+        task["price"] = input(Fore.YELLOW + "Enter price per token: ").strip()
+        task["size"] = input(Fore.YELLOW + "Enter number of tokens: ").strip()
+        if task["order_type"] == "GTD":
+            task["expire_seconds"] = input(Fore.YELLOW + "Enter valid duration in seconds: ").strip()
     else:
         print(Fore.RED + "Invalid selection.")
         pause()
         return
+    if input(Fore.YELLOW + "Critical (pre-sign and fire on the exact second)? (y/n): ").strip().lower() == "y":
+        task["critical"] = "y"
+    task["priority"] = input(Fore.YELLOW + "Priority among tasks at the same time (higher fires first) [0]: ").strip()
+    try:
+        task_priority(task)
+    except ValueError:
+        print(Fore.RED + "Invalid priority.")
+        pause()
+        return
     csv_filename = CSV_FILENAME
-    file_exists = os.path.isfile(csv_filename)
     try:
-        with open(csv_filename, "a", newline="", encoding="utf-8") as csvfile:
-            fieldnames = ["scheduled_datetime", "token_id", "order_type", "amount", "price", "size", "expire_seconds"]
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            if not file_exists:
-                writer.writeheader()
-            writer.writerow(task)
+        tasks = load_csv_rows(csv_filename) if os.path.isfile(csv_filename) else []
+        tasks.append(task)
+        save_tasks(tasks, csv_filename)
         print(Fore.GREEN + "Order successfully scheduled and saved to CSV.")
     except Exception as e:
         print(Fore.RED + f"Error writing to CSV file: {str(e)}")
     pause()
 
-def execute_scheduled_order(client, task):
+def execute_scheduled_order(client, task, positions=None, risk=None):
     """Executes a scheduled order based on CSV data."""
-    print(Fore.CYAN + f"Executing scheduled order: Token ID: {task['token_id']}, Order Type: {task['order_type']}")
-    try:
-        if task["order_type"].upper() == "FOK":
-            amount = float(task["amount"])
-            order_args = MarketOrderArgs(
-                token_id=task["token_id"],
-                amount=amount,
-                side=BUY,
-            )
-            signed_order = client.create_market_order(order_args)
-            resp = client.post_order(signed_order, OrderType.FOK)
-        elif task["order_type"].upper() == "GTC":
-            price = float(task["price"])
-            size = float(task["size"])
-            order_args = OrderArgs(
-                price=price,
-                size=size,
-                side=BUY,
-                token_id=task["token_id"],
-            )
-            signed_order = client.create_order(order_args)
-            resp = client.post_order(signed_order, OrderType.GTC)
-        elif task["order_type"].upper() == "GTD":
-            price = float(task["price"])
-            size = float(task["size"])
-            expire_seconds = int(task["expire_seconds"])
-            expiration = int(datetime.now().timestamp()) + expire_seconds + 60
-            order_args = OrderArgs(
-                price=price,
-                size=size,
-                side=BUY,
-                token_id=task["token_id"],
-                expiration=str(expiration),
-            )
-            signed_order = client.create_order(order_args)
-            resp = client.post_order(signed_order, OrderType.GTD)
-        else:
-            print(Fore.RED + "Unknown order type.")
+    side = (task.get("side") or BUY).upper()
+    fields = dict(token_id=task["token_id"], order_type=task["order_type"], side=side)
+    event_log.emit("task_start", f"Executing scheduled order: Token ID: {task['token_id']}, Order Type: {task['order_type']}, Side: {side}", **fields)
+    try:
+        resp = execute_order(client, task, positions, risk)
+        if resp is None:
             return
-        print(Fore.GREEN + "Order successfully executed!")
-        print(Fore.CYAN + f"Response from server: {resp}")
+        event_log.emit("task_executed", f"Order successfully executed!\nResponse from server: {resp}", "ok", response=resp, **fields)
     except Exception as e:
-        print(Fore.RED + f"Error executing order: {str(e)}")
+        event_log.emit("task_error", f"Error executing order: {str(e)}", "error", error=str(e), **fields)
 
 def print_scheduled_tasks_overview(tasks):
     """Prints a structured overview of scheduled tasks."""
     print(Fore.BLUE + "\nScheduled Tasks Overview:")
-    print(Fore.BLUE + f"{'Execution Time':<20} | {'Token ID':<10} | {'Order Type':<8} | Details")
-    print(Fore.BLUE + "-" * 60)
-    for task in sorted(tasks, key=lambda x: datetime.strptime(x["scheduled_datetime"], "%Y-%m-%d %H:%M")):
+    print(Fore.BLUE + f"{'Execution Time':<20} | {'Token ID':<10} | {'Order Type':<8} | {'Side':<4} | {'Account':<10} | Details")
+    print(Fore.BLUE + "-" * 80)
+    for task in sorted(tasks, key=lambda x: parse_schedule(x["scheduled_datetime"])):
         exec_time = task["scheduled_datetime"]
         token = task["token_id"]
         order_type = task["order_type"]
+        side = (task.get("side") or BUY).upper()
         if order_type.upper() == "FOK":
-            details = f"Amount: {task['amount']} USD"
+            details = f"Amount: {task['amount']} USD" if side == BUY else f"Amount: {task['amount']} tokens"
         else:
             details = f"Price: {task['price']} | Size: {task['size']}"
-        print(Fore.BLUE + f"{exec_time:<20} | {token:<10} | {order_type:<8} | {details}")
+        account = task.get("account") or "default"
+        if is_critical(task):
+            details += " | critical"
+        if task_priority(task):
+            details += f" | priority {task_priority(task):g}"
+        print(Fore.BLUE + f"{exec_time:<20} | {token:<10} | {order_type:<8} | {side:<4} | {account:<10} | {details}")
     print()
 
+def task_priority(task):
+    value = str(task.get("priority") or "").strip()
+    return float(value) if value else 0.0
+
+def group_fire_batches(tasks):
+    """Groups tasks by scheduled time; each group is ordered by priority, highest first."""
+    groups = {}
+    for task in tasks:
+        groups.setdefault(parse_schedule(task["scheduled_datetime"]), []).append(task)
+    return [(scheduled, sorted(group, key=task_priority, reverse=True)) for scheduled, group in sorted(groups.items())]
+
+def fire_task_group(registry, tasks, scheduled, positions, wait=True):
+    """Fires tasks scheduled for the same time together.
+
+    Orders are pre-signed and each account's connection warmed first. With
+    wait, the group then waits for scheduled: spinning on the precision timer
+    if any task is critical, sleeping otherwise. All posts start concurrently
+    in priority order, and the spread between first and last post is reported.
+    """
+    prepared = []
+    for task in tasks:
+        # A malformed task is reported and dropped here; the rest of its group still fires.
+        try:
+            account = registry.get(task.get("account"))
+            prepared.append((account, task, presign_task(account.client, task)))
+        except ValueError as e:
+            event_log.emit("order_error", f"Error preparing task for token {task.get('token_id')}: {str(e)}", "error",
+                           token_id=task.get("token_id"), order_type=task.get("order_type"), error=str(e))
+    if not prepared:
+        return []
+    for account in {account.name: account for account, _, _ in prepared}.values():
+        try:
+            account.client.get_ok()
+        except Exception as e:
+            event_log.emit("warm_error", f"Error warming connection for {account.name}: {str(e)}", "error",
+                           account=account.name, error=str(e))
+    calls = [partial(execute_order, account.client, task, positions.get(account.name), risk_engine, signed)
+             for account, task, signed in prepared]
+    critical = any(is_critical(task) for _, task, _ in prepared)
+    workers = min(FIRE_WORKERS, len(calls))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        warm_executor(executor, workers)
+        error = None
+        if wait:
+            event_log.emit("group_armed", f"\n{len(prepared)} task(s) armed for {scheduled:%Y-%m-%d %H:%M:%S}{' (critical)' if critical else ''}.",
+                           scheduled=scheduled.isoformat(), tasks=len(prepared), critical=critical)
+            if critical:
+                error = fire_timer.wait(scheduled.timestamp())
+            else:
+                time.sleep(max(0.0, (scheduled - server_now()).total_seconds()))
+        results = fire_all(executor, calls)
+    post_spread, ack_spread = fire_spread(results)
+    timing = f", fire error {error * 1e6:.0f} us" if error is not None else ""
+    event_log.emit("group_fired", f"[{server_now():%H:%M:%S.%f}] Fired {len(results)} task(s) scheduled for {scheduled:%Y-%m-%d %H:%M:%S}{timing} | "
+                                  f"post spread {post_spread * 1000:.2f} ms | ack spread {ack_spread * 1000:.2f} ms",
+                   scheduled=scheduled.isoformat(), tasks=len(results), fire_error_us=None if error is None else round(error * 1e6, 1),
+                   post_spread_ms=round(post_spread * 1000, 3), ack_spread_ms=round(ack_spread * 1000, 3))
+    first = min(r.started for r in results)
+    for (account, task, _), result in zip(prepared, results):
+        offset_ms, ack_ms = (result.started - first) * 1000, (result.finished - result.started) * 1000
+        label = f"Token {task['token_id']} | {task['order_type']} | {account.name} | +{offset_ms:.2f} ms"
+        fields = dict(token_id=task["token_id"], order_type=task["order_type"], side=(task.get("side") or BUY).upper(),
+                      account=account.name, offset_ms=round(offset_ms, 3), ack_ms=round(ack_ms, 3))
+        if result.error is not None:
+            event_log.emit("task_error", f"{label} | Error: {str(result.error)}", "error", error=str(result.error), **fields)
+        elif result.result is not None:
+            event_log.emit("task_fired", f"{label} | ack {ack_ms:.1f} ms | Response: {result.result}", "ok",
+                           response=result.result, **fields)
+    return results
+
 def run_csv_tasks(client):
     """Reads tasks from CSV and executes them at the scheduled time."""
     clear_screen()
@@ -490,34 +861,190 @@ def run_csv_tasks(client):
         return
     # Print scheduled tasks overview
     print_scheduled_tasks_overview(tasks)
+    registry = get_account_registry(client)
+    try:
+        for task in tasks:
+            parse_schedule(task["scheduled_datetime"])
+            task_priority(task)
+        # One position snapshot per account holding SELL tasks.
+        positions = {account.name: PositionSnapshot(account.client, ttl=120.0, orders=account.store)
+                     for account, group in registry.split(tasks)
+                     if any((t.get("side") or BUY).strip().upper() == SELL for t in group)}
+    except ValueError as e:
+        print(Fore.RED + f"Error in '{csv_filename}': {str(e)}")
+        pause()
+        return
+    start_risk_batch(client)
+    warm_metadata(t.get("token_id") for t in tasks)
+
     print(Fore.GREEN + "Starting task runner. Press Ctrl+C to abort.\n")
     try:
-        while tasks:
-            now = datetime.now()
-            remaining_tasks = []
-            for task in tasks:
-                scheduled_time = datetime.strptime(task["scheduled_datetime"], "%Y-%m-%d %H:%M")
-                if now >= scheduled_time:
-                    print(Fore.CYAN + f"\n[{now.strftime('%Y-%m-%d %H:%M:%S')}] Executing task scheduled for {task['scheduled_datetime']}")
-                    execute_scheduled_order(client, task)
-                else:
-                    remaining_tasks.append(task)
-            tasks = remaining_tasks
+        while True:
+            now = server_now()
+            due = [t for t in tasks if now >= parse_schedule(t["scheduled_datetime"])]
+            tasks = [t for t in tasks if now < parse_schedule(t["scheduled_datetime"])]
+            # Tasks already past due (e.g. when the runner starts late) fire right away.
+            for scheduled, group in group_fire_batches(due):
+                fire_task_group(registry, group, scheduled, positions, wait=False)
             # Update CSV with remaining tasks
-            with open(csv_filename, "w", newline="", encoding="utf-8") as csvfile:
-                fieldnames = ["scheduled_datetime", "token_id", "order_type", "amount", "price", "size", "expire_seconds"]
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                for task in tasks:
-                    writer.writerow(task)
-            if tasks:
-                time.sleep(60)
-            else:
-                print(Fore.GREEN + "All tasks have been executed.")
+            save_tasks(tasks, csv_filename)
+            if not tasks:
+                event_log.emit("runner_done", "All tasks have been executed.", "ok")
+                break
+            next_due, group = group_fire_batches(tasks)[0]
+            wait = (next_due - server_now()).total_seconds()
+            if wait <= FIRE_PREPARE_SECONDS:
+                tasks = [t for t in tasks if all(t is not g for g in group)]
+                fire_task_group(registry, group, next_due, positions)
+                save_tasks(tasks, csv_filename)
+                continue
+            # Sleep until the next group must be prepared, by the server clock, waking at least every minute.
+            time.sleep(min(60.0, max(0.0, wait - FIRE_PREPARE_SECONDS)))
+            # Keep balances warm so due SELL tasks are validated without an extra request.
+            for account, group in registry.split(tasks):
+                if account.name not in positions:
+                    continue
+                try:
+                    positions[account.name].refresh(t["token_id"] for t in group if (t.get("side") or BUY).strip().upper() == SELL)
+                except Exception as e:
+                    event_log.emit("positions_error", f"Error refreshing positions for {account.name}: {str(e)}", "error",
+                                   account=account.name, error=str(e))
     except KeyboardInterrupt:
-        print(Fore.RED + "\nTask runner aborted.")
+        event_log.emit("runner_aborted", "\nTask runner aborted.", "error")
+    stats = fire_timer.stats()
+    if stats["fires"]:
+        event_log.emit("fire_stats", f"Precision fires: {stats['fires']} | error p50 {stats['p50_us']} us | p99 {stats['p99_us']} us | max {stats['max_us']} us",
+                       "summary", **stats)
     pause()
 
+def fill_asks_under_max_price(client, token_id, max_price, total_amount):
+    """Places limit orders against every ask under max_price until total_amount tokens are bought.
+
+    Returns the number of tokens left unfilled.
+    """
+    orderbook = client.get_order_book(token_id)
+    if not orderbook.asks:
+        event_log.emit("sweep_empty", "No ask orders available.", "error", token_id=token_id)
+        return total_amount
+    # Sort asks in ascending order (lowest price first)
+    sorted_asks = sorted(orderbook.asks, key=lambda x: float(x.price))
+    remaining = total_amount
+    event_log.emit("sweep_start", f"\nAttempting to fill {total_amount} tokens with asks <= {max_price}...\n",
+                   token_id=token_id, side=BUY, max_price=max_price, size=total_amount)
+    # Iterate over asks until we either run out or the ask price exceeds max_price.
+    for ask in sorted_asks:
+        ask_price = float(ask.price)
+        if ask_price > max_price:
+            break  # All subsequent asks are above the max price
+        available_size = float(ask.size)
+        if available_size <= 0:
+            continue
+        size_to_buy = min(remaining, available_size)
+        # Create a limit order at the ask price for the determined size
+        order_args = OrderArgs(
+            price=ask_price,
+            size=size_to_buy,
+            side=BUY,
+            token_id=token_id
+        )
+        try:
+            signed_order = client.create_order(order_args)
+            resp = client.post_order(signed_order, OrderType.GTC)
+            event_log.emit("sweep_order", f"Order placed at {ask_price:.4f} for {size_to_buy} tokens.", "ok",
+                           token_id=token_id, side=BUY, price=ask_price, size=size_to_buy, response=resp)
+        except Exception as e:
+            event_log.emit("sweep_error", f"Error placing order at price {ask_price:.4f}: {str(e)}", "error",
+                           token_id=token_id, side=BUY, price=ask_price, size=size_to_buy, error=str(e))
+        remaining -= size_to_buy
+        if remaining <= 0:
+            break
+    if remaining > 0:
+        event_log.emit("sweep_done", f"\nUnfilled amount: {remaining} tokens (insufficient asks under {max_price}).", "warn",
+                       token_id=token_id, side=BUY, remaining=remaining)
+    else:
+        event_log.emit("sweep_done", "\nOrder successfully filled for the specified amount.", "ok",
+                       token_id=token_id, side=BUY, remaining=0.0)
+    return remaining
+
+def find_complement(client, token_id, market=""):
+    """Returns the other token of token_id's binary market, or None.
+
+    Uses the screener's market table when it is loaded, else looks the market up by condition ID.
+    """
+    if market_screener is not None and market_screener.client is client and market_screener.rows:
+        complement = complement_map(market_screener.rows).get(token_id)
+        if complement:
+            return complement
+    if not market:
+        return None
+    return complement_map([client.get_market(market)]).get(token_id)
+
+def can_route(client):
+    """True when client has the catalog and balance calls complement routing needs; simulated clients do not."""
+    return hasattr(client, "get_market") and hasattr(client, "get_balance_allowance")
+
+def route_buy_under_max_price(client, token_id, max_price, usd_budget=None, total_amount=None, positions=None):
+    """Buys under max_price from the native asks and, where cheaper, by selling held complement tokens into their bids.
+
+    Spends usd_budget (effective USD) or buys total_amount tokens. The legs are
+    posted concurrently and the result is compared with sweeping the native
+    book alone. Returns the last server response and the unspent USD (or the
+    tokens left unbought).
+    """
+    book = BookView.from_summary(client.get_order_book(token_id))
+    complement_id = find_complement(client, token_id, book.market)
+    complement_bids, available = [], 0.0
+    if complement_id:
+        if positions is None:
+            positions = position_snapshot(client)
+        available = positions.available(complement_id)
+        if available > 0:
+            complement_bids = BookView.from_summary(client.get_order_book(complement_id)).bids
+    else:
+        event_log.emit("route_native", f"No complement token found for {token_id}; routing on its own book only.", "warn",
+                       token_id=token_id)
+    plan = plan_buy(synthetic_asks(book.asks, complement_bids, available), max_price, usd_budget, total_amount)
+    baseline = plan_buy(synthetic_asks(book.asks, []), max_price, usd_budget, total_amount)
+    event_log.emit("route_start", f"\nRouting {len(plan.legs)} leg(s) for token {token_id}: {plan.size(NATIVE):.4f} bought, "
+                                  f"{plan.size(COMPLEMENT):.4f} via complement {complement_id}...",
+                   token_id=token_id, complement_id=complement_id, max_price=max_price, usd=usd_budget, size=total_amount)
+    sold = plan.size(COMPLEMENT)
+    if sold:
+        positions.reserve(complement_id, sold)
+    resp = None
+    try:
+        results = execute_plan(client, plan, token_id, complement_id)
+    except Exception:
+        if sold:
+            positions.release(complement_id, sold)
+        raise
+    failed_usd = failed_tokens = 0.0
+    for leg, result in results:
+        leg_token, leg_side = (token_id, BUY) if leg.source == NATIVE else (complement_id, SELL)
+        if result.error is None:
+            resp = result.result
+            if leg.source == COMPLEMENT:
+                positions.settle(complement_id, leg.size)
+            event_log.emit("sweep_order", f"{leg_side} {leg.size:.4f} of {leg_token} at {leg.price:.4f} "
+                                          f"(effective {leg.effective_price:.4f}).", "ok",
+                           token_id=leg_token, side=leg_side, price=leg.price, size=leg.size, source=leg.source, response=resp)
+            continue
+        failed_usd += leg.size * leg.effective_price
+        failed_tokens += leg.size
+        if leg.source == COMPLEMENT:
+            positions.release(complement_id, leg.size)
+        event_log.emit("sweep_error", f"Error placing {leg_side} at price {leg.price:.4f}: {str(result.error)}", "error",
+                       token_id=leg_token, side=leg_side, price=leg.price, size=leg.size, source=leg.source, error=str(result.error))
+    gain = plan.improvement(baseline)
+    average = f"{gain['average_price']:.4f}" if gain["average_price"] is not None else "-"
+    baseline_average = f"{gain['baseline_average_price']:.4f}" if gain["baseline_average_price"] is not None else "-"
+    event_log.emit("route_summary", f"Routed: {gain['tokens']:.4f} tokens at {average} avg | single book: "
+                                    f"{gain['baseline_tokens']:.4f} at {baseline_average} | extra tokens {gain['extra_tokens']:.4f} | "
+                                    f"saved ${gain['saved_usd']:.4f}", "summary", token_id=token_id, **gain)
+    if usd_budget is not None:
+        return resp, usd_budget - plan.cost + failed_usd
+    return resp, total_amount - plan.tokens + failed_tokens
+
 def create_buy_under_max_price(client):
     """Buy tokens by filling every ask underneath a maximum price."""
     clear_screen()
@@ -536,68 +1063,495 @@ def create_buy_under_max_price(client):
         print(Fore.RED + "Invalid token amount.")
         pause()
         return
+    route = input(Fore.YELLOW + "Also buy by selling held complement tokens into their bids when cheaper? (y/N): ").strip().lower() == "y"
     try:
-        # Retrieve the order book for the given token
-        orderbook = client.get_order_book(token_id)
-    except Exception as e:
-        print(Fore.RED + f"Error retrieving order book: {str(e)}")
+        # Reserve the worst case (every token at max_price) and return what was not filled.
+        risk_engine.check(token_id, BUY, max_price * total_amount)
+    except RiskRejected as e:
+        print(Fore.RED + f"Order rejected by risk checks: {str(e)}")
         pause()
         return
+    try:
+        if route:
+            remaining = route_buy_under_max_price(client, token_id, max_price, total_amount=total_amount)[1]
+        else:
+            remaining = fill_asks_under_max_price(client, token_id, max_price, total_amount)
+        risk_engine.release(token_id, BUY, max_price * max(0.0, remaining))
+    except Exception as e:
+        risk_engine.release(token_id, BUY, max_price * total_amount)
+        print(Fore.RED + f"Error retrieving order book: {str(e)}")
+    pause()
+
+def spend_under_max_price(client, token_id, max_price, usd_budget):
+    """Spends a USD budget on every ask under max_price (the FOK_MAX order type).
+
+    Returns the last server response and the unspent USD.
+    """
+    resp = None
+    # Retrieve the order book for the token.
+    orderbook = client.get_order_book(token_id)
     if not orderbook.asks:
-        print(Fore.RED + "No ask orders available.")
-        pause()
-        return
-    # Sort asks in ascending order (lowest price first)
+        event_log.emit("sweep_empty", f"No ask orders available for token {token_id}.", "error", token_id=token_id)
+        return resp, usd_budget
+    # Sort asks in ascending order.
     sorted_asks = sorted(orderbook.asks, key=lambda x: float(x.price))
-    remaining = total_amount
-    print(Fore.CYAN + f"\nAttempting to fill {total_amount} tokens with asks <= {max_price}...\n")
-    # Iterate over asks until we either run out or the ask price exceeds max_price.
+    remaining_usd = usd_budget
+    event_log.emit("sweep_start", f"\nAttempting to spend ${usd_budget:.2f} on token {token_id} with max price ${max_price:.4f}...",
+                   token_id=token_id, side=BUY, max_price=max_price, usd=usd_budget)
     for ask in sorted_asks:
         ask_price = float(ask.price)
         if ask_price > max_price:
-            break  # All subsequent asks are above the max price
+            break  # Subsequent asks exceed max price.
         available_size = float(ask.size)
         if available_size <= 0:
             continue
-        size_to_buy = min(remaining, available_size)
-        # Create a limit order at the ask price for the determined size
+        # Determine maximum tokens that can be purchased at this ask with remaining USD.
+        max_tokens = remaining_usd / ask_price
+        # Buy no more than available tokens.
+        tokens_to_buy = min(max_tokens, available_size)
+        if tokens_to_buy <= 0:
+            continue
+        # Create a limit order at the ask price for tokens_to_buy.
         order_args = OrderArgs(
             price=ask_price,
-            size=size_to_buy,
+            size=tokens_to_buy,
             side=BUY,
             token_id=token_id
         )
         try:
             signed_order = client.create_order(order_args)
             resp = client.post_order(signed_order, OrderType.GTC)
-            print(Fore.GREEN + f"Order placed at {ask_price:.4f} for {size_to_buy} tokens.")
+            event_log.emit("sweep_order", f"Order placed at {ask_price:.4f} for {tokens_to_buy:.4f} tokens.", "ok",
+                           token_id=token_id, side=BUY, price=ask_price, size=tokens_to_buy, response=resp)
         except Exception as e:
-            print(Fore.RED + f"Error placing order at price {ask_price:.4f}: {str(e)}")
-        remaining -= size_to_buy
+            event_log.emit("sweep_error", f"Error placing order at price {ask_price:.4f}: {str(e)}", "error",
+                           token_id=token_id, side=BUY, price=ask_price, size=tokens_to_buy, error=str(e))
+        # Deduct the spent USD amount.
+        remaining_usd -= tokens_to_buy * ask_price
+        if remaining_usd <= 0:
+            break
+    if remaining_usd > 0:
+        event_log.emit("sweep_done", f"\nUnspent USD: ${remaining_usd:.2f} (Not enough asks under ${max_price:.4f}).", "warn",
+                       token_id=token_id, side=BUY, remaining_usd=remaining_usd)
+    else:
+        event_log.emit("sweep_done", "\nMarket order under maximum price successfully filled for the specified amount.", "ok",
+                       token_id=token_id, side=BUY, remaining_usd=0.0)
+    return resp, remaining_usd
+
+def sell_above_min_price(client, token_id, min_price, total_size):
+    """Sells into every bid at or above min_price until total_size tokens are sold (the FOK_MIN order type).
+
+    Returns the last server response and the number of tokens left unsold.
+    """
+    resp = None
+    orderbook = client.get_order_book(token_id)
+    if not orderbook.bids:
+        event_log.emit("sweep_empty", f"No bid orders available for token {token_id}.", "error", token_id=token_id)
+        return resp, total_size
+    # Sort bids in descending order (highest price first).
+    sorted_bids = sorted(orderbook.bids, key=lambda x: float(x.price), reverse=True)
+    remaining = total_size
+    event_log.emit("sweep_start", f"\nAttempting to sell {total_size:.4f} tokens of {token_id} with min price ${min_price:.4f}...",
+                   token_id=token_id, side=SELL, min_price=min_price, size=total_size)
+    for bid in sorted_bids:
+        bid_price = float(bid.price)
+        if bid_price < min_price:
+            break  # Subsequent bids are below the min price.
+        available_size = float(bid.size)
+        if available_size <= 0:
+            continue
+        size_to_sell = min(remaining, available_size)
+        # Create a limit order at the bid price for the determined size.
+        order_args = OrderArgs(
+            price=bid_price,
+            size=size_to_sell,
+            side=SELL,
+            token_id=token_id
+        )
+        try:
+            signed_order = client.create_order(order_args)
+            resp = client.post_order(signed_order, OrderType.GTC)
+            event_log.emit("sweep_order", f"Order placed at {bid_price:.4f} for {size_to_sell:.4f} tokens.", "ok",
+                           token_id=token_id, side=SELL, price=bid_price, size=size_to_sell, response=resp)
+        except Exception as e:
+            event_log.emit("sweep_error", f"Error placing order at price {bid_price:.4f}: {str(e)}", "error",
+                           token_id=token_id, side=SELL, price=bid_price, size=size_to_sell, error=str(e))
+        remaining -= size_to_sell
         if remaining <= 0:
             break
     if remaining > 0:
-        print(Fore.YELLOW + f"\nUnfilled amount: {remaining} tokens (insufficient asks under {max_price}).")
+        event_log.emit("sweep_done", f"\nUnsold amount: {remaining:.4f} tokens (Not enough bids above ${min_price:.4f}).", "warn",
+                       token_id=token_id, side=SELL, remaining=remaining)
+    else:
+        event_log.emit("sweep_done", "\nSell order above minimum price successfully filled for the specified amount.", "ok",
+                       token_id=token_id, side=SELL, remaining=0.0)
+    return resp, max(0.0, remaining)
+
+def create_sell_above_min_price(client):
+    """Sell tokens by filling every bid at or above a minimum price."""
+    clear_screen()
+    display_header()
+    print(Fore.GREEN + "--- Sell Above Minimum Price Order ---\n")
+    order = {
+        "token_id": input(Fore.YELLOW + "Enter Token ID: ").strip(),
+        "order_type": "FOK_MIN",
+        "side": SELL,
+        "price": input(Fore.YELLOW + "Enter minimum acceptable price per token: ").strip(),
+        "amount": input(Fore.YELLOW + "Enter number of tokens to sell (or 'all'): ").strip(),
+    }
+    try:
+        execute_order(client, order, position_snapshot(client), risk_engine)
+    except Exception as e:
+        print(Fore.RED + f"Error executing order: {str(e)}")
+    pause()
+
+def resolve_order_size(order, field, side, token_id, positions):
+    """Parses an amount/size field. SELL orders accept 'all' to close the whole position."""
+    value = str(order.get(field) or "").strip()
+    if value.lower() == "all":
+        if side != SELL or positions is None:
+            raise ValueError(f"'{field}' can only be 'all' for SELL orders")
+        return positions.available(token_id)
+    return float(value)
+
+def server_now():
+    """Current time as a naive local datetime, by the server clock once it has synced."""
+    if server_clock is not None and server_clock.synced_at is not None:
+        return server_clock.now_datetime()
+    return datetime.now()
+
+def gtd_expiration(expire_seconds):
+    """Unix expiration for a GTD order that should live expire_seconds on the server."""
+    if server_clock is not None and server_clock.synced_at is not None:
+        return server_clock.expiration(expire_seconds)
+    return int(datetime.now().timestamp()) + expire_seconds + GTD_SECURITY_SECONDS
+
+def build_order_args(order, order_type, token_id, side, size):
+    """Builds the MarketOrderArgs (FOK) or OrderArgs (GTC, GTD) for an order row."""
+    if order_type == "FOK":
+        # market_price is set by the FOK pre-check; without it the client looks the price up in the book.
+        return MarketOrderArgs(
+            token_id=token_id,
+            amount=size,
+            side=side,
+            price=float(order.get("market_price") or 0),
+        )
+    order_args = OrderArgs(
+        price=float(order.get("price", 0)),
+        size=size,
+        side=side,
+        token_id=token_id,
+    )
+    if order_type == "GTD":
+        order_args.expiration = str(gtd_expiration(int(order.get("expire_seconds", 0))))
+    return order_args
+
+def presize_fok_orders(client, orders, policy):
+    """Checks the plain FOK rows of orders against their books, fetched in one batch.
+
+    Returns (order or None, FillEstimate or None, action) per row: rows the
+    book cannot fill are downsized, converted to FOK_MAX/FOK_MIN or skipped
+    (None) according to policy. Other rows, 'all' sizes and rows whose book
+    could not be fetched are returned unchecked.
+    """
+    results = [(order, None, None) for order in orders]
+    checks = []
+    for i, order in enumerate(orders):
+        if (order.get("order_type") or "").upper() != "FOK":
+            continue
+        try:
+            amount = float(str(order.get("amount") or "").strip())
+        except ValueError:
+            continue
+        checks.append((i, (order.get("side") or BUY).strip().upper(), amount))
+    if not checks:
+        return results
+    books = BookCache(client)
+    if metadata_cache is not None:
+        books.add_listener(metadata_cache.observe_book)
+    try:
+        books.refresh(orders[i].get("token_id") for i, _, _ in checks)
+    except Exception as e:
+        event_log.emit("presize_error", f"Could not fetch books for the FOK pre-check ({str(e)}); orders run unchecked.",
+                       "warn", error=str(e))
+        return results
+    started = time.perf_counter()
+    for i, side, amount in checks:
+        view = books.get(orders[i].get("token_id"))
+        if view is not None:
+            results[i] = presize_order(orders[i], side, amount, view, policy)
+    elapsed = time.perf_counter() - started
+    for source, (_, estimate, action) in zip(orders, results):
+        if action in (None, FITS):
+            continue
+        average = f"{estimate.average_price:.4f}" if estimate.average_price is not None else "-"
+        event_log.emit("fok_presize", f"FOK {source.get('side') or BUY} {source.get('amount')} of token {source.get('token_id')}: "
+                                      f"book fills {estimate.fillable:.4f} at {average} avg; {action}", "warn",
+                       token_id=source.get("token_id"), action=action, amount=estimate.amount, fillable=estimate.fillable,
+                       average_price=estimate.average_price)
+    event_log.emit("fok_presize_done", f"FOK pre-check: {len(checks)} order(s) in {elapsed * 1000:.2f} ms.", "info",
+                   checked=len(checks), seconds=elapsed)
+    return results
+
+def presign_orders(client, orders, pool=None):
+    """Signs the FOK/GTC/GTD rows of a batch up front, through pool when given.
+
+    Returns {row index: signed order}; rows left out (other order types, 'all'
+    sizes, malformed prices or expirations, signing errors) are signed by
+    execute_order as usual, which reports their errors row by row.
+    """
+    indexes, args = [], []
+    for i, order in enumerate(orders):
+        order_type = (order.get("order_type") or "").upper()
+        side = (order.get("side") or BUY).strip().upper()
+        field = "size" if order_type in ("GTC", "GTD") else "amount"
+        if order_type not in ("FOK", "GTC", "GTD") or side not in (BUY, SELL):
+            continue
+        try:
+            size = float(str(order.get(field) or "").strip())
+            order_args = build_order_args(order, order_type, order.get("token_id"), side, size)
+        except ValueError:
+            continue
+        indexes.append(i)
+        args.append(order_args)
+    signed = sign_orders(client, args, pool)
+    return {i: s for i, s in zip(indexes, signed) if not isinstance(s, Exception)}
+
+def presign_task(client, task):
+    """Signs one scheduled task ahead of its fire time; raises ValueError when the task is malformed.
+
+    Returns None for tasks execute_order signs itself (FOK_MAX/FOK_MIN, 'all'
+    sizes) and when signing fails, so the post retries it.
+    """
+    order_type = (task.get("order_type") or "").upper()
+    side = (task.get("side") or BUY).strip().upper()
+    if side not in (BUY, SELL):
+        raise ValueError(f"Unknown side '{side}'")
+    if order_type not in ("FOK", "GTC", "GTD"):
+        return None
+    value = str(task.get("size" if order_type in ("GTC", "GTD") else "amount") or "").strip()
+    if value.lower() == "all":
+        return None
+    signed = sign_orders(client, [build_order_args(task, order_type, task.get("token_id"), side, float(value))])[0]
+    return None if isinstance(signed, Exception) else signed
+
+def execute_order(client, order, positions=None, risk=None, signed_order=None):
+    """Executes a single order (CSV row, scheduled task or interactive entry) and returns the server response.
+
+    SELL sizes are reserved against positions (a PositionSnapshot) before signing,
+    so a batch cannot sell more than the cached balance. When risk (a RiskEngine)
+    is given, the order must pass its pre-trade checks first. signed_order is an
+    already signed FOK/GTC/GTD order for this row (see presign_orders).
+    """
+    token_id = order.get("token_id")
+    order_type = (order.get("order_type") or "").upper()
+    side = (order.get("side") or BUY).strip().upper()
+    if order_type not in ORDER_TYPES:
+        event_log.emit("order_skipped", f"Unknown order type '{order_type}' for token {token_id}. Skipping.", "error",
+                       token_id=token_id, order_type=order_type)
+        return None
+    if side not in (BUY, SELL):
+        raise ValueError(f"Unknown side '{side}'")
+    if order_type == "FOK_MAX" and side != BUY:
+        raise ValueError("FOK_MAX only buys; use FOK_MIN to sell")
+    if order_type == "FOK_MIN" and side != SELL:
+        raise ValueError("FOK_MIN only sells; use FOK_MAX to buy")
+    # FOK amounts are USD for BUY and tokens for SELL; FOK_MAX is USD, FOK_MIN is tokens.
+    size = resolve_order_size(order, "size" if order_type in ("GTC", "GTD") else "amount", side, token_id, positions)
+    # USD notional for the risk checks: FOK and FOK_MAX buys are already in USD.
+    if side == SELL:
+        notional = 0.0
+    elif order_type in ("FOK", "FOK_MAX"):
+        notional = size
     else:
-        print(Fore.GREEN + "\nOrder successfully filled for the specified amount.")
+        notional = float(order.get("price", 0)) * size
+    if risk is not None:
+        risk.check(token_id, side, notional)
+    reserved = 0.0
+    if side == SELL and positions is not None:
+        try:
+            positions.reserve(token_id, size)
+        except Exception:
+            if risk is not None:
+                risk.release(token_id, side, notional)
+            raise
+        reserved = size
+    try:
+        if order_type in ("FOK", "GTC", "GTD"):
+            if signed_order is None:
+                order_args = build_order_args(order, order_type, token_id, side, size)
+                if order_type == "FOK":
+                    signed_order = client.create_market_order(order_args)
+                else:
+                    signed_order = client.create_order(order_args)
+            resp = client.post_order(signed_order, getattr(OrderType, order_type))
+            if reserved:
+                positions.settle(token_id, reserved)
+            store = client_order_store(client) if risk is not None and notional and order_type != "FOK" else None
+            if store is not None and isinstance(resp, dict) and resp.get("orderID"):
+                # Amending the order later releases exactly this reservation.
+                store.record_risk(resp["orderID"], notional)
+        elif order_type == "FOK_MAX":
+            # Market order that fills any ask under a max acceptable price.
+            # "amount" is the USD budget and "price" is the maximum acceptable price per token.
+            if route_complement and can_route(client):
+                resp, remaining_usd = route_buy_under_max_price(client, token_id, float(order.get("price", 0)), size,
+                                                                positions=positions)
+            else:
+                resp, remaining_usd = spend_under_max_price(client, token_id, float(order.get("price", 0)), size)
+            if risk is not None:
+                risk.release(token_id, side, max(0.0, remaining_usd))
+        else:
+            # FOK_MIN: sells "amount" tokens into any bid at or above the minimum price in "price".
+            resp, unsold = sell_above_min_price(client, token_id, float(order.get("price", 0)), size)
+            if reserved:
+                positions.release(token_id, unsold)
+                positions.settle(token_id, reserved - unsold)
+    except Exception:
+        if reserved:
+            positions.release(token_id, reserved)
+        if risk is not None:
+            risk.release(token_id, side, notional)
+        raise
+    return resp
+
+def execute_csv_order(client, order, positions=None, risk=None, signed_order=None):
+    """Executes a single row of an orders CSV and returns the server response."""
+    resp = execute_order(client, order, positions, risk, signed_order)
+    if resp is None:
+        return None
+    side = (order.get("side") or BUY).strip().upper()
+    order_type = order.get("order_type", "").upper()
+    event_log.emit("order_executed", f"Executed order for token {order.get('token_id')} | Type: {order_type} | Side: {side} | Response: {resp.get('status', 'N/A')}",
+                   "ok", token_id=order.get("token_id"), order_type=order_type, side=side, response=resp)
+    return resp
+
+def load_csv_rows(csv_filename):
+    """Loads all rows of a CSV file as dictionaries."""
+    with open(csv_filename, "r", newline="", encoding="utf-8") as csvfile:
+        return list(csv.DictReader(csvfile))
+
+def save_csv_rows(csv_filename, rows, fieldnames):
+    """Overwrites a CSV file with rows, ignoring keys that are not in fieldnames."""
+    with open(csv_filename, "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+
+def arm_trigger(client):
+    """Interactively arm an order that fires when a book condition holds, saved to a CSV file."""
+    clear_screen()
+    display_header()
+    print(Fore.GREEN + "--- Arm Triggered Order ---\n")
+    row = {"watch_token_id": input(Fore.YELLOW + "Token ID to watch: ").strip()}
+    print(Fore.GREEN + "Select condition:")
+    for i, condition in enumerate(CONDITIONS, 1):
+        print(Fore.GREEN + f"{i}. {condition}")
+    try:
+        row["condition"] = CONDITIONS[int(input(Fore.YELLOW + "Option: ").strip()) - 1]
+        row["threshold"] = str(float(input(Fore.YELLOW + "Threshold: ").strip()))
+        row["ticks"] = input(Fore.YELLOW + "Ticks from best price: ").strip() if row["condition"].endswith("_depth_gt") else ""
+    except (ValueError, IndexError):
+        print(Fore.RED + "Invalid selection.")
+        pause()
+        return
+    row["token_id"] = input(Fore.YELLOW + "Token ID to trade [same as watched]: ").strip() or row["watch_token_id"]
+    row["side"] = input(Fore.YELLOW + "Side (BUY/SELL) [BUY]: ").strip().upper() or BUY
+    row["order_type"] = input(Fore.YELLOW + f"Order type ({'/'.join(ORDER_TYPES)}): ").strip().upper()
+    if row["order_type"] in ("GTC", "GTD"):
+        row["price"] = input(Fore.YELLOW + "Enter price per token: ").strip()
+        row["size"] = input(Fore.YELLOW + "Enter number of tokens: ").strip()
+        if row["order_type"] == "GTD":
+            row["expire_seconds"] = input(Fore.YELLOW + "Enter valid duration in seconds: ").strip()
+    else:
+        row["amount"] = input(Fore.YELLOW + "Enter amount (USD for BUY, tokens for SELL): ").strip()
+        if row["order_type"] in ("FOK_MAX", "FOK_MIN"):
+            row["price"] = input(Fore.YELLOW + "Enter limit price per token: ").strip()
+    try:
+        rows = load_csv_rows(TRIGGERS_CSV_FILENAME) if os.path.isfile(TRIGGERS_CSV_FILENAME) else []
+        rows.append(row)
+        save_csv_rows(TRIGGERS_CSV_FILENAME, rows, TRIGGER_FIELDNAMES)
+        print(Fore.GREEN + "Trigger armed and saved to CSV.")
+    except Exception as e:
+        print(Fore.RED + f"Error writing to CSV file: {str(e)}")
+    pause()
+
+def run_triggered_orders(client):
+    """Watches the books of armed triggers and fires each order once its condition holds."""
+    clear_screen()
+    display_header()
+    if not os.path.isfile(TRIGGERS_CSV_FILENAME):
+        print(Fore.RED + f"No triggered orders found in '{TRIGGERS_CSV_FILENAME}'.")
+        pause()
+        return
+    try:
+        rows = load_csv_rows(TRIGGERS_CSV_FILENAME)
+    except Exception as e:
+        print(Fore.RED + f"Error reading CSV file: {str(e)}")
+        pause()
+        return
+    engine = TriggerEngine()
+    for row in rows:
+        try:
+            engine.arm(row.get("watch_token_id") or row["token_id"], (row.get("condition") or "").strip().lower(),
+                       row["threshold"], row, row.get("ticks"))
+        except Exception as e:
+            print(Fore.RED + f"Skipping trigger for token {row.get('token_id')}: {str(e)}")
+    if not engine.triggers:
+        print(Fore.RED + "No valid triggers armed.")
+        pause()
+        return
+    sell_tokens = [r["token_id"] for r in rows if (r.get("side") or BUY).strip().upper() == SELL]
+    positions = position_snapshot(client, ttl=120.0) if sell_tokens else None
+    cache = BookCache(client)
+    if metadata_cache is not None:
+        cache.add_listener(metadata_cache.observe_book)
+    start_risk_batch(client)
+    warm_metadata(r.get("token_id") for r in rows)
+    print(Fore.BLUE + f"{len(engine.triggers)} trigger(s) armed on {len(engine.watched_tokens())} book(s). Press Ctrl+C to abort.\n")
+    try:
+        while engine.triggers:
+            started = time.monotonic()
+            fired = []
+            try:
+                for view in cache.refresh(engine.watched_tokens()):
+                    fired += engine.on_book(view)
+            except Exception as e:
+                event_log.emit("books_error", f"Error refreshing order books: {str(e)}", "error", error=str(e))
+            for trigger in fired:
+                view = cache.get(trigger.watch_token_id)
+                event_log.emit("trigger_hit", f"\n[{datetime.now():%H:%M:%S.%f}] {trigger.condition} {trigger.threshold} hit on {trigger.watch_token_id} "
+                                              f"(bid {view.best_bid}, ask {view.best_ask})",
+                               watch_token_id=trigger.watch_token_id, condition=trigger.condition, threshold=trigger.threshold,
+                               best_bid=view.best_bid, best_ask=view.best_ask)
+                try:
+                    execute_csv_order(client, trigger.order, positions, risk_engine)
+                except Exception as e:
+                    event_log.emit("order_error", f"Error executing order for token {trigger.order.get('token_id')}: {str(e)}", "error",
+                                   token_id=trigger.order.get("token_id"), error=str(e))
+            if fired:
+                fired_ids = {id(t.order) for t in fired}
+                rows = [r for r in rows if id(r) not in fired_ids]
+                save_csv_rows(TRIGGERS_CSV_FILENAME, rows, TRIGGER_FIELDNAMES)
+            time.sleep(max(0.0, TRIGGER_POLL_SECONDS - (time.monotonic() - started)))
+        event_log.emit("runner_done", "All triggers have fired.", "ok")
+    except KeyboardInterrupt:
+        event_log.emit("runner_aborted", "\nTrigger runner aborted.", "error")
     pause()
 
 def run_csv_orders(client):
     """Executes orders specified in a CSV file immediately for high-speed order execution."""
     clear_screen()
     display_header()
-    csv_filename = "orders_to_run.csv"  # Use a dedicated CSV for this purpose
+    csv_filename = ORDERS_CSV_FILENAME  # Use a dedicated CSV for this purpose
     if not os.path.isfile(csv_filename):
         print(Fore.RED + f"No CSV orders found in '{csv_filename}'.")
         pause()
         return
 
-    orders = []
     try:
-        with open(csv_filename, "r", newline="", encoding="utf-8") as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                orders.append(row)
+        orders = load_csv_rows(csv_filename)
     except Exception as e:
         print(Fore.RED + f"Error reading CSV file: {str(e)}")
         pause()
@@ -608,140 +1562,606 @@ def run_csv_orders(client):
         pause()
         return
 
-    print(Fore.BLUE + f"Executing {len(orders)} order(s) from CSV...\n")
-    for order in orders:
-        token_id = order.get("token_id")
-        order_type = order.get("order_type", "").upper()
-        try:
-            if order_type == "FOK":
-                # Standard market order without price filtering.
-                amount = float(order.get("amount", 0))
-                order_args = MarketOrderArgs(
-                    token_id=token_id,
-                    amount=amount,
-                    side=BUY,
-                )
-                signed_order = client.create_market_order(order_args)
-                resp = client.post_order(signed_order, OrderType.FOK)
-            elif order_type == "GTC":
-                price = float(order.get("price", 0))
-                size = float(order.get("size", 0))
-                order_args = OrderArgs(
-                    price=price,
-                    size=size,
-                    side=BUY,
-                    token_id=token_id,
-                )
-                signed_order = client.create_order(order_args)
-                resp = client.post_order(signed_order, OrderType.GTC)
-            elif order_type == "GTD":
-                price = float(order.get("price", 0))
-                size = float(order.get("size", 0))
-                expire_seconds = int(order.get("expire_seconds", 0))
-                expiration = int(datetime.now().timestamp()) + expire_seconds + 60
-                order_args = OrderArgs(
-                    price=price,
-                    size=size,
-                    side=BUY,
-                    token_id=token_id,
-                    expiration=str(expiration),
-                )
-                signed_order = client.create_order(order_args)
-                resp = client.post_order(signed_order, OrderType.GTD)
-            elif order_type == "FOK_MAX":
-                # New option: Market order that fills any ask under a max acceptable price
-                # "amount" is the USD budget and "price" is the maximum acceptable price per token.
-                max_price = float(order.get("price", 0))
-                usd_budget = float(order.get("amount", 0))
-                # Retrieve the order book for the token.
-                orderbook = client.get_order_book(token_id)
-                if not orderbook.asks:
-                    print(Fore.RED + f"No ask orders available for token {token_id}.")
+    registry = get_account_registry(client)
+    try:
+        groups = registry.split(orders)
+    except ValueError as e:
+        print(Fore.RED + f"Error in '{csv_filename}': {str(e)}")
+        pause()
+        return
+
+    # Named after the file only: rows are keyed by their own content, so editing one row keeps the others' state.
+    checkpoint_path = f"{csv_filename}.checkpoint"
+    checkpoint = Checkpoint(checkpoint_path, now=server_clock.now if server_clock is not None else time.time)
+    keys = {id(row): key for row, key in zip(orders, row_keys(orders))}
+    if checkpoint.records:
+        reconcile_batch(registry, checkpoint)
+        counts = checkpoint.counts(keys.values())
+        if counts[DONE] == len(orders):
+            print(Fore.YELLOW + f"Every order in '{csv_filename}' was already executed (checkpoint '{checkpoint_path}').")
+            if input(Fore.YELLOW + "Run the whole file again? (y/N): ").strip().lower() != "y":
+                checkpoint.close()
+                pause()
+                return
+            checkpoint.close()
+            os.remove(checkpoint_path)
+            checkpoint = Checkpoint(checkpoint_path, now=checkpoint.now)
+        else:
+            print(Fore.CYAN + f"Resuming '{csv_filename}': {counts[DONE]} order(s) already done are skipped; {counts[FAILED]} failed "
+                              f"and {counts[INTENT]} unconfirmed order(s) are retried, {counts[None]} run for the first time.")
+
+    def run_account(account, rows):
+        pending = [(keys[id(row)], row) for row in rows if checkpoint.state(keys[id(row)]) != DONE]
+        if fok_presize is not None:
+            checked = presize_fok_orders(account.client, [row for _, row in pending], fok_presize)
+            for (key, _), (order, _, action) in zip(pending, checked):
+                if action == SKIPPED:
+                    checkpoint.failed(key, "skipped by the FOK pre-check")
+            pending = [(key, order) for (key, _), (order, _, action) in zip(pending, checked) if action != SKIPPED]
+        if not pending:
+            return
+        rows = [row for _, row in pending]
+        sell_tokens = [o.get("token_id") for o in rows if (o.get("side") or BUY).strip().upper() == SELL]
+        positions = None
+        if sell_tokens:
+            # One concurrent balance fetch up front; every SELL row is then checked locally.
+            positions = PositionSnapshot(account.client, orders=account.store)
+            try:
+                positions.refresh(sell_tokens)
+            except Exception as e:
+                event_log.emit("positions_error", f"Error retrieving positions for {account.name}: {str(e)}", "error",
+                               account=account.name, error=str(e))
+                return
+        presigned = presign_orders(account.client, rows, signer_pool) if signer_pool is not None else {}
+        for start in range(0, len(rows), INTENT_WINDOW):
+            # Intents of the next window hit the disk (one fsync) before any of its orders is posted.
+            checkpoint.intend(pending[start:start + INTENT_WINDOW])
+            for i in range(start, min(start + INTENT_WINDOW, len(rows))):
+                key, order = pending[i]
+                checkpoint.start(key)
+                try:
+                    resp = execute_csv_order(account.client, order, positions, risk_engine, presigned.get(i))
+                except Exception as e:
+                    if not outcome_uncertain(e):
+                        checkpoint.failed(key, e)
+                    event_log.emit("order_error", f"Error executing order for token {order.get('token_id')} ({account.name}): {str(e)}",
+                                   "error", token_id=order.get("token_id"), account=account.name, error=str(e))
                     continue
-                # Sort asks in ascending order.
-                sorted_asks = sorted(orderbook.asks, key=lambda x: float(x.price))
-                remaining_usd = usd_budget
-                print(Fore.CYAN + f"\nAttempting to spend ${usd_budget:.2f} on token {token_id} with max price ${max_price:.4f}...")
-                for ask in sorted_asks:
-                    ask_price = float(ask.price)
-                    if ask_price > max_price:
-                        break  # Subsequent asks exceed max price.
-                    available_size = float(ask.size)
-                    if available_size <= 0:
-                        continue
-                    # Determine maximum tokens that can be purchased at this ask with remaining USD.
-                    max_tokens = remaining_usd / ask_price
-                    # Buy no more than available tokens.
-                    tokens_to_buy = min(max_tokens, available_size)
-                    if tokens_to_buy <= 0:
-                        continue
-                    # Create a limit order at the ask price for tokens_to_buy.
-                    order_args = OrderArgs(
-                        price=ask_price,
-                        size=tokens_to_buy,
-                        side=BUY,
-                        token_id=token_id
-                    )
-                    try:
-                        signed_order = client.create_order(order_args)
-                        resp = client.post_order(signed_order, OrderType.GTC)
-                        print(Fore.GREEN + f"Order placed at {ask_price:.4f} for {tokens_to_buy:.4f} tokens.")
-                    except Exception as e:
-                        print(Fore.RED + f"Error placing order at price {ask_price:.4f}: {str(e)}")
-                    # Deduct the spent USD amount.
-                    remaining_usd -= tokens_to_buy * ask_price
-                    if remaining_usd <= 0:
-                        break
-                if remaining_usd > 0:
-                    print(Fore.YELLOW + f"\nUnspent USD: ${remaining_usd:.2f} (Not enough asks under ${max_price:.4f}).")
+                if resp is None:
+                    checkpoint.failed(key, "not posted")
                 else:
-                    print(Fore.GREEN + "\nMarket order under maximum price successfully filled for the specified amount.")
-            else:
-                print(Fore.RED + f"Unknown order type '{order_type}' for token {token_id}. Skipping.")
-                continue
-            print(Fore.GREEN + f"Executed order for token {token_id} | Type: {order_type} | Response: {resp.get('status', 'N/A')}")
+                    checkpoint.done(key, resp.get("orderID") or resp.get("orderId"), resp.get("status"))
+
+    start_risk_batch(client)
+    warm_metadata(o.get("token_id") for o in orders)
+    print(Fore.BLUE + f"Executing {len(orders)} order(s) from CSV across {len(groups)} account(s)...\n")
+    try:
+        registry.run(orders, run_account)
+    finally:
+        checkpoint.close()
+    counts = checkpoint.counts(keys.values())
+    if counts[DONE] < len(orders):
+        print(Fore.YELLOW + f"\n{len(orders) - counts[DONE]} order(s) failed or unconfirmed; run the file again to retry them "
+                            f"(checkpoint '{checkpoint_path}').")
+    pause()
+
+
+def reconcile_batch(registry, checkpoint):
+    """Resolves rows left between intent and outcome by looking for their orders on the exchange."""
+    pending = checkpoint.ambiguous()
+    if not pending:
+        return
+    print(Fore.CYAN + f"Looking up {len(pending)} order(s) of an interrupted run...")
+    by_account = {}
+    for record in checkpoint.records.values():
+        by_account.setdefault(record.get("account") or "", []).append(record)
+    for name, records in by_account.items():
+        waiting = sum(1 for r in records if r["state"] == INTENT)
+        if not waiting:
+            continue
+        try:
+            account = registry.get(name)
+            matched = reconcile(account.client, records, account.name)
         except Exception as e:
-            print(Fore.RED + f"Error executing order for token {token_id}: {str(e)}")
+            print(Fore.RED + f"Could not look up orders of account '{name or 'default'}' ({str(e)}); they will be retried.")
+            continue
+        for key, (order_ids, status) in matched.items():
+            checkpoint.done(key, order_ids[0], f"reconciled ({status})", order_ids)
+        print(Fore.CYAN + f"{len(matched)} of {waiting} found on the exchange; the rest will be retried.")
+
+
+def warm_metadata(token_ids):
+    """Loads tick size, neg risk and fee rate for token_ids before a batch, so no order waits on them."""
+    if metadata_cache is None:
+        return
+    started = time.perf_counter()
+    try:
+        count = metadata_cache.warm(token_ids)
+    except Exception as e:
+        print(Fore.RED + f"Error loading market metadata: {str(e)}")
+        return
+    if count:
+        print(Fore.CYAN + f"Market metadata ready for {count} token(s) in {(time.perf_counter() - started) * 1000:.0f} ms.")
+
+def start_risk_batch(client):
+    """Resets the batch spend counter and, when a per-market limit is set, maps tokens to markets."""
+    risk_engine.start_batch()
+    if risk_engine.limits.max_market_notional is None:
+        return
+    try:
+        screener = get_market_screener(client)
+        screener.ensure_loaded()
+        for row in screener.rows:
+            risk_engine.register_market(row["condition_id"], row["token_ids"])
+    except Exception as e:
+        print(Fore.YELLOW + f"Could not load markets for the per-market limit ({str(e)}); each token counts as its own market.")
+
+def risk_status(client):
+    """Shows the risk limits and counters and toggles the kill switch."""
+    clear_screen()
+    display_header()
+    print(Fore.GREEN + "--- Risk Status ---\n")
+    for label, value in risk_engine.limits.describe():
+        print(Fore.CYAN + f"{label:>30}: {value if value is not None else 'not set'}")
+    print(Fore.CYAN + f"\n{'Batch spend':>30}: ${risk_engine.batch_spend:,.2f}")
+    print(Fore.CYAN + f"{'Orders checked / rejected':>30}: {risk_engine.orders_checked} / {risk_engine.orders_rejected}")
+    top = sorted(risk_engine.token_notional.items(), key=lambda x: -x[1])[:10]
+    for token_id, notional in top:
+        print(Fore.CYAN + f"{'Notional ' + token_id[:12]:>30}: ${notional:,.2f}")
+    if risk_engine.killed:
+        print(Fore.RED + f"\nKill switch ENGAGED: {risk_engine.kill_reason}")
+        if input(Fore.YELLOW + "Release the kill switch? (y/n): ").strip().lower() == "y":
+            risk_engine.reset_kill()
+            print(Fore.GREEN + "Kill switch released.")
+    else:
+        print(Fore.GREEN + "\nKill switch off.")
+        if input(Fore.YELLOW + "Engage the kill switch? (y/n): ").strip().lower() == "y":
+            risk_engine.kill("engaged from the menu")
+            print(Fore.RED + "Kill switch engaged; all new orders will be rejected.")
     pause()
 
+def clock_status(client):
+    """Shows the server clock offset, round trip and drift, and re-syncs on request."""
+    clear_screen()
+    display_header()
+    print(Fore.GREEN + "--- Server Clock ---\n")
+    if server_clock is None:
+        print(Fore.RED + "Server clock not initialised.")
+        pause()
+        return
+    if input(Fore.YELLOW + "Re-sync now? (y/n): ").strip().lower() == "y":
+        try:
+            server_clock.sync()
+        except Exception as e:
+            print(Fore.RED + f"Sync failed: {str(e)}")
+    labels = {
+        "offset_ms": "Offset (server - local) ms",
+        "uncertainty_ms": "Uncertainty ms",
+        "rtt_ms": "Min round trip ms",
+        "drift_ms_per_hour": "Drift ms/hour",
+        "synced_ago_s": "Last sync (s ago)",
+        "syncs": "Syncs",
+    }
+    for key, value in server_clock.metrics().items():
+        print(Fore.CYAN + f"{labels[key]:>30}: {value if value is not None else 'n/a'}")
+    if server_clock.last_error is not None:
+        print(Fore.RED + f"\nLast background sync failed: {server_clock.last_error}")
+    print(Fore.CYAN + f"\n{'Server time':>30}: {server_now():%Y-%m-%d %H:%M:%S.%f}")
+    stats = fire_timer.stats()
+    if stats["fires"]:
+        print(Fore.CYAN + f"{'Precision fires':>30}: {stats['fires']} | error p50 {stats['p50_us']} us | p99 {stats['p99_us']} us | max {stats['max_us']} us")
+    pause()
+
+def cancel_open_orders(client, store=None):
+    """Cancels every open order with a single batch request and returns the number canceled.
+
+    With a synced OrderStore the open order IDs come from local state;
+    otherwise they are fetched with get_orders first.
+    """
+    if store is not None and store.last_synced is not None:
+        order_ids = store.open_order_ids()
+    else:
+        open_orders = client.get_orders()
+        order_ids = [o.get("id") or o.get("orderID") or o.get("order_id") for o in open_orders]
+        order_ids = [order_id for order_id in order_ids if order_id]
+    if not order_ids:
+        print(Fore.YELLOW + "No outstanding orders found.")
+        return 0
+    resp = client.cancel_orders(order_ids)
+    canceled = resp.get("canceled", [])
+    for order_id in canceled:
+        print(Fore.GREEN + f"Canceled order {order_id}")
+    for order_id, reason in (resp.get("not_canceled") or {}).items():
+        print(Fore.RED + f"Error canceling order {order_id}: {reason}")
+    return len(canceled)
 
 def cancel_all_orders(client):
     """Cancels all outstanding orders quickly."""
     clear_screen()
     display_header()
     print(Fore.GREEN + "--- Cancel All Outstanding Orders ---\n")
+    registry = get_account_registry(client)
+    for account in registry.accounts.values():
+        if len(registry.accounts) > 1:
+            print(Fore.CYAN + f"\nAccount {account.name}:")
+        try:
+            if cancel_open_orders(account.client, account.store):
+                print(Fore.GREEN + "\nAll outstanding orders have been canceled.")
+        except Exception as e:
+            print(Fore.RED + f"Error canceling open orders: {str(e)}")
+    pause()
+
+def amend_open_orders(client):
+    """Moves resting GTC orders to new prices/sizes with the cancel-and-replace pipeline."""
+    clear_screen()
+    display_header()
+    print(Fore.GREEN + "--- Amend Orders (Cancel/Replace) ---\n")
+    print(Fore.GREEN + f"1. Amend orders listed in '{AMEND_CSV_FILENAME}' (order_id, price, size)")
+    print(Fore.GREEN + "2. Shift every open order of a token by a price delta")
+    print(Fore.GREEN + "3. Back to Menu")
+    option = input(Fore.YELLOW + "Choose an option: ").strip()
     try:
-        # Retrieve open orders. Adjust the API call if necessary.
-        open_orders = client.get_open_orders()  # Hypothetical function; use your client's actual method.
-        if not open_orders:
-            print(Fore.YELLOW + "No outstanding orders found.")
+        if option == "1":
+            if not os.path.isfile(AMEND_CSV_FILENAME):
+                print(Fore.RED + f"No amendments found in '{AMEND_CSV_FILENAME}'.")
+                pause()
+                return
+            amendments = resolve_amendments(client, load_csv_rows(AMEND_CSV_FILENAME), order_store)
+        elif option == "2":
+            if order_store.last_synced is None:
+                order_store.sync(client)
+            token_id = input(Fore.YELLOW + "Enter Token ID: ").strip()
+            delta = float(input(Fore.YELLOW + "Enter price delta (e.g. 0.01 or -0.02): ").strip())
+            side = input(Fore.YELLOW + "Side to move (BUY/SELL, Enter for both): ").strip().upper() or None
+            amendments = shift_amendments(order_store, token_id, delta, side)
         else:
-            for order in open_orders:
-                order_id = order.get("orderID") or order.get("order_id")
-                if order_id:
-                    try:
-                        resp = client.cancel_order(order_id)
-                        print(Fore.GREEN + f"Canceled order {order_id}: {resp.get('status', 'Unknown')}")
-                    except Exception as e:
-                        print(Fore.RED + f"Error canceling order {order_id}: {str(e)}")
-            print(Fore.GREEN + "\nAll outstanding orders have been canceled.")
+            return
     except Exception as e:
-        print(Fore.RED + f"Error retrieving open orders: {str(e)}")
+        print(Fore.RED + f"Error preparing amendments: {str(e)}")
+        pause()
+        return
+    if not amendments:
+        print(Fore.RED + "No orders to amend.")
+        pause()
+        return
+    print(Fore.BLUE + f"Signing {len(amendments)} replacement(s), then canceling and re-posting...\n")
+    start = time.perf_counter()
+    results = amend_orders(client, amendments, risk_engine, store=order_store)
+    elapsed = time.perf_counter() - start
+    for r in results:
+        color = Fore.GREEN if r["status"] == "replaced" else Fore.RED
+        window = f"{r['window_ms']:.1f} ms" if r["window_ms"] is not None else "N/A"
+        print(color + f"{r['order_id'][:14]}.. -> {(r['new_order_id'] or 'N/A')[:14]} | {r['side']} {r['size']:.2f} @ {r['price']:.4f} | "
+                      f"{r['status']} | unquoted {window} {r['error']}")
+    windows = [r["window_ms"] for r in results if r["status"] == "replaced"]
+    print(Fore.BLUE + f"\nReplaced {len(windows)}/{len(results)} order(s) in {elapsed:.3f}s")
+    if windows:
+        print(Fore.BLUE + f"Unquoted window p50: {percentile(windows, 50):.1f} ms | max: {max(windows):.1f} ms")
     pause()
 
+def run_quote_ladders(client):
+    """Quotes the ladders in the ladders CSV around mid until Ctrl+C, then cancels every quote."""
+    clear_screen()
+    display_header()
+    print(Fore.GREEN + "--- Quote Ladders (Market Making) ---\n")
+    if not os.path.isfile(LADDERS_CSV_FILENAME):
+        print(Fore.RED + f"No ladders found in '{LADDERS_CSV_FILENAME}'.")
+        pause()
+        return
+    try:
+        rows = load_csv_rows(LADDERS_CSV_FILENAME)
+        rewards = None
+        if input(Fore.YELLOW + "Apply reward min_size / max_spread from the market table? (y/n): ").strip().lower() == "y":
+            screener = get_market_screener(client)
+            screener.ensure_loaded()
+            rewards = {token_id: row for row in screener.rows for token_id in row["token_ids"]}
+        configs = load_ladders(rows, rewards)
+        interval = float(input(Fore.YELLOW + "Seconds between cycles (default 5): ").strip() or 5)
+    except Exception as e:
+        print(Fore.RED + f"Error loading ladders: {str(e)}")
+        pause()
+        return
+    if not configs:
+        print(Fore.RED + "No valid ladders.")
+        pause()
+        return
+    positions = position_snapshot(client) if any(SELL in c.sides for c in configs) else None
+    engine = QuoteEngine(client, order_store, configs, risk_engine, positions)
+    if metadata_cache is not None:
+        engine.books.add_listener(metadata_cache.observe_book)
+    start_risk_batch(client)
+    warm_metadata(c.token_id for c in configs)
+
+    def on_cycle(stats):
+        event_log.emit("quote_cycle", f"[{datetime.now():%H:%M:%S}] {stats['tokens']} token(s) | canceled {stats['canceled']} | posted {stats['posted']} | "
+                                      f"{stats['requests']} request(s) | cpu {stats['cpu_ms']:.1f} ms | wall {stats['wall_ms']:.1f} ms", **stats)
+
+    print(Fore.BLUE + f"Quoting {len(configs)} token(s) every {interval:g}s. Press Ctrl+C to stop and cancel all quotes.\n")
+    try:
+        engine.run(interval, threading.Event(), on_cycle,
+                   lambda e: event_log.emit("quote_error", f"Cycle error: {str(e)}", "error", error=str(e)))
+    except KeyboardInterrupt:
+        event_log.emit("quoter_stopped", "\nQuoting stopped; quotes canceled.", "error")
+    event_log.flush()
+    cycles = engine.cycles
+    if cycles:
+        print(Fore.BLUE + f"\n{len(cycles)} cycle(s) | avg cpu {sum(c['cpu_ms'] for c in cycles) / len(cycles):.1f} ms | "
+                          f"avg requests {sum(c['requests'] for c in cycles) / len(cycles):.1f} | "
+                          f"max wall {max(c['wall_ms'] for c in cycles):.1f} ms")
+    pause()
+
+def show_open_orders(client):
+    """Shows open orders and fills from the local order store."""
+    clear_screen()
+    display_header()
+    print(Fore.GREEN + "--- Open Orders & Fills ---\n")
+    if order_store.last_synced is None:
+        print(Fore.YELLOW + "Order store not synced yet; showing orders placed in this session only.")
+    else:
+        print(Fore.CYAN + f"Last synced: {datetime.fromtimestamp(order_store.last_synced):%H:%M:%S}")
+    if order_store.last_error is not None:
+        print(Fore.RED + f"Last sync error: {order_store.last_error}")
+    open_orders = sorted(order_store.open_orders(), key=lambda o: (o.token_id, o.side, -o.price))
+    print(Fore.MAGENTA + f"\n{'Order ID':<16} | {'Token':<14} | {'Side':<4} | {'Price':<6} | {'Size':<10} | {'Matched':<10} | Status")
+    print(Fore.MAGENTA + "-" * 86)
+    for o in open_orders:
+        print(Fore.CYAN + f"{o.order_id[:14] + '..':<16} | {o.token_id[:12] + '..':<14} | {o.side:<4} | {o.price:<6.3f} | {o.size:<10.2f} | {o.size_matched:<10.2f} | {o.status}")
+    if not open_orders:
+        print(Fore.YELLOW + "No open orders.")
+    report = order_store.fill_report()
+    if report:
+        print(Fore.MAGENTA + f"\n{'Token':<14} | {'Side':<4} | {'Orders':<6} | {'Filled':<10} | {'Avg Price':<9} | Open")
+        print(Fore.MAGENTA + "-" * 64)
+        for row in report:
+            avg_price = f"{row['avg_price']:.4f}" if row["avg_price"] is not None else "N/A"
+            print(Fore.CYAN + f"{row['token_id'][:12] + '..':<14} | {row['side']:<4} | {row['orders']:<6} | {row['filled']:<10.2f} | {avg_price:<9} | {row['open']:.2f}")
+    pause()
+
+def live_dashboard(client):
+    """Live view of books, pending scheduled tasks, open orders and fills until q or Ctrl+C."""
+    clear_screen()
+    display_header()
+    print(Fore.GREEN + "--- Live Dashboard ---\n")
+    print(Fore.CYAN + "Watches the tokens of pending scheduled tasks and open orders.")
+    extra = [t.strip() for t in input(Fore.YELLOW + "Additional Token IDs (comma-separated, optional): ").split(",") if t.strip()]
+    # The task runner rewrites the CSV as tasks fire, so it is re-read whenever it changes.
+    task_file = {"mtime": None, "tasks": []}
+
+    def pending_tasks():
+        try:
+            mtime = os.path.getmtime(CSV_FILENAME)
+        except OSError:
+            return []
+        if mtime != task_file["mtime"]:
+            try:
+                rows = load_csv_rows(CSV_FILENAME)
+            except OSError:
+                # Rewritten or removed since getmtime; keep the last list and read it again next frame.
+                return task_file["tasks"]
+            pending = []
+            for task in rows:
+                try:
+                    flags = ("critical " if is_critical(task) else "") + (f"p{task_priority(task):g}" if task_priority(task) else "")
+                    pending.append((parse_schedule(task["scheduled_datetime"]), task, flags.strip()))
+                except (KeyError, ValueError):
+                    continue
+            task_file.update(mtime=mtime, tasks=sorted(pending, key=lambda t: t[0]))
+        return task_file["tasks"]
+
+    stores = [a.store for a in get_account_registry(client).accounts.values() if a.store is not None]
+
+    def watched_tokens():
+        tokens = extra + [task["token_id"] for _, task, _ in pending_tasks()] + [o.token_id for s in stores for o in s.open_orders()]
+        return list(dict.fromkeys(t for t in tokens if t))
+
+    books = BookCache(client)
+    if metadata_cache is not None:
+        books.add_listener(metadata_cache.observe_book)
+    stop_event = threading.Event()
+    threading.Thread(target=books.poll, args=(watched_tokens, DASHBOARD_BOOK_SECONDS, stop_event, lambda e: None),
+                     daemon=True).start()
+    dashboard = Dashboard(books, watched_tokens, pending_tasks, stores, server_now)
+    error = None
+    try:
+        dashboard.start().wait()
+    except KeyboardInterrupt:
+        # Ctrl+C stops wait() before it re-raises a failure of the render thread.
+        error = dashboard.error
+    except Exception as e:
+        error = e
+    finally:
+        stop_event.set()
+    if error is not None:
+        print(Fore.RED + f"Dashboard error: {str(error)}")
+        pause()
+
+def record_books(client):
+    """Records order book snapshots for later backtesting."""
+    clear_screen()
+    display_header()
+    print(Fore.GREEN + "--- Record Order Books ---\n")
+    token_ids = [t.strip() for t in input(Fore.YELLOW + "Enter Token IDs (comma-separated): ").split(",") if t.strip()]
+    try:
+        interval = float(input(Fore.YELLOW + "Seconds between snapshots: "))
+        count = int(input(Fore.YELLOW + "Number of snapshots per token: "))
+    except ValueError:
+        print(Fore.RED + "Invalid number.")
+        pause()
+        return
+    if not token_ids:
+        print(Fore.RED + "No token IDs given.")
+        pause()
+        return
+    print(Fore.CYAN + f"Recording {count} snapshot(s) of {len(token_ids)} book(s) to '{BOOKS_FILENAME}'. Press Ctrl+C to stop.")
+    try:
+        written = record_order_books(client, token_ids, BOOKS_FILENAME, interval, count)
+        print(Fore.GREEN + f"{written} snapshot(s) recorded.")
+    except KeyboardInterrupt:
+        print(Fore.RED + "\nRecording aborted.")
+    except Exception as e:
+        print(Fore.RED + f"Error recording order books: {str(e)}")
+    pause()
+
+def print_backtest_report(rows, events, elapsed):
+    """Prints a fill/slippage summary of a backtest run."""
+    event_log.flush()
+    print(Fore.BLUE + f"\n{' BACKTEST REPORT ':=^90}")
+    print(Fore.BLUE + f"{'Order ID':<20} | {'Type':<5} | {'Status':<9} | {'Filled':>10} | {'Avg Price':>9} | {'Arrival':>8} | {'Slip bps':>8}")
+    print(Fore.BLUE + "-" * 90)
+    for row in rows:
+        print(Fore.BLUE + f"{row['order_id']:<20} | {row['order_type']:<5} | {row['status']:<9} | {row['filled_size']:>10.4f} | "
+                          f"{row['avg_price']:>9.4f} | {row['arrival_price']:>8.4f} | {row['slippage_bps']:>8.2f}")
+    filled_usd = sum(row["filled_usd"] for row in rows)
+    print(Fore.GREEN + f"\nOrders: {len(rows)} | Filled USD: {filled_usd:,.2f} | Events replayed: {events} "
+                       f"| {events / elapsed if elapsed > 0 else 0:,.0f} events/sec")
+    write_report(rows, BACKTEST_REPORT_FILENAME)
+    if rows:
+        print(Fore.GREEN + f"Report saved to '{BACKTEST_REPORT_FILENAME}'.")
+
+def run_backtest(client, mode):
+    """Replays recorded books through the CSV order paths ('orders') or the scheduled task runner ('tasks')."""
+    clear_screen()
+    display_header()
+    print(Fore.GREEN + "--- Backtest ---\n")
+    csv_filename = ORDERS_CSV_FILENAME if mode == "orders" else CSV_FILENAME
+    try:
+        snapshots = load_book_snapshots(BOOKS_FILENAME)
+        rows = load_csv_rows(csv_filename)
+    except Exception as e:
+        print(Fore.RED + f"Error loading backtest inputs: {str(e)}")
+        pause()
+        return
+    if not snapshots or not rows:
+        print(Fore.RED + f"Backtest needs snapshots in '{BOOKS_FILENAME}' and rows in '{csv_filename}'.")
+        pause()
+        return
+    sim = BacktestClient(snapshots)
+    # Same limits as live trading, with counters of their own.
+    risk = RiskEngine(RiskLimits(**{field: getattr(risk_engine.limits, field) for field in RiskLimits.ENV_VARS}, kill_file=None))
+    start = time.perf_counter()
+    if mode == "orders":
+        for order in rows:
+            try:
+                execute_csv_order(sim, order, risk=risk)
+            except Exception as e:
+                print(Fore.RED + f"Error executing order for token {order.get('token_id')}: {str(e)}")
+    else:
+        for task in sorted(rows, key=lambda x: parse_schedule(x["scheduled_datetime"])):
+            scheduled_time = parse_schedule(task["scheduled_datetime"])
+            sim.advance_to(int(scheduled_time.timestamp() * 1000))
+            print(Fore.CYAN + f"\n[{sim.now():%Y-%m-%d %H:%M:%S}] Executing task scheduled for {task['scheduled_datetime']}")
+            execute_scheduled_order(sim, task, risk=risk)
+    sim.run_to_end()
+    elapsed = time.perf_counter() - start
+    print_backtest_report(sim.fill_report(), sim.position, elapsed)
+    pause()
+
+def load_test_stub(client):
+    """Runs the CSV orders and cancel-all against a local in-memory CLOB stub and reports throughput."""
+    clear_screen()
+    display_header()
+    print(Fore.GREEN + "--- Load Test Against Local CLOB Stub ---\n")
+    try:
+        orders = load_csv_rows(ORDERS_CSV_FILENAME)
+        repeat = int(input(Fore.YELLOW + f"Times to run the {len(orders)} order(s) in '{ORDERS_CSV_FILENAME}': "))
+        snapshots = load_book_snapshots(BOOKS_FILENAME) if os.path.isfile(BOOKS_FILENAME) else []
+    except Exception as e:
+        print(Fore.RED + f"Error loading load test inputs: {str(e)}")
+        pause()
+        return
+    server = start_stub_server(snapshots=snapshots)
+    try:
+        stub_client = ClobClient(
+            host=server.url,
+            key=os.getenv("POLYMARKET_KEY"),
+            chain_id=POLYGON,
+            creds=client.creds,
+            signature_type=2,
+            funder=os.getenv("POLYMARKET_PROXY_ADDRESS")
+        )
+        FastSigner.from_client(stub_client).attach(stub_client)
+        stub_metadata = MetadataCache(stub_client)
+        stub_metadata.attach(stub_client)
+        stub_metadata.warm(o.get("token_id") for o in orders)
+        stub_store = OrderStore()
+        stub_store.attach(stub_client)
+        stub_store.sync(stub_client)
+        print(Fore.CYAN + f"Stub listening on {server.url} with {len(server.engine.books)} seeded book(s).\n")
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for order in orders:
+                sent = time.perf_counter()
+                try:
+                    execute_csv_order(stub_client, order)
+                except Exception as e:
+                    event_log.emit("order_error", f"Error executing order for token {order.get('token_id')}: {str(e)}", "error",
+                                   token_id=order.get("token_id"), error=str(e))
+                latencies.append(time.perf_counter() - sent)
+        elapsed = time.perf_counter() - start
+        cancel_start = time.perf_counter()
+        canceled = cancel_open_orders(stub_client, stub_store)
+        cancel_elapsed = time.perf_counter() - cancel_start
+        event_log.flush()
+        print(Fore.BLUE + f"\n{' LOAD TEST ':=^50}")
+        print(Fore.BLUE + f"Orders executed: {len(latencies)} in {elapsed:.3f}s ({len(latencies) / elapsed if elapsed > 0 else 0:,.0f} orders/sec)")
+        print(Fore.BLUE + f"Latency p50: {percentile(latencies, 50) * 1000:.2f} ms | p99: {percentile(latencies, 99) * 1000:.2f} ms")
+        print(Fore.BLUE + f"Cancel all: {canceled} order(s) in {cancel_elapsed * 1000:.2f} ms")
+        print(Fore.BLUE + f"Requests served by stub: {server.request_count}")
+    except Exception as e:
+        print(Fore.RED + f"Error during load test: {str(e)}")
+    finally:
+        server.shutdown()
+    pause()
+
+def tools_menu(client):
+    """Submenu for simulation and tooling functions."""
+    while True:
+        clear_screen()
+        display_header()
+        print(Fore.GREEN + "Simulation & Tools Menu:")
+        print(Fore.GREEN + "1. Record Order Books")
+        print(Fore.GREEN + "2. Backtest CSV Orders")
+        print(Fore.GREEN + "3. Backtest Scheduled Orders")
+        print(Fore.GREEN + "4. Load Test Against Local CLOB Stub")
+        print(Fore.GREEN + "5. Server Clock Status")
+        print(Fore.GREEN + "6. Live Dashboard")
+        print(Fore.GREEN + "7. Back to Main Menu")
+        choice = input(Fore.YELLOW + "Select option: ").strip()
+        if choice == '1':
+            record_books(client)
+        elif choice == '2':
+            run_backtest(client, "orders")
+        elif choice == '3':
+            run_backtest(client, "tasks")
+        elif choice == '4':
+            load_test_stub(client)
+        elif choice == '5':
+            clock_status(client)
+        elif choice == '6':
+            live_dashboard(client)
+        elif choice == '7':
+            break
+        else:
+            print(Fore.RED + "Invalid option. Please try again.")
+            pause()
+
 def info_menu(client):
     """Submenu for Retrieve Info functions."""
     while True:
         clear_screen()
         display_header()
         print(Fore.GREEN + "Retrieve Info Menu:")
-        print(Fore.GREEN + "1. Retrieve Markets (Filter by end date / keyword)")
+        print(Fore.GREEN + "1. Retrieve Markets (Filter by end date / keyword / screener)")
         print(Fore.GREEN + "2. Retrieve info from Polymarket Link")
         print(Fore.GREEN + "3. Filter info by condition_id")
         print(Fore.GREEN + "4. API Endpoints (Raw Data)")
         print(Fore.GREEN + "5. Fetch all market data")
         print(Fore.GREEN + "6. Analyze Orderbook")
-        print(Fore.GREEN + "7. Back to Main Menu")
+        print(Fore.GREEN + "7. Trade History (Sync Fills)")
+        print(Fore.GREEN + "8. Portfolio PnL")
+        print(Fore.GREEN + "9. Arbitrage Scanner (Neg Risk / Complements)")
+        print(Fore.GREEN + "10. Back to Main Menu")
         choice = input(Fore.YELLOW + "Select option: ").strip()
         if choice == '1':
             filter_markets(client)
@@ -756,6 +2176,12 @@ def info_menu(client):
         elif choice == '6':
             retrieve_orderbook(client)
         elif choice == '7':
+            trade_history(client)
+        elif choice == '8':
+            portfolio_pnl(client)
+        elif choice == '9':
+            arbitrage_scanner(client)
+        elif choice == '10':
             break
         else:
             print(Fore.RED + "Invalid option. Please try again.")
@@ -768,26 +2194,50 @@ def order_menu(client):
         display_header()
         print(Fore.GREEN + "Place Orders Menu:")
         print(Fore.GREEN + "1. Create Buy Order")
-        print(Fore.GREEN + "2. Buy Under Maximum Price Order")
-        print(Fore.GREEN + "3. Schedule Order")
-        print(Fore.GREEN + "4. Execute Scheduled Orders")
-        print(Fore.GREEN + "5. Run CSV Orders (Immediate Execution)")
-        print(Fore.GREEN + "6. Cancel All Outstanding Orders")
-        print(Fore.GREEN + "7. Back to Main Menu")
+        print(Fore.GREEN + "2. Create Sell Order")
+        print(Fore.GREEN + "3. Buy Under Maximum Price Order")
+        print(Fore.GREEN + "4. Sell Above Minimum Price Order")
+        print(Fore.GREEN + "5. Schedule Order")
+        print(Fore.GREEN + "6. Execute Scheduled Orders")
+        print(Fore.GREEN + "7. Arm Triggered Order")
+        print(Fore.GREEN + "8. Run Triggered Orders")
+        print(Fore.GREEN + "9. Run CSV Orders (Immediate Execution)")
+        print(Fore.GREEN + "10. Cancel All Outstanding Orders")
+        print(Fore.GREEN + "11. Amend Orders (Cancel/Replace)")
+        print(Fore.GREEN + "12. Run Quote Ladders (Market Making)")
+        print(Fore.GREEN + "13. Open Orders & Fills")
+        print(Fore.GREEN + "14. Risk Status / Kill Switch")
+        print(Fore.GREEN + "15. Back to Main Menu")
         choice = input(Fore.YELLOW + "Select option: ").strip()
         if choice == '1':
-            create_buy_order(client)
+            place_order(client, BUY)
         elif choice == '2':
-            create_buy_under_max_price(client)
+            place_order(client, SELL)
         elif choice == '3':
-            schedule_task(client)
+            create_buy_under_max_price(client)
         elif choice == '4':
-            run_csv_tasks(client)
+            create_sell_above_min_price(client)
         elif choice == '5':
-            run_csv_orders(client)
+            schedule_task(client)
         elif choice == '6':
-            cancel_all_orders(client)
+            run_csv_tasks(client)
         elif choice == '7':
+            arm_trigger(client)
+        elif choice == '8':
+            run_triggered_orders(client)
+        elif choice == '9':
+            run_csv_orders(client)
+        elif choice == '10':
+            cancel_all_orders(client)
+        elif choice == '11':
+            amend_open_orders(client)
+        elif choice == '12':
+            run_quote_ladders(client)
+        elif choice == '13':
+            show_open_orders(client)
+        elif choice == '14':
+            risk_status(client)
+        elif choice == '15':
             break
         else:
             print(Fore.RED + "Invalid option. Please try again.")
@@ -795,6 +2245,7 @@ def order_menu(client):
 
 def main():
     """Main function to run the PolyBot CLI."""
+    global risk_engine, account_registry, signer_pool, metadata_cache, read_cache, server_clock, fire_timer, route_complement, fok_presize
     try:
         load_dotenv()
         required_vars = [
@@ -811,7 +2262,7 @@ def main():
         client = ClobClient(
             host=os.getenv("POLYMARKET_HOST"),
             key=os.getenv("POLYMARKET_KEY"),
-            chain_id=AGON,
+            chain_id=POLYGON,
             creds=ApiCreds(
                 api_key=os.getenv("POLYMARKET_API_KEY"),
                 api_secret=os.getenv("POLYMARKET_API_SECRET"),
@@ -820,6 +2271,43 @@ def main():
             signature_type=2,
             funder=os.getenv("POLYMARKET_PROXY_ADDRESS")
         )
+        FastSigner.from_client(client).attach(client)
+        event_log.add_sink(JsonlSink(EVENTS_FILENAME))
+        metadata_cache = MetadataCache(client)
+        read_cache = ReadCache()
+        risk_engine = RiskEngine(RiskLimits.from_env())
+        route_complement = os.getenv("POLYBOT_ROUTE_COMPLEMENT", "").strip().lower() in ("1", "y", "yes", "true")
+        fok_presize = os.getenv("POLYBOT_FOK_PRESIZE", "").strip().lower() or None
+        if fok_presize is not None and fok_presize not in POLICIES:
+            raise ValueError(f"POLYBOT_FOK_PRESIZE must be one of {', '.join(POLICIES)}")
+        signer_processes = int(os.getenv("POLYBOT_SIGNER_PROCESSES", "0") or 0)
+        if signer_processes > 0:
+            signer_pool = SignerPool(signer_processes)
+            signer_pool.warm()
+        account_registry = AccountRegistry.load(ACCOUNTS_FILENAME, client, order_store)
+        # Market metadata and catalog reads are the same for every account, so all clients share one cache.
+        for account in account_registry.accounts.values():
+            metadata_cache.attach(account.client)
+            read_cache.attach(account.client)
+        unreachable = {name: error for name, error in account_registry.warm().items() if error}
+        for name, error in unreachable.items():
+            print(Fore.RED + f"Account '{name}' is not reachable: {error}")
+        if unreachable:
+            pause()
+        # GTD expirations and schedules follow the server clock, re-synced in the background.
+        # Until the first sync completes, the local clock is used.
+        server_clock = ServerClock(client)
+        fire_cpu = os.getenv("POLYBOT_FIRE_CPU", "").strip()
+        fire_timer = FireTimer(server_clock.now, cpu=int(fire_cpu) if fire_cpu else None)
+        threading.Thread(target=server_clock.run, args=(CLOCK_SYNC_SECONDS, threading.Event(), lambda e: None),
+                         daemon=True).start()
+        # Every post and cancel updates the account's order store; a background poller
+        # per account picks up fills and orders placed or canceled elsewhere.
+        order_store.attach(client)
+        for account in account_registry.accounts.values():
+            if account.store is not None:
+                threading.Thread(target=account.store.poll, args=(account.client, ORDER_SYNC_SECONDS, threading.Event(), lambda e: None),
+                                 daemon=True).start()
         while True:
             clear_screen()
             display_header()
@@ -827,7 +2315,8 @@ def main():
             print(Fore.GREEN + "1. Run CSV Orders (Immediate Execution)")
             print(Fore.GREEN + "2. Retrieve Info")
             print(Fore.GREEN + "3. Place Orders")
-            print(Fore.GREEN + "4. Exit")
+            print(Fore.GREEN + "4. Simulation & Tools")
+            print(Fore.GREEN + "5. Exit")
             choice = input(Fore.YELLOW + "Select option: ").strip()
             if choice == '1':
                 run_csv_orders(client)
@@ -836,7 +2325,10 @@ def main():
             elif choice == '3':
                 order_menu(client)
             elif choice == '4':
+                tools_menu(client)
+            elif choice == '5':
                 print(Fore.GREEN + "Exiting program...")
+                event_log.close()
                 sys.exit(0)
             else:
                 print(Fore.RED + "Invalid option. Please try again.")
@@ -0,0 +1,142 @@
+"""Account registry: one warm `ClobClient` per funder/proxy address.
+
+Accounts are read from a JSON file mapping an account name to its settings:
+
+    {
+        "main":  {"key": "$POLYMARKET_KEY", "api_key": "...", "api_secret": "...",
+                  "api_passphrase": "...", "proxy_address": "0x..."},
+        "alt-1": {"key": "$ALT1_KEY", ...}
+    }
+
+Values starting with `$` are read from the environment, so secrets can stay in
+`.env`. `host`, `chain_id` and `signature_type` default to the main
+configuration. Without a file, the registry holds a single "default" account
+built from the POLYMARKET_* variables.
+
+Rows of a batch are split by their `account` column and each account's rows
+run in order on that account's own worker thread, so accounts do not wait on
+each other's round trips.
+"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from py_clob_client.client import ClobClient
+from py_clob_client.clob_types import ApiCreds
+from py_clob_client.constants import POLYGON
+from order_store import OrderStore
+from signing import FastSigner
+
+DEFAULT_ACCOUNT = "default"
+ACCOUNT_FIELDS = ("key", "api_key", "api_secret", "api_passphrase", "proxy_address")
+
+
+class Account:
+    """A named account with its client and local order store."""
+    __slots__ = ("name", "client", "store")
+
+    def __init__(self, name, client, store=None):
+        self.name = name
+        self.client = client
+        self.store = store
+
+
+def _resolve(value):
+    if isinstance(value, str) and value.startswith("$"):
+        resolved = os.getenv(value[1:])
+        if resolved is None:
+            raise ValueError(f"environment variable {value[1:]} is not set")
+        return resolved
+    return value
+
+
+def build_client(settings, host=None):
+    """Builds a ClobClient from account settings (see the module docstring)."""
+    settings = {k: _resolve(v) for k, v in settings.items()}
+    missing = [field for field in ACCOUNT_FIELDS if not settings.get(field)]
+    if missing:
+        raise ValueError(f"missing account settings: {', '.join(missing)}")
+    return ClobClient(
+        host=settings.get("host") or host or os.getenv("POLYMARKET_HOST"),
+        key=settings["key"],
+        chain_id=int(settings.get("chain_id") or POLYGON),
+        creds=ApiCreds(
+            api_key=settings["api_key"],
+            api_secret=settings["api_secret"],
+            api_passphrase=settings["api_passphrase"],
+        ),
+        signature_type=int(settings.get("signature_type", 2)),
+        funder=settings["proxy_address"],
+    )
+
+
+class AccountRegistry:
+    """Named accounts; the first one is the default for rows without an account."""
+
+    def __init__(self):
+        self.accounts = {}
+
+    def add(self, name, client, store=None):
+        self.accounts[name] = Account(name, client, store)
+        return self.accounts[name]
+
+    @classmethod
+    def load(cls, filename, default_client=None, default_store=None, host=None):
+        """Loads accounts from filename; default_client becomes the 'default' account when given.
+
+        Accounts in the file get the fast signer and an order store attached to their client.
+        """
+        registry = cls()
+        if default_client is not None:
+            registry.add(DEFAULT_ACCOUNT, default_client, default_store)
+        if filename and os.path.isfile(filename):
+            with open(filename, "r", encoding="utf-8") as f:
+                config = json.load(f)
+            for name, settings in config.items():
+                client = build_client(settings, host)
+                FastSigner.from_client(client).attach(client)
+                store = OrderStore()
+                store.attach(client)
+                registry.add(name, client, store)
+        return registry
+
+    @property
+    def names(self):
+        return list(self.accounts)
+
+    def get(self, name=None):
+        """Returns the account called name, or the default account for an empty name."""
+        name = (name or "").strip()
+        if not name:
+            return next(iter(self.accounts.values()))
+        if name not in self.accounts:
+            raise ValueError(f"unknown account '{name}'")
+        return self.accounts[name]
+
+    def warm(self):
+        """Opens a connection and checks the server once per account; returns {name: error or None}."""
+        def ping(account):
+            try:
+                account.client.get_ok()
+                return None
+            except Exception as e:
+                return str(e)
+        with ThreadPoolExecutor(max_workers=max(1, len(self.accounts))) as pool:
+            return dict(zip(self.accounts, pool.map(ping, self.accounts.values())))
+
+    def split(self, rows):
+        """Groups rows by their account column, keeping row order within each account."""
+        groups = {}
+        for row in rows:
+            account = self.get(row.get("account"))
+            groups.setdefault(account.name, (account, []))[1].append(row)
+        return list(groups.values())
+
+    def run(self, rows, worker):
+        """Calls worker(account, rows) for each account's rows, one thread per account, and returns {name: result}."""
+        groups = self.split(rows)
+        if len(groups) == 1:
+            account, group = groups[0]
+            return {account.name: worker(account, group)}
+        with ThreadPoolExecutor(max_workers=len(groups)) as pool:
+            futures = {account.name: pool.submit(worker, account, group) for account, group in groups}
+            return {name: future.result() for name, future in futures.items()}
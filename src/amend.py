@@ -0,0 +1,181 @@
+"""Cancel-and-replace (amend) pipeline for resting GTC and GTD orders.
+
+`amend_orders` moves a set of resting orders to new prices or sizes:
+
+1. Every replacement is signed before anything is sent, so signing never
+   sits inside the unquoted window.
+2. The originals are canceled in batches of POST_ORDERS_BATCH. As soon as a
+   batch's cancel is acknowledged, the replacements of the orders actually
+   canceled go out in one `post_orders` request on a worker thread, while the
+   next batch's cancel is sent.
+3. Orders that could not be canceled (already filled or gone) are not
+   replaced, so an amend never doubles exposure.
+
+A replacement keeps the order type of the order it replaces, and a GTD
+replacement keeps its expiration.
+
+Each result reports the order's unquoted window: the time from sending its
+cancel to the acknowledgement of its replacement.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from py_clob_client.clob_types import OrderArgs, OrderType, PostOrdersArgs
+from py_clob_client.order_builder.constants import BUY
+
+POST_ORDERS_BATCH = 15
+
+
+class Amendment:
+    """One order to move: the resting order and its replacement price and size."""
+    __slots__ = ("order_id", "token_id", "side", "price", "size", "old_price", "old_size", "order_type", "expiration",
+                 "reserved")
+
+    def __init__(self, order_id, token_id, side, price, size, old_price=0.0, old_size=0.0, order_type="GTC", expiration=0,
+                 reserved=0.0):
+        self.order_id = order_id
+        self.token_id = token_id
+        self.side = side
+        self.price = price
+        self.size = size
+        self.old_price = old_price
+        self.old_size = old_size
+        self.order_type = "GTD" if str(order_type).upper() == "GTD" else "GTC"
+        self.expiration = int(expiration or 0) if self.order_type == "GTD" else 0
+        # Risk notional held by the original, released once it is canceled.
+        self.reserved = reserved
+
+
+def reserved_notional(order):
+    """Risk notional still held by a tracked order: what was reserved for it, less what has filled."""
+    return min(order.risk_notional, order.price * order.remaining)
+
+
+def resolve_amendments(client, rows, store=None):
+    """Builds Amendments from rows with order_id and a new price and/or size.
+
+    Token, side and the current price and remaining size come from the order
+    store when it knows the order, and from `get_order` otherwise. An empty
+    price or size keeps the order's current value. Orders the store does not
+    know hold no risk notional of this session.
+    """
+    amendments = []
+    for row in rows:
+        order_id = (row.get("order_id") or "").strip()
+        if not order_id:
+            continue
+        tracked = store.get(order_id) if store is not None else None
+        if tracked is not None:
+            token_id, side, price, remaining = tracked.token_id, tracked.side, tracked.price, tracked.remaining
+            order_type, expiration, reserved = tracked.order_type, tracked.expiration, reserved_notional(tracked)
+        else:
+            record = client.get_order(order_id)
+            if not record:
+                raise ValueError(f"order {order_id} not found")
+            token_id, side, price = str(record["asset_id"]), record["side"], float(record["price"])
+            remaining = float(record["original_size"]) - float(record.get("size_matched") or 0)
+            order_type, expiration, reserved = record.get("order_type") or "GTC", record.get("expiration"), 0.0
+        new_price = float(row["price"]) if str(row.get("price") or "").strip() else price
+        new_size = float(row["size"]) if str(row.get("size") or "").strip() else remaining
+        amendments.append(Amendment(order_id, token_id, side, new_price, new_size, price, remaining, order_type, expiration,
+                                    reserved))
+    return amendments
+
+
+def shift_amendments(store, token_id, delta, side=None):
+    """Builds Amendments moving every open order of token_id (optionally one side) by delta."""
+    amendments = []
+    for order in store.open_orders(token_id=token_id):
+        if side and order.side != side:
+            continue
+        new_price = round(order.price + delta, 4)
+        amendments.append(Amendment(order.order_id, order.token_id, order.side, new_price, order.remaining,
+                                    order.price, order.remaining, order.order_type, order.expiration,
+                                    reserved_notional(order)))
+    return amendments
+
+
+def amend_orders(client, amendments, risk=None, batch=POST_ORDERS_BATCH, workers=4, store=None):
+    """Cancels and replaces amendments and returns one result dict per amendment.
+
+    Each canceled original releases the risk notional it held (Amendment.reserved),
+    and each replacement's reservation is noted in store, so a later amend
+    releases it in turn.
+
+    Result keys: order_id, new_order_id, token_id, side, price, size, status
+    ('replaced', 'not_canceled', 'rejected', 'post_failed' or 'sign_failed'),
+    error and window_ms.
+    """
+    results = {a.order_id: {"order_id": a.order_id, "new_order_id": "", "token_id": a.token_id, "side": a.side,
+                            "price": a.price, "size": a.size, "status": "", "error": "", "window_ms": None}
+               for a in amendments}
+    # 1. Pre-sign every replacement (and pass risk checks) before the first cancel goes out.
+    signed = []
+    for a in amendments:
+        notional = a.price * a.size if a.side == BUY else 0.0
+        try:
+            if risk is not None:
+                risk.check(a.token_id, a.side, notional)
+        except Exception as e:
+            results[a.order_id].update(status="rejected", error=str(e))
+            continue
+        try:
+            order = client.create_order(OrderArgs(price=a.price, size=a.size, side=a.side, token_id=a.token_id,
+                                                  expiration=a.expiration))
+        except Exception as e:
+            if risk is not None:
+                risk.release(a.token_id, a.side, notional)
+            results[a.order_id].update(status="sign_failed", error=str(e))
+            continue
+        signed.append((a, order, notional))
+
+    def post_batch(chunk, cancel_sent):
+        try:
+            resp = client.post_orders([PostOrdersArgs(order=order, orderType=getattr(OrderType, a.order_type))
+                                       for a, order, _ in chunk])
+            error = None
+        except Exception as e:
+            resp, error = [], str(e)
+        acked = time.perf_counter()
+        if not isinstance(resp, list):
+            resp = [resp] * len(chunk)
+        for i, (a, _, notional) in enumerate(chunk):
+            item = resp[i] if i < len(resp) else {}
+            result = results[a.order_id]
+            result["window_ms"] = (acked - cancel_sent) * 1000
+            if error is None and isinstance(item, dict) and item.get("orderID") and item.get("success", True):
+                result.update(status="replaced", new_order_id=item["orderID"])
+                if store is not None and risk is not None:
+                    store.record_risk(item["orderID"], notional)
+            else:
+                message = error or (item.get("errorMsg", "") if isinstance(item, dict) else str(item))
+                result.update(status="post_failed", error=message)
+                if risk is not None:
+                    risk.release(a.token_id, a.side, notional)
+
+    # 2./3. Cancel a batch, hand its replacements to a poster thread, move on to the next cancel.
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for start in range(0, len(signed), batch):
+            chunk = signed[start:start + batch]
+            cancel_sent = time.perf_counter()
+            try:
+                resp = client.cancel_orders([a.order_id for a, _, _ in chunk])
+                canceled = set(resp.get("canceled") or [])
+                not_canceled = resp.get("not_canceled") or {}
+            except Exception as e:
+                canceled, not_canceled = set(), {a.order_id: str(e) for a, _, _ in chunk}
+            ready = []
+            for a, order, notional in chunk:
+                if a.order_id in canceled:
+                    ready.append((a, order, notional))
+                    if risk is not None:
+                        risk.release(a.token_id, a.side, a.reserved)
+                else:
+                    results[a.order_id].update(status="not_canceled", error=str(not_canceled.get(a.order_id, "")))
+                    if risk is not None:
+                        risk.release(a.token_id, a.side, notional)
+            if ready:
+                futures.append(pool.submit(post_batch, ready, cancel_sent))
+        for future in futures:
+            future.result()
+    return list(results.values())
@@ -0,0 +1,216 @@
+"""Arbitrage scanner over baskets of mutually exclusive outcomes.
+
+A basket pays exactly 1 USDC per unit however the market resolves:
+
+- complement: the Yes and No token of one market (merged back into collateral);
+- event: the Yes tokens of every market of one neg risk event, of which
+  exactly one resolves Yes.
+
+Buying a basket for less than 1 (sum of best asks below 1), or selling it for
+more (sum of best bids above 1, after splitting collateral into the basket),
+locks in the difference.
+
+`ArbScanner` keeps the best ask and bid (price and size) of every basket leg in
+flat columns, with the legs of a basket next to each other. A `BookCache`
+listener writes one token's legs per book update, so a rescan never touches
+the books. It sums each basket's columns in one pass over the universe
+(`numpy.add.reduceat` with NumPy installed, one slice per basket otherwise).
+Only baskets whose top of book crosses 1 are then walked level by level.
+The walk finds how many units stay profitable and the profit they lock in,
+and opportunities are ranked by that profit, not by the top-of-book edge.
+
+A basket is only as complete as the market list it was built from: an event
+basket missing one of the event's outcomes is not an arbitrage. Check the
+event's outcomes before trading one.
+"""
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+COMPLEMENT = "complement"
+EVENT = "event"
+MAX_BOOK_AGE = 10.0
+MAX_WALK_LEVELS = 200
+
+
+class Basket:
+    """Tokens that together pay 1 per unit."""
+    __slots__ = ("kind", "key", "label", "token_ids")
+
+    def __init__(self, kind, key, label, token_ids):
+        self.kind = kind
+        self.key = key
+        self.label = label
+        self.token_ids = token_ids
+
+
+class Opportunity:
+    """A basket that can be bought below 1 or sold above 1.
+
+    edge is the top-of-book gap to 1 per unit, size the units that stay
+    profitable walking the books, profit the USDC locked in by trading them
+    and price the average basket price over those units.
+    """
+    __slots__ = ("basket", "side", "edge", "size", "profit", "price")
+
+    def __init__(self, basket, side, edge, size, profit, price):
+        self.basket = basket
+        self.side = side
+        self.edge = edge
+        self.size = size
+        self.profit = profit
+        self.price = price
+
+
+def market_baskets(markets):
+    """Builds complement baskets for binary markets and event baskets for neg risk events with 2+ markets.
+
+    Only active markets accepting orders are included.
+    """
+    baskets, events = [], {}
+    for market in markets:
+        if not market.get("active") or market.get("closed") or market.get("accepting_orders") is False:
+            continue
+        tokens = [t for t in market.get("tokens") or [] if t.get("token_id")]
+        if len(tokens) != 2:
+            continue
+        label = market.get("market_slug") or market.get("question") or market.get("condition_id", "")
+        baskets.append(Basket(COMPLEMENT, market.get("condition_id", ""), label, [t["token_id"] for t in tokens]))
+        event = market.get("neg_risk_market_id")
+        if market.get("neg_risk") and event:
+            yes = next((t for t in tokens if (t.get("outcome") or "").lower() == "yes"), tokens[0])
+            events.setdefault(event, []).append((label, yes["token_id"]))
+    for event, legs in events.items():
+        if len(legs) > 1:
+            baskets.append(Basket(EVENT, event, f"{legs[0][0]} (+{len(legs) - 1})", [token for _, token in legs]))
+    return baskets
+
+
+def walk_basket(views, side, min_edge=0.0, max_levels=MAX_WALK_LEVELS):
+    """Walks the books of a basket's legs; returns (units, profit, average basket price).
+
+    side "buy" takes every leg's asks while their summed price stays below
+    1 - min_edge; "sell" hits the bids while the sum stays above 1 + min_edge.
+    """
+    ladders = [view.asks if side == "buy" else view.bids for view in views]
+    if any(not levels for levels in ladders):
+        return 0.0, 0.0, None
+    index = [0] * len(ladders)
+    left = [levels[0][1] for levels in ladders]
+    units = profit = notional = 0.0
+    for _ in range(max_levels):
+        price = sum(levels[i][0] for levels, i in zip(ladders, index))
+        edge = 1.0 - price if side == "buy" else price - 1.0
+        if edge <= min_edge:
+            break
+        step = min(left)
+        units += step
+        profit += step * edge
+        notional += step * price
+        exhausted = False
+        for leg, levels in enumerate(ladders):
+            left[leg] -= step
+            if left[leg] <= 1e-9:
+                index[leg] += 1
+                if index[leg] >= len(levels):
+                    exhausted = True
+                    break
+                left[leg] = levels[index[leg]][1]
+        if exhausted:
+            break
+    return units, profit, notional / units if units else None
+
+
+class ArbScanner:
+    """Top-of-book columns for every basket leg, rescanned in one pass."""
+
+    def __init__(self, baskets, min_edge=0.0, max_age=MAX_BOOK_AGE):
+        self.baskets = list(baskets)
+        self.min_edge = min_edge
+        self.max_age = max_age
+        self.views = {}
+        self.legs = {}
+        self.starts = []
+        tokens = []
+        for basket in self.baskets:
+            self.starts.append(len(tokens))
+            for token_id in basket.token_ids:
+                self.legs.setdefault(token_id, []).append(len(tokens))
+                tokens.append(token_id)
+        n = len(tokens)
+        if np is not None:
+            self.ask = np.full(n, np.inf)
+            self.bid = np.zeros(n)
+            self.starts = np.array(self.starts, dtype=np.intp)
+        else:
+            self.ask = [float("inf")] * n
+            self.bid = [0.0] * n
+        self.scans = 0
+        self.last_scan_seconds = None
+        self.lock = threading.Lock()
+
+    def token_ids(self):
+        return list(self.legs)
+
+    def on_book(self, view):
+        """BookCache listener: writes the token's best prices into its legs."""
+        legs = self.legs.get(view.token_id)
+        if legs is None:
+            return
+        ask = view.asks[0][0] if view.asks else float("inf")
+        bid = view.bids[0][0] if view.bids else 0.0
+        with self.lock:
+            self.views[view.token_id] = view
+            for leg in legs:
+                self.ask[leg] = ask
+                self.bid[leg] = bid
+
+    def _crossed(self):
+        # Basket indexes whose top of book sums below (buy) or above (sell) 1.
+        with self.lock:
+            if np is not None:
+                if not len(self.starts):
+                    return [], []
+                asks = np.add.reduceat(self.ask, self.starts)
+                bids = np.add.reduceat(self.bid, self.starts)
+            else:
+                bounds = list(zip(self.starts, self.starts[1:] + [len(self.ask)]))
+                asks = [sum(self.ask[start:end]) for start, end in bounds]
+                bids = [sum(self.bid[start:end]) for start, end in bounds]
+        if np is not None:
+            return np.flatnonzero(asks < 1.0 - self.min_edge).tolist(), np.flatnonzero(bids > 1.0 + self.min_edge).tolist()
+        return ([i for i, total in enumerate(asks) if total < 1.0 - self.min_edge],
+                [i for i, total in enumerate(bids) if total > 1.0 + self.min_edge])
+
+    def scan(self):
+        """Rescans every basket; returns opportunities, most profitable first."""
+        started = time.perf_counter()
+        buys, sells = self._crossed()
+        now = time.monotonic()
+        found = []
+        for side, indexes in (("buy", buys), ("sell", sells)):
+            for i in indexes:
+                basket = self.baskets[i]
+                views = [self.views.get(t) for t in basket.token_ids]
+                # Stale legs can show a gap that is long gone.
+                if any(v is None or now - v.received_at > self.max_age for v in views):
+                    continue
+                size, profit, price = walk_basket(views, side, self.min_edge)
+                if size > 0:
+                    top = sum(v.asks[0][0] if side == "buy" else v.bids[0][0] for v in views)
+                    found.append(Opportunity(basket, side, 1.0 - top if side == "buy" else top - 1.0, size, profit, price))
+        found.sort(key=lambda o: -o.profit)
+        self.scans += 1
+        self.last_scan_seconds = time.perf_counter() - started
+        return found
+
+    def run(self, interval, stop_event, on_scan):
+        """Rescans every interval seconds until stop_event is set, calling on_scan(opportunities)."""
+        while not stop_event.is_set():
+            started = time.monotonic()
+            on_scan(self.scan())
+            stop_event.wait(max(0.0, interval - (time.monotonic() - started)))
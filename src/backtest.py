@@ -0,0 +1,430 @@
+"""Deterministic order book replay and a simulated CLOB client for backtesting.
+
+Recorded order book snapshots (one JSON object per line, as written by
+`record_order_books`) are replayed in timestamp order. `BacktestClient` exposes
+the subset of the `ClobClient` surface used by the order paths in PolyBot
+(`get_order_book`, `create_order`, `create_market_order`, `post_order`,
+`cancel`, `get_orders`) and matches orders against the replayed liquidity.
+"""
+import csv
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from py_clob_client.clob_types import OrderBookSummary, OrderSummary, OrderType
+from py_clob_client.order_builder.constants import BUY
+
+EPSILON = 1e-9
+
+
+def record_order_books(client, token_ids, filename, interval=1.0, count=60):
+    """Polls the order books of token_ids and appends each snapshot as a JSON line."""
+    written = 0
+    with open(filename, "a", encoding="utf-8") as f:
+        for i in range(count):
+            for token_id in token_ids:
+                book = client.get_order_book(token_id)
+                f.write(json.dumps(book.__dict__, separators=(",", ":")) + "\n")
+                written += 1
+            f.flush()
+            if i < count - 1:
+                time.sleep(interval)
+    return written
+
+
+def load_book_snapshots(filename):
+    """Loads recorded order book snapshots sorted by timestamp (stable for equal timestamps)."""
+    snapshots = []
+    with open(filename, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                snapshots.append(json.loads(line))
+    snapshots.sort(key=lambda s: int(s["timestamp"]))
+    return snapshots
+
+
+@dataclass
+class SimulatedOrder:
+    """A simulated order and its matching state."""
+    order_id: str
+    token_id: str
+    side: str
+    price: float
+    size: float
+    is_market: bool = False
+    amount: float = 0.0
+    expiration: int = 0
+    order_type: str = OrderType.GTC
+    status: str = "created"
+    size_matched: float = 0.0
+    usd_matched: float = 0.0
+    created_at: int = 0
+    arrival_price: float = 0.0
+
+
+@dataclass
+class Fill:
+    """A single simulated execution against replayed liquidity."""
+    order_id: str
+    token_id: str
+    side: str
+    price: float
+    size: float
+    timestamp: int
+
+
+@dataclass
+class BookState:
+    """Latest replayed book for a token, as sorted [price, size] levels."""
+    market: str = ""
+    bids: list = field(default_factory=list)  # best (highest) first
+    asks: list = field(default_factory=list)  # best (lowest) first
+    tick_size: str = "0.01"
+    neg_risk: bool = False
+    min_order_size: str = "0"
+    last_trade_price: str = ""
+    timestamp: int = 0
+
+
+class BacktestClient:
+    """Fake CLOB client that replays book snapshots through a simple matching engine.
+
+    Orders take liquidity from the current snapshot of their token. Liquidity
+    consumed by our own orders stays consumed until the next snapshot of that
+    token replaces the book. Resting GTC/GTD orders are re-matched whenever a new
+    snapshot crosses them, and GTD orders expire on the simulated clock.
+    """
+
+    def __init__(self, snapshots):
+        self.snapshots = snapshots
+        self.position = 0
+        self.now_ms = int(snapshots[0]["timestamp"]) if snapshots else 0
+        self.books = {}
+        self.orders = {}
+        self.open_orders = {}
+        self.fills = []
+        self._next_id = 1
+        # Apply every snapshot sharing the first timestamp so all books are populated.
+        self.advance_to(self.now_ms)
+
+    # -- Replay clock -------------------------------------------------------
+
+    def advance(self):
+        """Applies the next snapshot. Returns False once the replay is exhausted."""
+        if self.position >= len(self.snapshots):
+            return False
+        snapshot = self.snapshots[self.position]
+        self.position += 1
+        self.now_ms = max(self.now_ms, int(snapshot["timestamp"]))
+        self._apply_snapshot(snapshot)
+        self._expire_orders()
+        self._match_resting(snapshot["asset_id"])
+        return True
+
+    def advance_to(self, timestamp_ms):
+        """Applies every snapshot up to and including timestamp_ms."""
+        while self.position < len(self.snapshots) and int(self.snapshots[self.position]["timestamp"]) <= timestamp_ms:
+            self.advance()
+        self.now_ms = max(self.now_ms, int(timestamp_ms))
+        self._expire_orders()
+
+    def run_to_end(self):
+        """Replays all remaining snapshots and returns how many were applied."""
+        applied = 0
+        while self.advance():
+            applied += 1
+        return applied
+
+    def now(self):
+        """Returns the simulated time as a datetime."""
+        return datetime.fromtimestamp(self.now_ms / 1000)
+
+    def _apply_snapshot(self, snapshot):
+        book = self.books.setdefault(snapshot["asset_id"], BookState())
+        book.market = snapshot.get("market") or ""
+        book.bids = sorted(([float(o["price"]), float(o["size"])] for o in snapshot.get("bids") or []), key=lambda x: -x[0])
+        book.asks = sorted(([float(o["price"]), float(o["size"])] for o in snapshot.get("asks") or []), key=lambda x: x[0])
+        book.tick_size = str(snapshot.get("tick_size") or book.tick_size)
+        book.neg_risk = bool(snapshot.get("neg_risk"))
+        book.min_order_size = str(snapshot.get("min_order_size") or "0")
+        book.last_trade_price = str(snapshot.get("last_trade_price") or "")
+        book.timestamp = int(snapshot["timestamp"])
+
+    # -- ClobClient surface -------------------------------------------------
+
+    def get_order_book(self, token_id):
+        """Returns the current replayed book in the shape of `ClobClient.get_order_book`."""
+        book = self.books.get(token_id)
+        if book is None:
+            raise Exception(f"No recorded order book for token {token_id}")
+        return OrderBookSummary(
+            market=book.market,
+            asset_id=token_id,
+            timestamp=str(self.now_ms),
+            bids=[OrderSummary(price=str(p), size=str(s)) for p, s in reversed(book.bids) if s > EPSILON],
+            asks=[OrderSummary(price=str(p), size=str(s)) for p, s in reversed(book.asks) if s > EPSILON],
+            min_order_size=book.min_order_size,
+            neg_risk=book.neg_risk,
+            tick_size=book.tick_size,
+            last_trade_price=book.last_trade_price,
+            hash="backtest",
+        )
+
+    def get_tick_size(self, token_id):
+        return self.books[token_id].tick_size if token_id in self.books else "0.01"
+
+    def get_neg_risk(self, token_id):
+        return self.books[token_id].neg_risk if token_id in self.books else False
+
+    def get_fee_rate_bps(self, token_id):
+        return 0
+
+    def create_order(self, order_args, options=None):
+        """Builds an unsigned simulated limit order."""
+        self._validate_price(order_args.token_id, order_args.price)
+        return SimulatedOrder(
+            order_id=self._new_order_id(),
+            token_id=order_args.token_id,
+            side=order_args.side,
+            price=float(order_args.price),
+            size=float(order_args.size),
+            expiration=self._to_simulated_expiration(int(order_args.expiration or 0)),
+        )
+
+    def create_market_order(self, order_args, options=None):
+        """Builds an unsigned simulated market order (USD amount for BUY, shares for SELL)."""
+        price = float(order_args.price or 0)
+        if price <= 0:
+            price = self._market_price(order_args.token_id, order_args.side, float(order_args.amount))
+        self._validate_price(order_args.token_id, price)
+        return SimulatedOrder(
+            order_id=self._new_order_id(),
+            token_id=order_args.token_id,
+            side=order_args.side,
+            price=price,
+            size=0.0,
+            is_market=True,
+            amount=float(order_args.amount),
+        )
+
+    def post_order(self, order, orderType=OrderType.GTC, post_only=False):
+        """Matches a simulated order against the current book and returns an API-like response."""
+        order.order_type = orderType
+        order.created_at = self.now_ms
+        order.arrival_price = self._best_opposite(order.token_id, order.side)
+        if orderType in (OrderType.FOK, OrderType.FAK) or order.is_market:
+            fillable = self._fillable(order)
+            if orderType == OrderType.FOK and fillable + EPSILON < self._target(order):
+                order.status = "unmatched"
+                self.orders[order.order_id] = order
+                raise Exception("order couldn't be fully filled. FOK orders are fully filled or killed.")
+        if post_only and self._crosses(order):
+            raise Exception("invalid post-only order: order crosses book")
+        self.orders[order.order_id] = order
+        self._match(order)
+        if self._remaining(order) > EPSILON and orderType in (OrderType.GTC, OrderType.GTD) and not order.is_market:
+            order.status = "live"
+            self.open_orders[order.order_id] = order
+        elif order.size_matched > EPSILON:
+            order.status = "matched"
+        else:
+            order.status = "unmatched"
+        return self._response(order)
+
+    def cancel(self, order_id):
+        """Cancels a resting simulated order."""
+        return self.cancel_orders([order_id])
+
+    def cancel_orders(self, order_ids):
+        canceled, not_canceled = [], {}
+        for order_id in order_ids:
+            order = self.open_orders.pop(order_id, None)
+            if order is None:
+                not_canceled[order_id] = "order not found or already done"
+            else:
+                order.status = "canceled"
+                canceled.append(order_id)
+        return {"canceled": canceled, "not_canceled": not_canceled}
+
+    def cancel_all(self):
+        return self.cancel_orders(list(self.open_orders))
+
+    def get_orders(self, params=None, next_cursor=None):
+        """Returns resting orders in the shape of `ClobClient.get_orders`."""
+        asset_id = getattr(params, "asset_id", None) if params else None
+        return [self._order_dict(o) for o in self.open_orders.values() if not asset_id or o.token_id == asset_id]
+
+    def get_order(self, order_id):
+        order = self.orders.get(order_id)
+        return self._order_dict(order) if order else None
+
+    # -- Matching -----------------------------------------------------------
+
+    def _new_order_id(self):
+        order_id = f"0xbacktest{self._next_id:08d}"
+        self._next_id += 1
+        return order_id
+
+    def _to_simulated_expiration(self, expiration):
+        # GTD expirations are computed from the wall clock; shift them onto the replay clock.
+        if not expiration:
+            return 0
+        return expiration - int(time.time()) + self.now_ms // 1000
+
+    def _validate_price(self, token_id, price):
+        tick = float(self.get_tick_size(token_id))
+        if price < tick - EPSILON or price > 1 - tick + EPSILON:
+            raise Exception(f"price ({price}), min: {tick} - max: {1 - tick}")
+
+    def _levels(self, token_id, side):
+        book = self.books.get(token_id)
+        if book is None:
+            return []
+        return book.asks if side == BUY else book.bids
+
+    def _best_opposite(self, token_id, side):
+        for price, size in self._levels(token_id, side):
+            if size > EPSILON:
+                return price
+        return 0.0
+
+    def _market_price(self, token_id, side, amount):
+        # Mirrors ClobClient.calculate_market_price: worst level needed to match the amount.
+        total = 0.0
+        levels = [lvl for lvl in self._levels(token_id, side) if lvl[1] > EPSILON]
+        if not levels:
+            raise Exception("no match")
+        for price, size in levels:
+            total += size * price if side == BUY else size
+            if total >= amount:
+                return price
+        return levels[-1][0]
+
+    def _target(self, order):
+        return order.amount if order.is_market else order.size
+
+    def _remaining(self, order):
+        if order.is_market and order.side == BUY:
+            return order.amount - order.usd_matched
+        if order.is_market:
+            return order.amount - order.size_matched
+        return order.size - order.size_matched
+
+    def _acceptable(self, order, price):
+        return price <= order.price + EPSILON if order.side == BUY else price >= order.price - EPSILON
+
+    def _crosses(self, order):
+        best = self._best_opposite(order.token_id, order.side)
+        return bool(best) and self._acceptable(order, best)
+
+    def _fillable(self, order):
+        total = 0.0
+        for price, size in self._levels(order.token_id, order.side):
+            if not self._acceptable(order, price):
+                break
+            total += size * price if order.is_market and order.side == BUY else size
+        return total
+
+    def _match(self, order):
+        for level in self._levels(order.token_id, order.side):
+            remaining = self._remaining(order)
+            if remaining <= EPSILON:
+                break
+            price, size = level
+            if not self._acceptable(order, price):
+                break
+            if size <= EPSILON:
+                continue
+            if order.is_market and order.side == BUY:
+                take = min(size, remaining / price)
+            else:
+                take = min(size, remaining)
+            level[1] -= take
+            order.size_matched += take
+            order.usd_matched += take * price
+            self.fills.append(Fill(order.order_id, order.token_id, order.side, price, take, self.now_ms))
+
+    def _match_resting(self, token_id):
+        for order in [o for o in self.open_orders.values() if o.token_id == token_id]:
+            self._match(order)
+            if self._remaining(order) <= EPSILON:
+                order.status = "matched"
+                del self.open_orders[order.order_id]
+
+    def _expire_orders(self):
+        now_s = self.now_ms // 1000
+        for order in [o for o in self.open_orders.values() if o.expiration and o.expiration <= now_s]:
+            order.status = "expired"
+            del self.open_orders[order.order_id]
+
+    def _order_dict(self, order):
+        return {
+            "id": order.order_id,
+            "status": order.status.upper(),
+            "asset_id": order.token_id,
+            "market": self.books[order.token_id].market if order.token_id in self.books else "",
+            "side": order.side,
+            "price": str(order.price),
+            "original_size": str(order.size),
+            "size_matched": str(order.size_matched),
+            "expiration": str(order.expiration),
+            "order_type": order.order_type,
+            "created_at": order.created_at // 1000,
+        }
+
+    def _response(self, order):
+        if order.side == BUY:
+            making, taking = order.usd_matched, order.size_matched
+        else:
+            making, taking = order.size_matched, order.usd_matched
+        return {
+            "success": True,
+            "errorMsg": "",
+            "orderID": order.order_id,
+            "transactionsHashes": [],
+            "status": order.status,
+            "makingAmount": f"{making:.6f}",
+            "takingAmount": f"{taking:.6f}",
+        }
+
+    # -- Reporting ----------------------------------------------------------
+
+    def fill_report(self):
+        """Summarises fills and slippage per order.
+
+        Slippage is measured against the best opposite price when the order
+        arrived, in price units and basis points (positive means worse).
+        """
+        rows = []
+        for order in self.orders.values():
+            avg_price = order.usd_matched / order.size_matched if order.size_matched > EPSILON else 0.0
+            slippage = 0.0
+            if avg_price and order.arrival_price:
+                slippage = avg_price - order.arrival_price if order.side == BUY else order.arrival_price - avg_price
+            rows.append({
+                "order_id": order.order_id,
+                "token_id": order.token_id,
+                "side": order.side,
+                "order_type": order.order_type,
+                "status": order.status,
+                "limit_price": round(order.price, 6),
+                "requested": round(self._target(order), 6),
+                "filled_size": round(order.size_matched, 6),
+                "filled_usd": round(order.usd_matched, 6),
+                "avg_price": round(avg_price, 6),
+                "arrival_price": round(order.arrival_price, 6),
+                "slippage": round(slippage, 6),
+                "slippage_bps": round(slippage / order.arrival_price * 10000, 2) if order.arrival_price else 0.0,
+            })
+        return rows
+
+
+def write_report(rows, filename):
+    """Writes a fill report produced by `BacktestClient.fill_report` to CSV."""
+    if not rows:
+        return
+    with open(filename, "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
@@ -0,0 +1,642 @@
+#!/usr/bin/env python3
+"""Microbenchmarks for the PolyBot hot paths.
+
+Run all benchmarks with `python benchmarks.py`, or a single one by name,
+e.g. `python benchmarks.py matching_engine`.
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from py_clob_client.client import ClobClient
+from py_clob_client.clob_types import CreateOrderOptions, MarketOrderArgs, OrderArgs
+from py_clob_client.constants import POLYGON
+from datetime import datetime, timedelta
+import arbitrage
+from arbitrage import ArbScanner, market_baskets
+from books import BookCache, BookView
+from checkpoint import INTENT_WINDOW, Checkpoint, row_keys
+from clob_stub import MatchingEngine, OrderRejected
+from dashboard import Dashboard, ScreenDiff
+from events import ConsoleSink, EventLog, JsonlSink
+from order_store import OrderStore
+import pnl
+from pnl import PnlBook
+from precision import FireTimer, percentile
+from presize import presize_order
+from quoter import LadderConfig, desired_quotes, diff_quotes, without_own_orders
+from readcache import ReadCache
+from risk import RiskEngine, RiskLimits, RiskRejected
+from routing import plan_buy, synthetic_asks
+from screener import MarketScreener
+from signer_pool import SignerPool, sign_orders
+from signing import FastSigner
+from trades import Fill, TradeStore
+from triggers import CONDITIONS, TriggerEngine
+
+
+def bench_matching_engine(n=200000, tokens=20, seed=7):
+    """Submits a GTC/GTD/FOK/FAK/cancel mix to the in-memory matching engine."""
+    rng = random.Random(seed)
+    engine = MatchingEngine()
+    token_ids = [f"token-{i}" for i in range(tokens)]
+    now = time.time()
+    # Pre-generate the flow so only engine time is measured.
+    flow = []
+    for _ in range(n):
+        token_id = rng.choice(token_ids)
+        side = "BUY" if rng.random() < 0.5 else "SELL"
+        price = round(0.5 + (rng.randint(-8, 8) / 100), 2)
+        size = float(rng.randint(5, 200))
+        kind = rng.random()
+        order_type = "GTC" if kind < 0.6 else "GTD" if kind < 0.7 else "FOK" if kind < 0.8 else "FAK"
+        flow.append((token_id, side, price, size, order_type, int(now) + 3600 if order_type == "GTD" else 0))
+    live = []
+    rejected = 0
+    start = time.perf_counter()
+    for i, (token_id, side, price, size, order_type, expiration) in enumerate(flow):
+        try:
+            order, _ = engine.submit("bench", token_id, side, price, size, order_type, expiration)
+            if order.status == "LIVE":
+                live.append(order.order_id)
+        except OrderRejected:
+            rejected += 1
+        if i % 4 == 3 and live:
+            engine.cancel(live.pop(rng.randrange(len(live))))
+    elapsed = time.perf_counter() - start
+    return {
+        "orders": n,
+        "seconds": round(elapsed, 3),
+        "orders_per_sec": round(n / elapsed),
+        "trades": len(engine.trades),
+        "fok_rejected": rejected,
+    }
+
+
+def bench_triggers(armed=100000, updates=100000, tokens=100, seed=7):
+    """Evaluates book updates against a large set of armed triggers."""
+    rng = random.Random(seed)
+    engine = TriggerEngine()
+    for i in range(armed):
+        condition = rng.choice(CONDITIONS)
+        threshold = rng.uniform(0, 500) if condition.endswith("_depth_gt") else rng.uniform(0.0, 0.35)
+        engine.arm(f"token-{i % tokens}", condition, threshold, {}, ticks=rng.randint(1, 3))
+    views = []
+    for i in range(updates):
+        mid = 0.5 + rng.uniform(-0.05, 0.05)
+        bids = [(round(mid - 0.01 * k, 2), float(rng.randint(10, 200))) for k in range(1, 6)]
+        asks = [(round(mid + 0.01 * k, 2), float(rng.randint(10, 200))) for k in range(1, 6)]
+        views.append(BookView(f"token-{i % tokens}", bids, asks))
+    start = time.perf_counter()
+    fired = 0
+    for view in views:
+        fired += len(engine.on_book(view))
+    elapsed = time.perf_counter() - start
+    return {
+        "armed": armed,
+        "updates": updates,
+        "seconds": round(elapsed, 3),
+        "updates_per_sec": round(updates / elapsed),
+        "fired": fired,
+    }
+
+
+def bench_screener(markets=50000, queries=2000, seed=7):
+    """Runs compound screener queries over a synthetic market universe."""
+    rng = random.Random(seed)
+    words = ["election", "bitcoin", "fed", "rates", "nba", "finals", "trump", "senate", "eth", "price",
+             "weather", "oscars", "world", "cup", "inflation", "ceasefire", "spacex", "launch", "gdp", "ai"]
+    universe = []
+    for i in range(markets):
+        question = " ".join(rng.sample(words, 4))
+        universe.append({
+            "condition_id": f"0x{i:064x}",
+            "market_slug": question.replace(" ", "-") + f"-{i}",
+            "question": question + "?",
+            "tags": [rng.choice(["Politics", "Crypto", "Sports", "Economics"])],
+            "end_date_iso": f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T00:00:00Z",
+            "tokens": [{"token_id": str(i * 2), "outcome": "Yes", "price": round(rng.random(), 3)},
+                       {"token_id": str(i * 2 + 1), "outcome": "No", "price": 0}],
+            "rewards": {"rates": [{"rewards_daily_rate": rng.choice([0, 1, 5, 25, 100])}],
+                        "max_spread": rng.choice([1, 2, 3.5]), "min_size": rng.choice([10, 50, 100])},
+            "active": rng.random() < 0.8,
+        })
+    screener = MarketScreener(None, ttl=float("inf"))
+    start = time.perf_counter()
+    screener.load(universe)
+    load_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    matched = 0
+    for _ in range(queries):
+        _, total = screener.search(
+            text=" ".join(rng.sample(words, 2))[:-1],
+            ranges={"price": (0.2, 0.8), "rewards_daily_rate": (5, None), "end_date": ("2026-03-01", "2026-09-30")},
+            active_only=True, sort_by="rewards_daily_rate", descending=True, page=2,
+        )
+        matched += total
+    elapsed = time.perf_counter() - start
+    return {
+        "markets": markets,
+        "load_seconds": round(load_seconds, 3),
+        "queries": queries,
+        "ms_per_query": round(elapsed / queries * 1000, 3),
+        "avg_matches": round(matched / queries),
+    }
+
+
+def bench_risk(n=500000, tokens=200, seed=7):
+    """Measures the per-order cost of RiskEngine.check with every limit enabled."""
+    rng = random.Random(seed)
+    limits = RiskLimits(max_token_notional=5000.0, max_market_notional=8000.0, max_batch_spend=1e9,
+                        max_orders_per_second=1e9, kill_file="bench.kill")
+    engine = RiskEngine(limits)
+    for i in range(0, tokens, 2):
+        engine.register_market(f"market-{i}", [f"token-{i}", f"token-{i + 1}"])
+    flow = [(f"token-{rng.randrange(tokens)}", "BUY" if rng.random() < 0.8 else "SELL", float(rng.randint(1, 100)))
+            for _ in range(n)]
+    rejected = 0
+    start = time.perf_counter()
+    for token_id, side, notional in flow:
+        try:
+            engine.check(token_id, side, notional)
+        except RiskRejected:
+            rejected += 1
+            continue
+        if notional > 90:
+            engine.release(token_id, side, notional)
+    elapsed = time.perf_counter() - start
+    return {
+        "checks": n,
+        "seconds": round(elapsed, 3),
+        "us_per_check": round(elapsed / n * 1e6, 3),
+        "rejected": rejected,
+    }
+
+
+class _Quote:
+    __slots__ = ("side", "price", "remaining")
+
+    def __init__(self, side, price, remaining):
+        self.side = side
+        self.price = price
+        self.remaining = remaining
+
+
+def bench_quoter(tokens=100, cycles=200, levels=5, seed=7):
+    """Measures the CPU of computing and diffing quote ladders, excluding signing and requests."""
+    rng = random.Random(seed)
+    configs = [LadderConfig(f"token-{i}", levels=levels, size=20.0) for i in range(tokens)]
+    resting = {c.token_id: [] for c in configs}
+    changes = 0
+    start = time.perf_counter()
+    for _ in range(cycles):
+        for config in configs:
+            mid = 0.5 + rng.randint(-3, 3) / 100
+            bids = [(round(mid - 0.01 * k, 2), 100.0) for k in range(1, 10)]
+            asks = [(round(mid + 0.01 * k, 2), 100.0) for k in range(1, 10)]
+            view = without_own_orders(BookView(config.token_id, bids, asks), resting[config.token_id])
+            desired = desired_quotes(config, view)
+            stale, new = diff_quotes(desired, resting[config.token_id], 0.01, config.size / 2)
+            changes += len(stale) + len(new)
+            kept = [o for o in resting[config.token_id] if o not in stale]
+            resting[config.token_id] = kept + [_Quote(side, price, size) for side, price, size in new]
+    elapsed = time.perf_counter() - start
+    return {
+        "tokens": tokens,
+        "cycles": cycles,
+        "ms_per_cycle": round(elapsed / cycles * 1000, 3),
+        "changes_per_cycle": round(changes / cycles, 1),
+    }
+
+
+def _offline_client(seed):
+    """A level-1 client whose market metadata is answered locally, so only signing is measured."""
+    key = "0x" + random.Random(seed).getrandbits(256).to_bytes(32, "big").hex()
+    client = ClobClient("http://127.0.0.1:1", key=key, chain_id=POLYGON, signature_type=2,
+                        funder="0x" + "11" * 20)
+    client.get_tick_size = lambda token_id: "0.01"
+    client.get_neg_risk = lambda token_id: False
+    client.get_fee_rate_bps = lambda token_id: 0
+    return client
+
+
+def bench_signer_pool(n=400, seed=7):
+    """Signs a batch of limit orders inline and through SignerPools of growing size."""
+    rng = random.Random(seed)
+    client = _offline_client(seed)
+
+    def batch():
+        return [OrderArgs(token_id=str(rng.getrandbits(64)), price=rng.randint(1, 99) / 100,
+                          size=float(rng.randint(5, 200)), side="BUY" if rng.random() < 0.5 else "SELL")
+                for _ in range(n)]
+
+    orders = batch()
+    start = time.perf_counter()
+    sign_orders(client, orders)
+    result = {"orders": n, "inline_per_sec": round(n / (time.perf_counter() - start))}
+    cores = os.cpu_count() or 1
+    for processes in sorted({1, 2, 4, cores}):
+        with SignerPool(processes) as pool:
+            pool.warm()
+            orders = batch()
+            start = time.perf_counter()
+            signed = pool.sign_orders(client, orders)
+            elapsed = time.perf_counter() - start
+        failed = sum(isinstance(s, Exception) for s in signed)
+        if failed:
+            raise RuntimeError(f"{failed} orders failed to sign")
+        result[f"pool_{processes}_per_sec"] = round(n / elapsed)
+    result["cores"] = cores
+    return result
+
+
+def bench_signing(n=200, seed=7):
+    """Signs the same orders with the client's builder and with FastSigner, and checks the payloads match."""
+    rng = random.Random(seed)
+    client = _offline_client(seed)
+    signer = FastSigner.from_client(client)
+    tokens = [str(rng.getrandbits(64)) for _ in range(20)]
+    orders = []
+    for i in range(n):
+        side = "BUY" if rng.random() < 0.5 else "SELL"
+        if i % 4 == 0:
+            args = MarketOrderArgs(token_id=rng.choice(tokens), amount=float(rng.randint(5, 200)), side=side,
+                                   price=rng.randint(1, 99) / 100)
+        else:
+            args = OrderArgs(token_id=rng.choice(tokens), price=rng.randint(1, 99) / 100,
+                             size=float(rng.randint(5, 200)), side=side)
+        orders.append((args, rng.random() < 0.2))
+    start = time.perf_counter()
+    before = []
+    for args, neg_risk in orders:
+        options = CreateOrderOptions(tick_size="0.01", neg_risk=neg_risk)
+        if isinstance(args, MarketOrderArgs):
+            before.append(client.builder.create_market_order(args, options).dict())
+        else:
+            before.append(client.builder.create_order(args, options).dict())
+    before_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    after = [signer.sign(args, "0.01", neg_risk, salt=expected["salt"]).dict()
+             for (args, neg_risk), expected in zip(orders, before)]
+    after_elapsed = time.perf_counter() - start
+    mismatched = sum(a != b for a, b in zip(before, after))
+    if mismatched:
+        raise RuntimeError(f"{mismatched} signed orders differ from the client builder")
+    return {
+        "orders": n,
+        "builder_per_sec": round(n / before_elapsed),
+        "fast_per_sec": round(n / after_elapsed),
+        "speedup": round(before_elapsed / after_elapsed, 2),
+    }
+
+
+def bench_fire_timer(fires=40, spacing=0.1):
+    """Measures spin-then-fire error while another thread keeps the interpreter busy."""
+    stop = threading.Event()
+
+    def busy():
+        # Stands in for the order store poller and other background threads.
+        while not stop.is_set():
+            sum(i * i for i in range(2000))
+
+    timer = FireTimer()
+    worker = threading.Thread(target=busy, daemon=True)
+    worker.start()
+    try:
+        start = time.time() + spacing
+        for i in range(fires):
+            timer.wait(start + i * spacing)
+        # The same schedule with a plain sleep, for comparison.
+        late_sleeps = []
+        start = time.time() + spacing
+        for i in range(fires):
+            target = start + i * spacing
+            time.sleep(max(0.0, target - time.time()))
+            late_sleeps.append(time.time() - target)
+    finally:
+        stop.set()
+        worker.join()
+    stats = timer.stats()
+    late_sleeps.sort()
+    stats["sleep_p50_us"] = round(late_sleeps[len(late_sleeps) // 2] * 1e6, 1)
+    stats["sleep_max_us"] = round(late_sleeps[-1] * 1e6, 1)
+    return stats
+
+
+def bench_dashboard(frames=500, width=160, height=50, seed=7):
+    """Measures composing and diffing dashboard frames while the top of the book moves."""
+    rng = random.Random(seed)
+    books = BookCache()
+    tokens = [f"token-{i}" for i in range(10)]
+    now = datetime(2026, 1, 1)
+    tasks = [(now + timedelta(minutes=i), {"token_id": tokens[i], "order_type": "GTC", "side": "BUY"}, "")
+             for i in range(len(tokens))]
+    dashboard = Dashboard(books, lambda: tokens, lambda: tasks, [OrderStore()], lambda: now)
+    diff = ScreenDiff()
+    written = 0
+    start = time.perf_counter()
+    for _ in range(frames):
+        token = rng.choice(tokens)
+        bids = [(round(0.49 - 0.01 * k, 2), float(rng.randint(1, 500))) for k in range(20)]
+        asks = [(round(0.51 + 0.01 * k, 2), float(rng.randint(1, 500))) for k in range(20)]
+        books.update(BookView(token, bids, asks))
+        written += sum(len(text) for _, _, text, _ in diff.changes(dashboard.compose(width, height), width))
+    elapsed = time.perf_counter() - start
+    return {
+        "frames": frames,
+        "ms_per_frame": round(elapsed / frames * 1000, 3),
+        "max_hz": round(frames / elapsed),
+        "cells_per_frame": round(written / frames),
+        "screen_cells": width * height,
+    }
+
+
+class _SlowTerminal:
+    """Stands in for a terminal that takes `delay` seconds to take each flushed write."""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        time.sleep(self.delay)
+
+
+def bench_event_log(n=5000, delay=0.0005):
+    """Compares printing each order response to a slow terminal with queuing it on the event log."""
+    response = {"success": True, "errorMsg": "", "orderID": "0x" + "0" * 64, "transactionsHashes": [],
+                "status": "live", "makingAmount": "0.000000", "takingAmount": "0.000000"}
+    terminal = _SlowTerminal(delay)
+    start = time.perf_counter()
+    for i in range(n):
+        # A terminal is line buffered, so every print waits for it.
+        print(f"Executed order for token {i} | Type: GTC | Side: BUY | Response: {response}", file=terminal, flush=True)
+    print_elapsed = time.perf_counter() - start
+    log = EventLog([ConsoleSink(stream=terminal), JsonlSink(os.devnull)])
+    start = time.perf_counter()
+    for i in range(n):
+        log.emit("order_executed", f"Executed order for token {i} | Type: GTC | Side: BUY | Response: {response}", "ok",
+                 token_id=str(i), order_type="GTC", side="BUY", response=response)
+    emit_elapsed = time.perf_counter() - start
+    log.close()
+    stats = log.stats()
+    return {
+        "events": n,
+        "print_us": round(print_elapsed / n * 1e6, 2),
+        "emit_us": round(emit_elapsed / n * 1e6, 2),
+        "written": stats["written"],
+        "dropped": stats["dropped"],
+    }
+
+
+def bench_trade_store(n=200000, page=500, tokens=500, seed=7):
+    """Measures storing fills page by page, re-upserting a refreshed page and indexed queries."""
+    rng = random.Random(seed)
+    fills = [Fill("default", str(i), f"0x{i:064x}", f"token-{rng.randrange(tokens)}", f"market-{rng.randrange(tokens // 2)}",
+                  "Yes", rng.choice(("BUY", "SELL")), round(rng.uniform(0.01, 0.99), 2), float(rng.randint(1, 500)),
+                  0.0, "TAKER", "MATCHED", 1700000000 + i, "")
+             for i in range(n)]
+    with tempfile.TemporaryDirectory() as directory:
+        store = TradeStore(os.path.join(directory, "trades.db"))
+        start = time.perf_counter()
+        for i in range(0, n, page):
+            store.store_page("default", fills[i:i + page], "MA==", None)
+        store_elapsed = time.perf_counter() - start
+        for fill in fills[-page:]:
+            fill.status = "CONFIRMED"
+        start = time.perf_counter()
+        store.store_page("default", fills[-page:], "LTE=", None)
+        refresh_elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        for i in range(100):
+            store.fills(token_id=f"token-{i}", since=1700000000 + n // 2)
+        query_elapsed = time.perf_counter() - start
+        count = store.count()
+        store.close()
+    return {
+        "fills": count,
+        "fills_per_sec": round(n / store_elapsed),
+        "refresh_page_ms": round(refresh_elapsed * 1000, 2),
+        "token_query_ms": round(query_elapsed / 100 * 1000, 3),
+    }
+
+
+def bench_pnl(n=200000, tokens=20000, new=500, seed=7):
+    """Measures rebuilding a PnlBook from the trade store, an incremental refresh and marking every position."""
+    rng = random.Random(seed)
+    picks = [rng.randrange(tokens) for _ in range(n + new)]
+    fills = [Fill("default", str(i), f"0x{i:064x}", f"token-{t}", f"market-{t // 2}", "Yes",
+                  rng.choice(("BUY", "BUY", "SELL")), round(rng.uniform(0.01, 0.99), 2), float(rng.randint(1, 500)),
+                  0.0, "TAKER", "MATCHED", 1700000000 + i, "")
+             for i, t in enumerate(picks)]
+    prices = {f"token-{i}": round(rng.uniform(0.01, 0.99), 2) for i in range(tokens)}
+    with tempfile.TemporaryDirectory() as directory:
+        store = TradeStore(os.path.join(directory, "trades.db"))
+        store.store_page("default", fills[:n], "LTE=", None)
+        book = PnlBook()
+        start = time.perf_counter()
+        book.refresh(store)
+        rebuild_elapsed = time.perf_counter() - start
+        store.store_page("default", fills[n:], "LTE=", None)
+        start = time.perf_counter()
+        book.refresh(store)
+        refresh_elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        valuation = book.value(prices)
+        events = valuation.by_event()
+        totals = valuation.totals()
+        value_elapsed = time.perf_counter() - start
+        store.close()
+    return {
+        "fills": book.fills,
+        "positions": totals["positions"],
+        "events": len(events),
+        "numpy": pnl.np is not None,
+        "rebuild_ms": round(rebuild_elapsed * 1000, 1),
+        "refresh_ms": round(refresh_elapsed * 1000, 2),
+        "value_ms": round(value_elapsed * 1000, 2),
+    }
+
+
+def bench_arbitrage(markets=5000, event_size=5, scans=50, seed=7):
+    """Measures full-universe arbitrage rescans over complement and neg risk event baskets."""
+    rng = random.Random(seed)
+    universe = [{"condition_id": f"c{i}", "market_slug": f"m{i}", "active": True, "accepting_orders": True,
+                 "neg_risk": True, "neg_risk_market_id": f"e{i // event_size}",
+                 "tokens": [{"token_id": f"{i}-yes", "outcome": "Yes"}, {"token_id": f"{i}-no", "outcome": "No"}]}
+                for i in range(markets)]
+    baskets = market_baskets(universe)
+    scanner = ArbScanner(baskets)
+    weights = [rng.random() for _ in range(markets)]
+    views = []
+    for i in range(markets):
+        event = weights[i - i % event_size:i - i % event_size + event_size]
+        fair = weights[i] / sum(event)
+        for token_id, price in ((f"{i}-yes", fair), (f"{i}-no", 1 - fair)):
+            bid = max(0.01, round(price - rng.choice((0.01, 0.02)), 2))
+            views.append(BookView(token_id, [(bid, 100.0), (bid - 0.01, 200.0)],
+                                  [(round(bid + 0.02, 2), 100.0), (round(bid + 0.03, 2), 200.0)]))
+    start = time.perf_counter()
+    for view in views:
+        scanner.on_book(view)
+    update_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(scans):
+        found = scanner.scan()
+    scan_elapsed = time.perf_counter() - start
+    return {
+        "baskets": len(baskets),
+        "legs": len(scanner.ask),
+        "numpy": arbitrage.np is not None,
+        "update_us": round(update_elapsed / len(views) * 1e6, 2),
+        "rescan_ms": round(scan_elapsed / scans * 1000, 2),
+        "opportunities": len(found),
+    }
+
+
+def bench_routing(markets=2000, budget=100.0, seed=7):
+    """Plans USD buys over native and synthetic (complement) books and compares them with the native book alone."""
+    rng = random.Random(seed)
+    books = []
+    for _ in range(markets):
+        fair = rng.uniform(0.1, 0.9)
+        asks = [(round(fair + 0.01 * (i + rng.randint(1, 3)), 2), float(rng.randint(5, 200))) for i in range(10)]
+        bids = [(round(1 - fair - 0.01 * (i + rng.randint(1, 3)), 2), float(rng.randint(5, 200))) for i in range(10)]
+        books.append((sorted(asks), sorted(bids, reverse=True), float(rng.randint(0, 500))))
+    start = time.perf_counter()
+    plans = [(plan_buy(synthetic_asks(asks, bids, held), 0.99, usd=budget), plan_buy(synthetic_asks(asks, []), 0.99, usd=budget))
+             for asks, bids, held in books]
+    elapsed = time.perf_counter() - start
+    gains = [routed.improvement(native) for routed, native in plans]
+    return {
+        "plans": markets,
+        "plan_us": round(elapsed / markets * 1e6, 1),
+        "routed_share": round(sum(1 for routed, _ in plans if routed.size("complement")) / markets, 3),
+        "extra_tokens_pct": round(100 * sum(g["extra_tokens"] for g in gains) / sum(g["baseline_tokens"] for g in gains), 2),
+    }
+
+
+def bench_read_cache(callers=16, pages=20, latency=0.05, lookups=20000):
+    """Counts requests made by concurrent callers of the same catalog pages and measures a cache hit."""
+    class _Client:
+        requests = 0
+
+        def get_sampling_markets(self, next_cursor="MA=="):
+            _Client.requests += 1
+            time.sleep(latency)
+            return {"data": [{"condition_id": f"{next_cursor}-{i}"} for i in range(500)], "next_cursor": next_cursor}
+
+    client = ReadCache().attach(_Client())
+    cursors = [f"page-{i}" for i in range(pages)]
+
+    def caller():
+        for cursor in cursors:
+            client.get_sampling_markets(next_cursor=cursor)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=caller) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    cold_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in range(lookups):
+        client.get_sampling_markets(next_cursor=cursors[i % pages])
+    hit_elapsed = time.perf_counter() - start
+    return {
+        "calls": callers * pages,
+        "requests": _Client.requests,
+        "uncached_s": round(callers * pages * latency, 2),
+        "cold_s": round(cold_elapsed, 2),
+        "hit_us": round(hit_elapsed / lookups * 1e6, 2),
+    }
+
+
+def bench_checkpoint(rows=5000, window=INTENT_WINDOW):
+    """Measures checkpointing per CSV row (intents fsynced per window, starts and outcomes batched) and the resume load."""
+    batch = [{"token_id": str(i % 50), "order_type": "GTC", "price": "0.40", "size": "10", "side": "BUY"} for i in range(rows)]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "batch.checkpoint")
+        start = time.perf_counter()
+        keys = row_keys(batch)
+        checkpoint = Checkpoint(path)
+        for start_row in range(0, rows, window):
+            checkpoint.intend(list(zip(keys[start_row:start_row + window], batch[start_row:start_row + window])))
+            for key in keys[start_row:start_row + window]:
+                checkpoint.start(key)
+                checkpoint.done(key, "0x" + key[:8], "live")
+        checkpoint.close()
+        elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        resumed = Checkpoint(path)
+        skipped = sum(1 for key in row_keys(batch) if resumed.state(key) == "done")
+        resume_elapsed = time.perf_counter() - start
+        resumed.close()
+    return {
+        "rows": rows,
+        "fsyncs": checkpoint.syncs,
+        "per_row_us": round(elapsed / rows * 1e6, 1),
+        "resume_ms": round(resume_elapsed * 1000, 1),
+        "skipped": skipped,
+    }
+
+
+def bench_presize(checks=20000, levels=200, seed=5):
+    """Times one FOK pre-check (book walk plus policy) against books of levels asks and bids."""
+    rng = random.Random(seed)
+    views = []
+    for t in range(20):
+        asks = [(round(0.50 + 0.001 * i, 3), rng.uniform(1, 200)) for i in range(levels)]
+        bids = [(round(0.49 - 0.001 * i, 3), rng.uniform(1, 200)) for i in range(levels)]
+        views.append(BookView(str(t), bids, asks))
+    orders = [{"token_id": str(i % 20), "order_type": "FOK", "amount": str(rng.uniform(1, 30000)),
+               "side": "BUY" if i % 2 else "SELL"} for i in range(checks)]
+    actions = {}
+    durations = []
+    start = time.perf_counter()
+    for order in orders:
+        begin = time.perf_counter()
+        _, _, action = presize_order(order, order["side"], float(order["amount"]), views[int(order["token_id"])], "downsize")
+        durations.append(time.perf_counter() - begin)
+        actions[action] = actions.get(action, 0) + 1
+    elapsed = time.perf_counter() - start
+    return {
+        "checks": checks,
+        "levels": levels,
+        "per_check_us": round(elapsed / checks * 1e6, 2),
+        "p99_us": round(percentile(durations, 99) * 1e6, 1),
+        **actions,
+    }
+
+
+BENCHMARKS = {
+    "matching_engine": bench_matching_engine,
+    "triggers": bench_triggers,
+    "screener": bench_screener,
+    "risk": bench_risk,
+    "quoter": bench_quoter,
+    "signer_pool": bench_signer_pool,
+    "signing": bench_signing,
+    "fire_timer": bench_fire_timer,
+    "dashboard": bench_dashboard,
+    "event_log": bench_event_log,
+    "trade_store": bench_trade_store,
+    "pnl": bench_pnl,
+    "arbitrage": bench_arbitrage,
+    "routing": bench_routing,
+    "read_cache": bench_read_cache,
+    "checkpoint": bench_checkpoint,
+    "presize": bench_presize,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        result = BENCHMARKS[name]()
+        print(f"{name}: " + ", ".join(f"{k}={v}" for k, v in result.items()))
@@ -0,0 +1,123 @@
+"""Shared cache of the latest order book per token.
+
+`BookCache` turns `OrderBookSummary` responses into sorted float levels once,
+notifies listeners on every update and can poll many books per request via
+`get_order_books`.
+"""
+import threading
+import time
+from py_clob_client.clob_types import BookParams
+
+BOOKS_PER_REQUEST = 50
+
+
+class BookView:
+    """Sorted float view of an order book: bids best (highest) first, asks best (lowest) first."""
+    __slots__ = ("token_id", "market", "bids", "asks", "tick_size", "neg_risk", "timestamp", "received_at")
+
+    def __init__(self, token_id, bids, asks, tick_size=0.01, market="", neg_risk=False, timestamp=0):
+        self.token_id = token_id
+        self.market = market
+        self.bids = bids
+        self.asks = asks
+        self.tick_size = tick_size
+        self.neg_risk = neg_risk
+        self.timestamp = timestamp
+        self.received_at = time.monotonic()
+
+    @classmethod
+    def from_summary(cls, book):
+        """Builds a view from a `ClobClient.get_order_book` response."""
+        bids = sorted(((float(o.price), float(o.size)) for o in book.bids or []), key=lambda x: -x[0])
+        asks = sorted(((float(o.price), float(o.size)) for o in book.asks or []), key=lambda x: x[0])
+        return cls(book.asset_id, bids, asks, float(book.tick_size or 0.01), book.market or "",
+                   bool(book.neg_risk), int(book.timestamp or 0))
+
+    @property
+    def best_bid(self):
+        return self.bids[0][0] if self.bids else None
+
+    @property
+    def best_ask(self):
+        return self.asks[0][0] if self.asks else None
+
+    @property
+    def spread(self):
+        if not self.bids or not self.asks:
+            return None
+        # Rounded so a 0.52/0.50 book reports exactly 0.02 for threshold comparisons.
+        return round(self.asks[0][0] - self.bids[0][0], 6)
+
+    @property
+    def mid(self):
+        if not self.bids or not self.asks:
+            return None
+        return (self.asks[0][0] + self.bids[0][0]) / 2
+
+    def depth(self, side, ticks):
+        """Returns the size resting within `ticks` ticks of the best price on side ('bids' or 'asks')."""
+        levels = self.bids if side == "bids" else self.asks
+        if not levels:
+            return 0.0
+        limit = ticks * self.tick_size + 1e-9
+        best = levels[0][0]
+        total = 0.0
+        for price, size in levels:
+            if abs(price - best) > limit:
+                break
+            total += size
+        return total
+
+
+class BookCache:
+    """Latest `BookView` per token, with listeners called on every update."""
+
+    def __init__(self, client=None):
+        self.client = client
+        self.books = {}
+        self.listeners = []
+        self.lock = threading.Lock()
+
+    def add_listener(self, listener):
+        """Registers listener(view), called from whichever thread applied the update."""
+        self.listeners.append(listener)
+
+    def get(self, token_id):
+        return self.books.get(token_id)
+
+    def update(self, book):
+        """Stores an `OrderBookSummary` (or a ready `BookView`) and notifies listeners."""
+        view = book if isinstance(book, BookView) else BookView.from_summary(book)
+        with self.lock:
+            self.books[view.token_id] = view
+        for listener in self.listeners:
+            listener(view)
+        return view
+
+    def refresh(self, token_ids):
+        """Fetches the books of token_ids, BOOKS_PER_REQUEST per request, and applies them."""
+        token_ids = list(dict.fromkeys(token_ids))
+        views = []
+        for i in range(0, len(token_ids), BOOKS_PER_REQUEST):
+            chunk = token_ids[i:i + BOOKS_PER_REQUEST]
+            for book in self.client.get_order_books([BookParams(token_id=t) for t in chunk]):
+                views.append(self.update(book))
+        return views
+
+    def poll(self, token_ids, interval, stop_event, on_error=None):
+        """Refreshes token_ids every interval seconds until stop_event is set.
+
+        token_ids may be a callable returning the current list, so callers can
+        drop tokens that no longer need watching.
+        """
+        while not stop_event.is_set():
+            started = time.monotonic()
+            tokens = token_ids() if callable(token_ids) else token_ids
+            if tokens:
+                try:
+                    self.refresh(tokens)
+                except Exception as e:
+                    if on_error is None:
+                        raise
+                    on_error(e)
+            stop_event.wait(max(0.0, interval - (time.monotonic() - started)))
@@ -0,0 +1,220 @@
+"""Checkpoints for CSV order batches, so an interrupted batch resumes without double-submitting.
+
+Each batch file gets an append-only JSONL checkpoint next to it, with one
+record per row keyed by a hash of the row's content and its occurrence number.
+The key does not depend on the rest of the file, so fixing one bad row and
+running the file again only runs that row (and the rows not done yet):
+
+- before a window of rows is posted, an `intent` record is written for each
+  of them, and the window is fsynced once. No row is posted before its intent
+  is on disk;
+- every outcome is appended as `done` (with the order ID and status) or
+  `failed` (the exchange answered with a rejection, or the order never left).
+  Outcomes are fsynced every SYNC_EVERY records and on close. An outcome lost
+  in a crash leaves its row ambiguous, which the resume handles;
+- on resume, `done` rows are skipped and `failed` rows are run again. Rows
+  with an intent but no outcome may or may not have reached the exchange.
+  `reconcile` looks for them among our open orders and fills, by token and
+  side, created between the row's start and the next row's start. A match
+  marks the row done; rows without one are retried.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import httpx
+from py_clob_client.clob_types import OpenOrderParams, TradeParams
+from py_clob_client.exceptions import PolyApiException
+from trades import trade_fills
+
+INTENT_WINDOW = 32
+SYNC_EVERY = 64
+RECONCILE_SLACK_SECONDS = 5
+SWEEP_TYPES = ("FOK_MAX", "FOK_MIN")
+
+INTENT = "intent"
+DONE = "done"
+FAILED = "failed"
+
+
+def row_keys(rows):
+    """Returns one stable key per row: its content hash and how many identical rows came before it."""
+    seen = {}
+    keys = []
+    for row in rows:
+        canonical = json.dumps({k: (v or "").strip() for k, v in row.items() if k}, sort_keys=True)
+        digest = hashlib.sha256(canonical.encode()).hexdigest()[:20]
+        seen[digest] = seen.get(digest, 0) + 1
+        keys.append(f"{digest}:{seen[digest]}")
+    return keys
+
+
+def outcome_uncertain(error):
+    """True when an order may have reached the exchange despite error (no answer, or a server-side failure)."""
+    if isinstance(error, PolyApiException):
+        return error.status_code is None or error.status_code >= 500
+    return isinstance(error, (httpx.HTTPError, TimeoutError, ConnectionError))
+
+
+class Checkpoint:
+    """Append-only record of which rows of a batch went out, fsynced in windows."""
+
+    def __init__(self, path, now=time.time, sync_every=SYNC_EVERY):
+        self.path = path
+        self.now = now
+        self.sync_every = sync_every
+        self.records = {}
+        if os.path.isfile(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # a torn last line from a crash
+                    self.records[record["key"]] = record
+        self.file = open(path, "a", encoding="utf-8")
+        self.unsynced = 0
+        self.syncs = 0
+        self.lock = threading.Lock()
+
+    def state(self, key):
+        record = self.records.get(key)
+        return record["state"] if record else None
+
+    def ambiguous(self):
+        """Records of rows with an intent but no outcome."""
+        return [r for r in self.records.values() if r["state"] == INTENT]
+
+    def _write(self, record):
+        self.records[record["key"]] = record
+        self.file.write(json.dumps(record, default=str) + "\n")
+        self.unsynced += 1
+
+    def _sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+        self.syncs += 1
+
+    def intend(self, rows):
+        """Records intents for [(key, row)] about to be posted, durably, with one fsync."""
+        with self.lock:
+            ts = self.now()
+            for key, row in rows:
+                self._write({"key": key, "state": INTENT, "ts": ts, "token_id": row.get("token_id"),
+                             "side": (row.get("side") or "BUY").strip().upper(), "order_type": (row.get("order_type") or "").upper(),
+                             "price": row.get("price"), "account": row.get("account") or ""})
+            self._sync()
+
+    def start(self, key):
+        """Stamps the time a row starts executing, which bounds the orders it can be matched with.
+
+        Flushed but not fsynced: only a crash of the machine loses it, and the
+        intent's time then bounds the row instead.
+        """
+        with self.lock:
+            self._write(dict(self.records[key], started=self.now()))
+            self.file.flush()
+
+    def _outcome(self, key, state, **fields):
+        with self.lock:
+            record = dict(self.records.get(key) or {"key": key})
+            record.update(state=state, done_ts=self.now(), **fields)
+            self._write(record)
+            if self.unsynced >= self.sync_every:
+                self._sync()
+            else:
+                self.file.flush()
+
+    def done(self, key, order_id="", status="", order_ids=None):
+        fields = {"order_ids": order_ids} if order_ids else {}
+        self._outcome(key, DONE, order_id=order_id or "", status=status or "", **fields)
+
+    def failed(self, key, error):
+        self._outcome(key, FAILED, error=str(error))
+
+    def counts(self, keys=None):
+        """Rows per state, over keys (the rows of the current file) or every record; None counts rows never run."""
+        counts = {INTENT: 0, DONE: 0, FAILED: 0, None: 0}
+        if keys is None:
+            keys = self.records
+        for key in keys:
+            counts[self.state(key)] += 1
+        return counts
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self._sync()
+                self.file.close()
+
+
+def reconcile(client, records, account=""):
+    """Matches the ambiguous records among one account's records with its open orders and fills.
+
+    Returns {key: ([order IDs], status)}. Rows of an account run one after
+    another, so a row's orders were created between its start and the next
+    row's start. A sweep row (FOK_MAX/FOK_MIN) can post several orders: it takes
+    every matching order of its window, and a finished sweep owns the orders
+    created while it ran, so they are never assigned to another row. Other rows
+    take one order; limit rows must match the price of an open order, or fill
+    at their price or better. Limit rows pick first, then other single-order rows, then
+    sweeps. Orders recorded as done are never assigned again.
+
+    Order times have whole-second resolution, so rows on the same token and
+    side started within the same second can still take each other's orders.
+    """
+    address = (getattr(client.builder, "funder", "") or "") if getattr(client, "builder", None) else ""
+    owner = client.creds.api_key if getattr(client, "creds", None) is not None else ""
+    starts = sorted((r["started"], r["key"]) for r in records if r.get("started") is not None)
+    next_start = {key: later for (_, key), (later, _) in zip(starts, starts[1:])}
+    claimed = set()
+    owned = []
+    for record in records:
+        if record["state"] != DONE:
+            continue
+        claimed.update(record.get("order_ids") or [record.get("order_id")])
+        if record.get("order_type") in SWEEP_TYPES and record.get("started") is not None:
+            owned.append((record["token_id"], record["side"], record["started"], record["done_ts"]))
+    matched = {}
+    by_token = {}
+    # Limit rows match on price too, so they pick first; sweeps take what is left in their window.
+    for record in sorted((r for r in records if r["state"] == INTENT),
+                         key=lambda r: (r["order_type"] in SWEEP_TYPES, r["order_type"] not in ("GTC", "GTD"), r.get("started", r["ts"]))):
+        by_token.setdefault(record["token_id"], []).append(record)
+    for token_id, pending in by_token.items():
+        since = int(min(r["ts"] for r in pending) - RECONCILE_SLACK_SECONDS)
+        candidates = []
+        for order in client.get_orders(OpenOrderParams(asset_id=token_id)) or []:
+            candidates.append((int(order.get("created_at") or 0), order["id"], order["side"].upper(),
+                               float(order.get("price") or 0), (order.get("status") or "live").lower(), True))
+        for trade in client.get_trades(TradeParams(asset_id=token_id, after=since)) or []:
+            for fill in trade_fills(trade, account, address, owner):
+                if fill.token_id == token_id:
+                    candidates.append((fill.match_time, fill.order_id, fill.side, fill.price, "matched", False))
+        candidates = [c for c in sorted(candidates) if not any(
+            token_id == token and c[2] == side and int(started) <= c[0] <= done_ts for token, side, started, done_ts in owned)]
+        for record in pending:
+            sweep = record["order_type"] in SWEEP_TYPES
+            price = float(record["price"]) if record["order_type"] in ("GTC", "GTD") and record.get("price") else None
+            lo = record.get("started", record["ts"]) - RECONCILE_SLACK_SECONDS
+            hi = next_start.get(record["key"], float("inf"))
+            found, status = [], None
+            for created, order_id, side, order_price, order_status, resting in candidates:
+                if order_id in claimed or side != record["side"] or not lo <= created < hi:
+                    continue
+                if price is not None:
+                    if resting and abs(order_price - price) > 1e-9:
+                        continue
+                    # A limit order fills at its price or better.
+                    if not resting and (order_price > price + 1e-9 if side == "BUY" else order_price < price - 1e-9):
+                        continue
+                claimed.add(order_id)
+                found.append(order_id)
+                status = status or order_status
+                if not sweep:
+                    break
+            if found:
+                matched[record["key"]] = (found, status)
+    return matched
@@ -0,0 +1,519 @@
+"""In-memory CLOB stand-in for load and latency testing.
+
+`MatchingEngine` is a price-time-priority matching engine with GTC, GTD, FOK
+and FAK semantics. `StubServer` exposes it over the REST paths `ClobClient`
+calls (`/book`, `/order`, `/orders`, `/data/orders`, `/data/trades`,
+`/cancel-all`, ...), so
+a real client pointed at `http://127.0.0.1:<port>` runs unchanged without
+touching the exchange. Signatures and API credentials are not verified.
+
+Run standalone with `python clob_stub.py [port] [recorded_books.jsonl]`.
+"""
+import base64
+import bisect
+import heapq
+import itertools
+import json
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from order_store import decode_signed_order
+
+BUY = "BUY"
+SELL = "SELL"
+PRICE_SCALE = 10000  # prices are held as integer ticks of 0.0001
+END_CURSOR = "LTE="
+SEED_OWNER = "stub-liquidity"
+TRADES_PAGE_SIZE = 500
+
+
+class OrderRejected(Exception):
+    """Raised when the engine refuses an order; maps to an HTTP 400."""
+
+
+class RestingOrder:
+    """An order tracked by the engine."""
+    __slots__ = ("order_id", "owner", "token_id", "side", "ticks", "original_size", "remaining",
+                 "expiration", "order_type", "status", "created_at")
+
+    def __init__(self, order_id, owner, token_id, side, ticks, size, expiration, order_type, created_at):
+        self.order_id = order_id
+        self.owner = owner
+        self.token_id = token_id
+        self.side = side
+        self.ticks = ticks
+        self.original_size = size
+        self.remaining = size
+        self.expiration = expiration
+        self.order_type = order_type
+        self.status = "LIVE"
+        self.created_at = created_at
+
+    def to_dict(self, market=""):
+        """Returns the order in the shape of the `/data/orders` API."""
+        return {
+            "id": self.order_id,
+            "status": self.status,
+            "owner": self.owner,
+            "market": market,
+            "asset_id": self.token_id,
+            "side": self.side,
+            "original_size": f"{self.original_size:.6f}",
+            "size_matched": f"{self.original_size - self.remaining:.6f}",
+            "price": str(self.ticks / PRICE_SCALE),
+            "expiration": str(self.expiration),
+            "order_type": self.order_type,
+            "created_at": self.created_at,
+        }
+
+
+class TokenBook:
+    """Bid and ask levels of a single token.
+
+    Each side maps integer price ticks to a FIFO queue of orders plus the
+    aggregate live size at that level; the active ticks are kept sorted so the
+    best level and FOK depth walks are cheap.
+    """
+    __slots__ = ("token_id", "market", "tick_size", "neg_risk", "levels", "prices")
+
+    def __init__(self, token_id, market="", tick_size="0.01", neg_risk=False):
+        self.token_id = token_id
+        self.market = market
+        self.tick_size = tick_size
+        self.neg_risk = neg_risk
+        self.levels = {BUY: {}, SELL: {}}  # ticks -> [deque of orders, live size]
+        self.prices = {BUY: [], SELL: []}  # sorted ascending
+
+    def best(self, side):
+        prices = self.prices[side]
+        if not prices:
+            return None
+        return prices[-1] if side == BUY else prices[0]
+
+    def add(self, order):
+        levels = self.levels[order.side]
+        level = levels.get(order.ticks)
+        if level is None:
+            level = levels[order.ticks] = [deque(), 0.0]
+            bisect.insort(self.prices[order.side], order.ticks)
+        level[0].append(order)
+        level[1] += order.remaining
+
+    def remove_level(self, side, ticks):
+        del self.levels[side][ticks]
+        prices = self.prices[side]
+        del prices[bisect.bisect_left(prices, ticks)]
+
+    def snapshot(self, timestamp_ms):
+        """Returns the book in the shape of the `/book` API (bids ascending, asks descending)."""
+        def side_levels(side, ordered):
+            return [{"price": str(t / PRICE_SCALE), "size": f"{self.levels[side][t][1]:.2f}"} for t in ordered]
+        return {
+            "market": self.market,
+            "asset_id": self.token_id,
+            "timestamp": str(timestamp_ms),
+            "hash": "",
+            "bids": side_levels(BUY, self.prices[BUY]),
+            "asks": side_levels(SELL, reversed(self.prices[SELL])),
+            "min_order_size": "5",
+            "tick_size": self.tick_size,
+            "neg_risk": self.neg_risk,
+            "last_trade_price": "",
+        }
+
+
+class MatchingEngine:
+    """Price-time-priority matching engine for many tokens.
+
+    Not thread safe on its own; `StubServer` serialises access with a lock.
+    GTD orders are expired lazily from a heap before each submission.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.books = {}
+        self.orders = {}
+        self.open_by_owner = {}
+        self.trades = deque(maxlen=100000)
+        self.trades_by_owner = {}  # owner -> trades in match order, for /data/trades
+        self.trade_times_by_owner = {}  # owner -> whole-second match times of those trades, for bisecting
+        self._expirations = []
+        self._ids = itertools.count(1)
+        self._trade_ids = itertools.count(1)
+
+    def book(self, token_id):
+        book = self.books.get(token_id)
+        if book is None:
+            book = self.books[token_id] = TokenBook(token_id)
+        return book
+
+    def submit(self, owner, token_id, side, price, size, order_type="GTC", expiration=0):
+        """Matches a new order and rests any GTC/GTD remainder.
+
+        Returns the order and the list of trades it generated. FOK orders that
+        cannot be filled completely are rejected without touching the book.
+        """
+        now = self.clock()
+        if self._expirations and self._expirations[0][0] <= now:
+            self.expire(now)
+        book = self.book(token_id)
+        tick = float(book.tick_size)
+        if price < tick - 1e-9 or price > 1 - tick + 1e-9:
+            raise OrderRejected(f"invalid price ({price}), min: {tick} - max: {1 - tick}")
+        if size <= 0:
+            raise OrderRejected("invalid order size")
+        if order_type == "GTD" and expiration and expiration <= now:
+            raise OrderRejected("invalid expiration")
+        ticks = int(round(price * PRICE_SCALE))
+        if order_type == "FOK" and self._fillable(book, side, ticks, size) + 1e-9 < size:
+            raise OrderRejected("order couldn't be fully filled. FOK orders are fully filled or killed.")
+        order = RestingOrder(f"0x{next(self._ids):064x}", owner, token_id, side, ticks, size,
+                             int(expiration or 0), order_type, int(now))
+        self.orders[order.order_id] = order
+        trades = self._match(book, order, now)
+        if order.remaining > 1e-9 and order_type in ("GTC", "GTD"):
+            book.add(order)
+            self.open_by_owner.setdefault(owner, {})[order.order_id] = order
+            if order.expiration:
+                heapq.heappush(self._expirations, (order.expiration, order.order_id))
+        else:
+            order.status = "MATCHED" if order.remaining <= 1e-9 else ("CANCELED" if trades else "UNMATCHED")
+        return order, trades
+
+    def _fillable(self, book, side, ticks, size):
+        opposite = SELL if side == BUY else BUY
+        prices = book.prices[opposite]
+        ordered = prices if side == BUY else reversed(prices)
+        levels = book.levels[opposite]
+        total = 0.0
+        for level_ticks in ordered:
+            if (side == BUY and level_ticks > ticks) or (side == SELL and level_ticks < ticks):
+                break
+            total += levels[level_ticks][1]
+            if total >= size:
+                break
+        return total
+
+    def _match(self, book, order, now):
+        trades = []
+        opposite = SELL if order.side == BUY else BUY
+        levels = book.levels[opposite]
+        while order.remaining > 1e-9:
+            best = book.best(opposite)
+            if best is None or (order.side == BUY and best > order.ticks) or (order.side == SELL and best < order.ticks):
+                break
+            level = levels[best]
+            queue = level[0]
+            while queue and order.remaining > 1e-9:
+                maker = queue[0]
+                if maker.status != "LIVE":
+                    queue.popleft()
+                    continue
+                fill = maker.remaining if maker.remaining < order.remaining else order.remaining
+                maker.remaining -= fill
+                order.remaining -= fill
+                level[1] -= fill
+                trades.append((f"{next(self._trade_ids)}", book.token_id, order.order_id, maker.order_id,
+                               order.owner, maker.owner, order.side, best, fill, now))
+                if maker.remaining <= 1e-9:
+                    maker.status = "MATCHED"
+                    queue.popleft()
+                    self.open_by_owner.get(maker.owner, {}).pop(maker.order_id, None)
+            if not queue or level[1] <= 1e-9:
+                book.remove_level(opposite, best)
+        self.trades.extend(trades)
+        for trade in trades:
+            for owner in {trade[4], trade[5]} - {SEED_OWNER}:
+                self.trades_by_owner.setdefault(owner, []).append(trade)
+                self.trade_times_by_owner.setdefault(owner, []).append(int(trade[9]))
+        return trades
+
+    def cancel(self, order_id, owner=None):
+        """Cancels a live order. Returns False if it is unknown, not live or owned by someone else."""
+        order = self.orders.get(order_id)
+        if order is None or order.status != "LIVE" or (owner is not None and order.owner != owner):
+            return False
+        self._retire(order, "CANCELED")
+        return True
+
+    def cancel_all(self, owner, market="", asset_id=""):
+        """Cancels every live order of owner, optionally restricted to a market or token."""
+        canceled = []
+        for order in list(self.open_by_owner.get(owner, {}).values()):
+            if asset_id and order.token_id != asset_id:
+                continue
+            if market and self.book(order.token_id).market != market:
+                continue
+            self._retire(order, "CANCELED")
+            canceled.append(order.order_id)
+        return canceled
+
+    def expire(self, now):
+        """Expires every GTD order whose expiration is at or before now."""
+        expired = 0
+        while self._expirations and self._expirations[0][0] <= now:
+            _, order_id = heapq.heappop(self._expirations)
+            order = self.orders.get(order_id)
+            if order is not None and order.status == "LIVE":
+                self._retire(order, "EXPIRED")
+                expired += 1
+        return expired
+
+    def _retire(self, order, status):
+        order.status = status
+        self.open_by_owner.get(order.owner, {}).pop(order.order_id, None)
+        book = self.books[order.token_id]
+        level = book.levels[order.side].get(order.ticks)
+        if level is not None:
+            # Dead orders stay queued and are skipped lazily during matching.
+            level[1] -= order.remaining
+            if level[1] <= 1e-9:
+                book.remove_level(order.side, order.ticks)
+
+    def open_orders(self, owner, order_id="", market="", asset_id=""):
+        result = []
+        for order in self.open_by_owner.get(owner, {}).values():
+            if order_id and order.order_id != order_id:
+                continue
+            if asset_id and order.token_id != asset_id:
+                continue
+            book = self.books[order.token_id]
+            if market and book.market != market:
+                continue
+            result.append(order.to_dict(book.market))
+        return result
+
+    def seed_from_snapshot(self, snapshot, owner=SEED_OWNER):
+        """Loads the levels of a recorded `/book` snapshot as resting liquidity of owner."""
+        token_id = snapshot["asset_id"]
+        book = self.book(token_id)
+        book.market = snapshot.get("market") or book.market
+        book.tick_size = str(snapshot.get("tick_size") or book.tick_size)
+        book.neg_risk = bool(snapshot.get("neg_risk"))
+        self.cancel_all(owner, asset_id=token_id)
+        for side, key in ((BUY, "bids"), (SELL, "asks")):
+            for level in snapshot.get(key) or []:
+                self.submit(owner, token_id, side, float(level["price"]), float(level["size"]), "GTC")
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """Serves the ClobClient REST surface from the server's matching engine."""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, payload, status=200):
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else None
+
+    def _owner(self):
+        return self.headers.get("POLY_API_KEY") or self.headers.get("POLY_ADDRESS") or "anonymous"
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        try:
+            body = self._body()
+            with self.server.lock:
+                payload = self.server.handle(method, url.path, query, body, self._owner())
+            if payload is None:
+                self._send({"error": f"{method} {url.path} not found"}, 404)
+            else:
+                self._send(payload)
+        except OrderRejected as e:
+            self._send({"error": str(e)}, 400)
+        except (KeyError, ValueError, TypeError) as e:
+            self._send({"error": f"bad request: {e}"}, 400)
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded HTTP server answering ClobClient requests from a `MatchingEngine`."""
+    daemon_threads = True
+
+    def __init__(self, port=0, engine=None, markets=None):
+        super().__init__(("127.0.0.1", port), StubRequestHandler)
+        self.engine = engine or MatchingEngine()
+        self.markets = markets or []
+        self.lock = threading.Lock()
+        self.request_count = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        """Serves requests on a daemon thread and returns the thread."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def _post(self, owner, item, in_batch=False):
+        token_id, side, price, size, expiration = decode_signed_order(item["order"])
+        order_type = item.get("orderType") or "GTC"
+        if item.get("postOnly"):
+            best = self.engine.book(token_id).best(SELL if side == BUY else BUY)
+            ticks = int(round(price * PRICE_SCALE))
+            if best is not None and ((side == BUY and best <= ticks) or (side == SELL and best >= ticks)):
+                raise OrderRejected("invalid post-only order: order crosses book")
+        try:
+            order, trades = self.engine.submit(owner, token_id, side, price, size, order_type, expiration)
+        except OrderRejected as e:
+            if in_batch:
+                return {"success": False, "errorMsg": str(e), "orderID": "", "status": "unmatched"}
+            raise
+        filled = sum(t[8] for t in trades)
+        notional = sum(t[8] * t[7] / PRICE_SCALE for t in trades)
+        making, taking = (notional, filled) if side == BUY else (filled, notional)
+        return {
+            "success": True,
+            "errorMsg": "",
+            "orderID": order.order_id,
+            "transactionsHashes": [],
+            "status": "live" if order.status == "LIVE" else order.status.lower(),
+            "makingAmount": f"{making:.6f}",
+            "takingAmount": f"{taking:.6f}",
+        }
+
+    def _cancel(self, owner, order_ids):
+        canceled, not_canceled = [], {}
+        for order_id in order_ids:
+            if self.engine.cancel(order_id, owner):
+                canceled.append(order_id)
+            else:
+                not_canceled[order_id] = "order can't be found - already canceled or matched"
+        return {"canceled": canceled, "not_canceled": not_canceled}
+
+    def _trade_record(self, trade, owner):
+        trade_id, token_id, taker_order, maker_order, taker_owner, maker_owner, side, ticks, size, when = trade
+        price = str(ticks / PRICE_SCALE)
+        return {
+            "id": trade_id, "taker_order_id": taker_order, "market": self.engine.book(token_id).market,
+            "asset_id": token_id, "side": side, "size": f"{size:.6f}", "fee_rate_bps": "0", "price": price,
+            "status": "MATCHED", "match_time": str(int(when)), "last_update": str(int(when)), "outcome": "",
+            "owner": taker_owner, "maker_address": "", "transaction_hash": "", "bucket_index": 0, "type": "TRADE",
+            "trader_side": "TAKER" if owner == taker_owner else "MAKER",
+            "maker_orders": [{"order_id": maker_order, "owner": maker_owner, "maker_address": "",
+                              "matched_amount": f"{size:.6f}", "price": price, "fee_rate_bps": "0",
+                              "asset_id": token_id, "outcome": "", "side": SELL if side == BUY else BUY}],
+        }
+
+    def _trades(self, owner, query):
+        """One page of owner's trades, oldest first, with base64 offset cursors like the real API."""
+        trades = self.engine.trades_by_owner.get(owner, [])
+        times = self.engine.trade_times_by_owner.get(owner, [])
+        lo, hi = 0, len(trades)
+        if query.get("after"):
+            lo = bisect.bisect_right(times, int(query["after"]))
+        if query.get("before"):
+            hi = bisect.bisect_left(times, int(query["before"]))
+        trades = trades[lo:max(lo, hi)]
+        if query.get("asset_id"):
+            trades = [t for t in trades if t[1] == query["asset_id"]]
+        if query.get("market"):
+            trades = [t for t in trades if self.engine.book(t[1]).market == query["market"]]
+        if query.get("id"):
+            trades = [t for t in trades if t[0] == query["id"]]
+        offset = int(base64.b64decode(query.get("next_cursor") or "MA==").decode())
+        page = trades[offset:offset + TRADES_PAGE_SIZE]
+        end = offset + len(page)
+        cursor = base64.b64encode(str(end).encode()).decode() if end < len(trades) else END_CURSOR
+        data = [self._trade_record(t, owner) for t in page]
+        return {"data": data, "next_cursor": cursor, "limit": TRADES_PAGE_SIZE, "count": len(data)}
+
+    def handle(self, method, path, query, body, owner):
+        """Routes one request to the engine. Returns None for unknown paths."""
+        self.request_count += 1
+        engine = self.engine
+        if method == "GET":
+            if path == "/":
+                return "OK"
+            if path == "/time":
+                return int(engine.clock())
+            if path == "/book":
+                engine.expire(engine.clock())
+                return engine.book(query["token_id"]).snapshot(int(engine.clock() * 1000))
+            if path == "/tick-size":
+                return {"minimum_tick_size": float(engine.book(query["token_id"]).tick_size)}
+            if path == "/neg-risk":
+                return {"neg_risk": engine.book(query["token_id"]).neg_risk}
+            if path == "/fee-rate":
+                return {"base_fee": 0}
+            if path == "/data/orders":
+                engine.expire(engine.clock())
+                data = engine.open_orders(owner, query.get("id", ""), query.get("market", ""), query.get("asset_id", ""))
+                return {"data": data, "next_cursor": END_CURSOR, "limit": len(data), "count": len(data)}
+            if path.startswith("/data/order/"):
+                order = engine.orders.get(path[len("/data/order/"):])
+                return order.to_dict(engine.book(order.token_id).market) if order else {}
+            if path == "/data/trades":
+                return self._trades(owner, query)
+            if path in ("/sampling-markets", "/markets"):
+                return {"data": self.markets, "next_cursor": END_CURSOR, "limit": len(self.markets), "count": len(self.markets)}
+            if path.startswith("/markets/"):
+                condition_id = path[len("/markets/"):]
+                return next((m for m in self.markets if m.get("condition_id") == condition_id), {})
+        elif method == "POST":
+            if path == "/books":
+                now_ms = int(engine.clock() * 1000)
+                return [engine.book(p["token_id"]).snapshot(now_ms) for p in body]
+            if path == "/order":
+                return self._post(owner, body)
+            if path == "/orders":
+                return [self._post(owner, item, in_batch=True) for item in body]
+        elif method == "DELETE":
+            if path == "/order":
+                return self._cancel(owner, [body["orderID"]])
+            if path == "/orders":
+                return self._cancel(owner, body)
+            if path == "/cancel-all":
+                return {"canceled": engine.cancel_all(owner), "not_canceled": {}}
+            if path == "/cancel-market-orders":
+                body = body or {}
+                return {"canceled": engine.cancel_all(owner, body.get("market", ""), body.get("asset_id", "")), "not_canceled": {}}
+        return None
+
+
+def start_stub_server(port=0, snapshots=None):
+    """Starts a stub server on a background thread, seeded with the latest snapshot per token."""
+    server = StubServer(port)
+    latest = {}
+    for snapshot in snapshots or []:
+        latest[snapshot["asset_id"]] = snapshot
+    for snapshot in latest.values():
+        server.engine.seed_from_snapshot(snapshot)
+    server.start()
+    return server
+
+
+if __name__ == "__main__":
+    from backtest import load_book_snapshots
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8080
+    snapshots = load_book_snapshots(sys.argv[2]) if len(sys.argv) > 2 else []
+    server = start_stub_server(port, snapshots)
+    print(f"CLOB stub listening on {server.url} with {len(server.engine.books)} seeded book(s). Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,150 @@
+"""Server clock: offset and round-trip measurement against the CLOB time endpoint.
+
+The exchange decides whether a GTD order has expired and when a market opens
+by its own clock. Each `ServerClock.sync` brackets that clock:
+
+- `get_server_time` returns whole seconds, so a sample sent at local time
+  `sent` and answered at `received` with `server` bounds the offset to
+  `[server - received, server + 1 - sent]`;
+- samples are spread over a little more than one second, so one of them
+  straddles a second boundary. Intersecting their bounds narrows the offset
+  to roughly the sample spacing plus half the round trip;
+- a few more samples are then aimed at the next predicted second boundary,
+  each halving the remaining uncertainty until the round trip dominates;
+- successive syncs are smoothed with an exponential average, and the change
+  of the measured offset over at least DRIFT_MIN_SECONDS is reported as drift.
+
+`now()` is then the local clock corrected to server time. `expiration()`
+builds GTD expirations from it, padded only by the measured uncertainty on
+top of the exchange's one-minute GTD security threshold.
+"""
+import math
+import threading
+import time
+from datetime import datetime
+
+GTD_SECURITY_SECONDS = 60  # the exchange rejects GTD orders expiring less than a minute out
+SYNC_SAMPLES = 8
+REFINE_SAMPLES = 3
+SMOOTHING = 0.3
+DRIFT_MIN_SECONDS = 60
+
+
+class ServerClock:
+    """Smoothed estimate of the server clock relative to the local clock."""
+
+    def __init__(self, client, samples=SYNC_SAMPLES, refine=REFINE_SAMPLES, smoothing=SMOOTHING):
+        self.client = client
+        self.samples = samples
+        self.refine = refine
+        self.smoothing = smoothing
+        self.offset = 0.0  # server minus local, seconds
+        self.uncertainty = None
+        self.rtt = None
+        self.drift = 0.0  # change of the measured offset, seconds per hour
+        self.synced_at = None
+        self.syncs = 0
+        self.last_error = None
+        self._measured = None
+        self.lock = threading.Lock()
+
+    def _sample(self):
+        sent = time.time()
+        server = float(self.client.get_server_time())
+        received = time.time()
+        resolution = 1.0 if server.is_integer() else 0.001
+        return server - received, server + resolution - sent, received - sent
+
+    def measure(self):
+        """Samples the server time and returns (offset, uncertainty, min rtt) in seconds."""
+        low, high = -math.inf, math.inf
+        last = None
+        rtts = []
+
+        def add(sample):
+            nonlocal low, high, last
+            last = sample
+            rtts.append(sample[2])
+            low, high = max(low, sample[0]), min(high, sample[1])
+
+        for i in range(self.samples):
+            add(self._sample())
+            if i + 1 < self.samples:
+                time.sleep(1.0 / (self.samples - 1))
+        for _ in range(self.refine):
+            if low > high or high - low <= min(rtts):
+                break
+            # Arrive at the server when the current estimate says its next second starts.
+            offset = (low + high) / 2
+            boundary = math.floor(time.time() + offset) + 1
+            time.sleep(max(0.0, boundary - offset - min(rtts) / 2 - time.time()))
+            add(self._sample())
+        if low > high:
+            # A clock stepped during the measurement; only the last sample is consistent.
+            low, high = last[0], last[1]
+        return (low + high) / 2, (high - low) / 2, min(rtts)
+
+    def sync(self):
+        """Measures the offset and folds it into the smoothed estimate; returns the metrics."""
+        offset, uncertainty, rtt = self.measure()
+        now = time.monotonic()
+        with self.lock:
+            if self._measured is None:
+                self._measured = (offset, now)
+            elif now - self._measured[1] >= DRIFT_MIN_SECONDS:
+                previous_offset, previous_at = self._measured
+                self.drift = (offset - previous_offset) / ((now - previous_at) / 3600)
+                self._measured = (offset, now)
+            if self.synced_at is None:
+                self.offset = offset
+            else:
+                self.offset += self.smoothing * (offset - self.offset)
+            self.uncertainty = uncertainty
+            self.rtt = rtt
+            self.synced_at = now
+            self.syncs += 1
+        return self.metrics()
+
+    def run(self, interval, stop_event, on_error=None):
+        """Re-syncs every interval seconds until stop_event is set."""
+        while not stop_event.is_set():
+            try:
+                self.sync()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                if on_error is None:
+                    raise
+                on_error(e)
+            stop_event.wait(interval)
+
+    def now(self):
+        """Current server time as a Unix timestamp."""
+        return time.time() + self.offset
+
+    def now_datetime(self):
+        """Current server time as a naive local datetime, comparable with schedule times."""
+        return datetime.fromtimestamp(self.now())
+
+    def seconds_until(self, when):
+        """Seconds of server time until when (a naive local datetime or a Unix timestamp)."""
+        target = when.timestamp() if isinstance(when, datetime) else when
+        return target - self.now()
+
+    def expiration(self, seconds):
+        """GTD expiration for an order that should live `seconds` on the server."""
+        padding = self.uncertainty if self.uncertainty is not None else 0.0
+        return int(math.ceil(self.now() + GTD_SECURITY_SECONDS + seconds + padding))
+
+    def metrics(self):
+        """Offset, uncertainty, round trip and drift in milliseconds, plus sync age and count."""
+        def ms(value):
+            return None if value is None else round(value * 1000, 3)
+        return {
+            "offset_ms": ms(self.offset),
+            "uncertainty_ms": ms(self.uncertainty),
+            "rtt_ms": ms(self.rtt),
+            "drift_ms_per_hour": ms(self.drift),
+            "synced_ago_s": None if self.synced_at is None else round(time.monotonic() - self.synced_at, 1),
+            "syncs": self.syncs,
+        }
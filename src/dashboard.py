@@ -0,0 +1,304 @@
+"""Live terminal dashboard: book depth, scheduled tasks, open orders and fills.
+
+The menus redraw by clearing the screen (a shell spawn) and reprinting every
+line, which flickers and cannot refresh continuously. `Dashboard` renders with
+curses on its own thread instead:
+
+- every frame is composed as rows of (text, color) segments from the
+  panels' data sources, which only take short snapshots of shared state, so order
+  threads never wait on the UI;
+- `ScreenDiff` compares each row with what is already on screen and writes
+  only the changed span of cells; unchanged rows cost nothing;
+- the loop runs at `hz` frames per second and reads keys between frames, so
+  input never stalls rendering and rendering never stalls the caller.
+
+`curses` ships with Python on Linux and macOS; on Windows it needs the
+`windows-curses` package.
+"""
+import threading
+import time
+from datetime import datetime
+
+try:
+    import curses
+except ImportError:
+    curses = None
+
+DEFAULT_HZ = 10
+BOOK_WIDTH = 38
+PLAIN, TITLE, BID, ASK, WARN = range(5)
+
+
+def _cells(segments, width):
+    # A row as two width-long strings: its characters and one color code per cell.
+    text = "".join(t for t, _ in segments)[:width].ljust(width)
+    colors = "".join(chr(c) * len(t) for t, c in segments)[:width].ljust(width, chr(PLAIN))
+    return text, colors
+
+
+class ScreenDiff:
+    """Cells currently on screen; turns a new frame into the spans of cells that changed."""
+
+    def __init__(self):
+        self.rows = []
+        self.width = None
+
+    def reset(self):
+        self.rows = []
+
+    def changes(self, frame, width):
+        """Yields (y, x, text, color) spans that differ from the previous frame, and remembers frame.
+
+        frame is a list of rows, each a list of (text, color) segments.
+        """
+        if width != self.width:
+            self.rows, self.width = [], width
+        previous = self.rows
+        blank = (" " * width, chr(PLAIN) * width)
+        rows = [_cells(segments, width) for segments in frame]
+        # Rows below a shorter frame are blanked.
+        rows += [blank] * max(0, len(previous) - len(rows))
+        for y, (text, colors) in enumerate(rows):
+            old = previous[y] if y < len(previous) else None
+            if old == (text, colors):
+                continue
+            start, end = 0, width
+            if old is not None:
+                while text[start] == old[0][start] and colors[start] == old[1][start]:
+                    start += 1
+                while text[end - 1] == old[0][end - 1] and colors[end - 1] == old[1][end - 1]:
+                    end -= 1
+            # One span per run of equal color.
+            x = start
+            while x < end:
+                run = x + 1
+                while run < end and colors[run] == colors[x]:
+                    run += 1
+                yield y, x, text[x:run], ord(colors[x])
+                x = run
+        self.rows = rows
+
+
+def book_panel(view, rows):
+    """Depth ladder of one BookView: asks above the spread, bids below, best prices in the middle."""
+    if view is None:
+        return [("Waiting for book...", WARN)]
+    half = max(1, (rows - 3) // 2)
+    lines = [(f"{'Price':>8} {'Size':>12} {'Cum':>12}", TITLE)]
+    asks = view.asks[:half]
+    cumulative = [sum(size for _, size in asks[:i + 1]) for i in range(len(asks))]
+    lines.extend([("", PLAIN)] * (half - len(asks)))
+    for (price, size), cum in reversed(list(zip(asks, cumulative))):
+        lines.append((f"{price:>8.3f} {size:>12.2f} {cum:>12.2f}", ASK))
+    spread = f"{view.spread:.3f}" if view.spread is not None else "-"
+    mid = f"{view.mid:.4f}" if view.mid is not None else "-"
+    lines.append((f"  spread {spread}  mid {mid}", PLAIN))
+    cum = 0.0
+    for price, size in view.bids[:half]:
+        cum += size
+        lines.append((f"{price:>8.3f} {size:>12.2f} {cum:>12.2f}", BID))
+    return lines
+
+
+def watch_panel(views, selected):
+    """One line per watched token: best bid/ask and book age; the selected token is marked."""
+    lines = [(f"  {'Token':<14} {'Bid':>6} {'Ask':>6} {'Age':>6}", TITLE)]
+    now = time.monotonic()
+    for token_id, view in views:
+        mark = ">" if token_id == selected else " "
+        if view is None:
+            lines.append((f"{mark} {token_id[:12] + '..':<14} {'-':>6} {'-':>6} {'-':>6}", WARN))
+            continue
+        bid = f"{view.best_bid:.3f}" if view.best_bid is not None else "-"
+        ask = f"{view.best_ask:.3f}" if view.best_ask is not None else "-"
+        lines.append((f"{mark} {token_id[:12] + '..':<14} {bid:>6} {ask:>6} {now - view.received_at:>5.1f}s", PLAIN))
+    return lines
+
+
+def task_panel(tasks, now):
+    """Pending scheduled tasks with a countdown; tasks are (scheduled datetime, task dict, flags) in time order."""
+    lines = [(f"{'Due':<19} {'In':>9} {'Token':<14} {'Type':<7} {'Side':<4} {'Flags'}", TITLE)]
+    for scheduled, task, flags in tasks:
+        seconds = (scheduled - now).total_seconds()
+        due_in = f"{seconds:>8.1f}s" if seconds < 3600 else f"{seconds / 3600:>8.1f}h"
+        lines.append((f"{scheduled:%Y-%m-%d %H:%M:%S} {due_in} {task.get('token_id', '')[:12] + '..':<14} "
+                      f"{task.get('order_type', ''):<7} {task.get('side') or 'BUY':<4} {flags}",
+                      WARN if seconds < 0 else PLAIN))
+    if not tasks:
+        lines.append(("No pending tasks.", PLAIN))
+    return lines
+
+
+def order_panel(orders):
+    """Open orders from an OrderStore."""
+    lines = [(f"{'Order ID':<16} {'Token':<14} {'Side':<4} {'Price':>6} {'Size':>10} {'Matched':>10}", TITLE)]
+    for o in orders:
+        lines.append((f"{o.order_id[:14] + '..':<16} {o.token_id[:12] + '..':<14} {o.side:<4} {o.price:>6.3f} "
+                      f"{o.size:>10.2f} {o.size_matched:>10.2f}", BID if o.side == "BUY" else ASK))
+    if not orders:
+        lines.append(("No open orders.", PLAIN))
+    return lines
+
+
+def fill_panel(orders):
+    """Orders with matched size, most recently updated first."""
+    lines = [(f"{'Time':<8} {'Token':<14} {'Side':<4} {'Price':>6} {'Filled':>10} {'Status'}", TITLE)]
+    for o in orders:
+        lines.append((f"{datetime.fromtimestamp(o.updated_at):%H:%M:%S} {o.token_id[:12] + '..':<14} {o.side:<4} "
+                      f"{o.price:>6.3f} {o.size_matched:>10.2f} {o.status}", BID if o.side == "BUY" else ASK))
+    if not orders:
+        lines.append(("No fills yet.", PLAIN))
+    return lines
+
+
+def recent_fills(stores, limit):
+    """The `limit` most recently updated orders of stores with any matched size."""
+    filled = []
+    for store in stores:
+        with store.lock:
+            filled += [o for o in store.orders.values() if o.size_matched > 0]
+    return sorted(filled, key=lambda o: o.updated_at, reverse=True)[:limit]
+
+
+class Dashboard:
+    """Renders book, task, order and fill panels with curses on a background thread.
+
+    books is a BookCache, tokens a callable returning the watched token IDs,
+    tasks a callable returning pending (scheduled datetime, task, flags), stores
+    the OrderStores of every account and now a callable returning the current (server) time as a
+    naive datetime.
+    """
+
+    def __init__(self, books, tokens, tasks, stores, now=datetime.now, hz=DEFAULT_HZ):
+        self.books = books
+        self.tokens = tokens
+        self.tasks = tasks
+        self.stores = list(stores)
+        self.now = now
+        self.hz = hz
+        self.selected = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.error = None
+        self.frames = 0
+        self.cells = 0
+        self.started_at = None
+        self.diff = ScreenDiff()
+
+    # -- Composition ------------------------------------------------------
+
+    def compose(self, width, height):
+        """Builds one frame: at most height rows, each a list of (text, color) segments."""
+        tokens = list(self.tokens())
+        selected = tokens[self.selected % len(tokens)] if tokens else None
+        views = [(t, self.books.get(t)) for t in tokens]
+        elapsed = time.monotonic() - self.started_at if self.started_at is not None else 0.0
+        fps = self.frames / elapsed if elapsed > 0 else 0.0
+        title = (f" PolyBot live | {self.now():%Y-%m-%d %H:%M:%S} | {fps:.1f} Hz | {self.cells} cells redrawn"
+                 f" | n/p: token  q: quit")
+        frame = [[(title, TITLE)]]
+
+        body = height - 1
+        book_rows = body // 2
+        left = [(f"Book {selected[:16] + '..' if selected else '-'}", TITLE)]
+        left += book_panel(self.books.get(selected) if selected else None, book_rows - 1)
+        left += [("", PLAIN)] + watch_panel(views, selected)
+        right = [("Scheduled tasks", TITLE)] + task_panel(self.tasks(), self.now())[:book_rows - 1]
+        rows = max(len(left), len(right))
+        left_width = min(BOOK_WIDTH, width // 2)
+        for i in range(min(rows, body)):
+            l_text, l_color = left[i] if i < len(left) else ("", PLAIN)
+            r_text, r_color = right[i] if i < len(right) else ("", PLAIN)
+            frame.append([(l_text[:left_width].ljust(left_width), l_color), (" | ", PLAIN), (r_text, r_color)])
+
+        remaining = height - len(frame)
+        if remaining > 2:
+            orders = sorted((o for store in self.stores for o in store.open_orders()), key=lambda o: (o.token_id, o.side, -o.price))
+            lower = [("Open orders", TITLE)] + order_panel(orders)[:max(2, remaining // 2 - 1)]
+            lower += [("Recent fills", TITLE)] + fill_panel(recent_fills(self.stores, max(1, remaining // 2)))
+            frame.extend([line] for line in lower[:remaining])
+        return frame[:height]
+
+    # -- Rendering --------------------------------------------------------
+
+    def _colors(self):
+        curses.start_color()
+        curses.use_default_colors()
+        pairs = {TITLE: curses.COLOR_CYAN, BID: curses.COLOR_GREEN, ASK: curses.COLOR_RED, WARN: curses.COLOR_YELLOW}
+        attrs = {PLAIN: curses.A_NORMAL}
+        for color, fg in pairs.items():
+            curses.init_pair(color, fg, -1)
+            attrs[color] = curses.color_pair(color)
+        attrs[TITLE] |= curses.A_BOLD
+        return attrs
+
+    def _handle_key(self, key):
+        if key in (ord("q"), ord("Q"), 27):
+            self.stop_event.set()
+        elif key in (ord("n"), curses.KEY_DOWN, 9):
+            self.selected += 1
+        elif key in (ord("p"), curses.KEY_UP):
+            self.selected -= 1
+        elif key == curses.KEY_RESIZE:
+            self.diff.reset()
+            self.screen.clear()
+
+    def _loop(self, screen):
+        self.screen = screen
+        curses.curs_set(0)
+        attrs = self._colors() if curses.has_colors() else None
+        interval = 1.0 / self.hz
+        self.started_at = time.monotonic()
+        while not self.stop_event.is_set():
+            started = time.perf_counter()
+            height, width = screen.getmaxyx()
+            written = 0
+            for y, x, text, color in self.diff.changes(self.compose(width, height), width):
+                # The bottom-right cell cannot be written without scrolling.
+                if y == height - 1 and x + len(text) >= width:
+                    text = text[:width - 1 - x]
+                try:
+                    screen.addstr(y, x, text, attrs[color] if attrs else curses.A_NORMAL)
+                except curses.error:
+                    pass
+                written += len(text)
+            screen.refresh()
+            self.frames += 1
+            self.cells = written
+            # Waiting for a key is the frame pacing.
+            screen.timeout(max(0, int((interval - (time.perf_counter() - started)) * 1000)))
+            key = screen.getch()
+            if key != -1:
+                self._handle_key(key)
+
+    def _run(self):
+        try:
+            curses.wrapper(self._loop)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.stop_event.set()
+
+    def start(self):
+        """Starts rendering on a background thread; returns immediately."""
+        if curses is None:
+            raise RuntimeError("the live dashboard needs curses (pip install windows-curses on Windows)")
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stops rendering and restores the terminal."""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def wait(self):
+        """Blocks until the user quits the dashboard (q) or Ctrl+C; then stops it."""
+        try:
+            while not self.stop_event.wait(0.5):
+                pass
+        finally:
+            self.stop()
+        if self.error is not None:
+            raise self.error
@@ -0,0 +1,182 @@
+"""Structured event log, written off the order hot path.
+
+Printing a full server response after every order blocks the order loop on
+the terminal: a slow console or a full pipe stalls the next order. With
+`EventLog`, the loop only appends an `Event` to an in-memory ring buffer, and a
+background writer drains the ring every FLUSH_SECONDS to its sinks:
+
+- `JsonlSink` appends one JSON object per event to a file;
+- `ConsoleSink` prints their messages, colored by level (the console is
+  just one more consumer).
+
+The ring is bounded. If the writer falls a full ring behind, the oldest
+events are dropped instead of blocking the emitter, and the drops are counted.
+`flush()` waits until everything emitted so far has been written, e.g.
+before prompting the user.
+"""
+import itertools
+import json
+import sys
+import threading
+import time
+from collections import deque
+
+RING_CAPACITY = 65536
+FLUSH_SECONDS = 0.05
+
+
+class Event:
+    """One logged event: what happened (kind), how bad (level), a message and structured fields."""
+    __slots__ = ("seq", "time", "kind", "level", "message", "fields")
+
+    def __init__(self, seq, time, kind, level, message, fields):
+        self.seq = seq
+        self.time = time
+        self.kind = kind
+        self.level = level
+        self.message = message
+        self.fields = fields
+
+    def dict(self):
+        return {"ts": self.time, "seq": self.seq, "kind": self.kind, "level": self.level, "msg": self.message,
+                **self.fields}
+
+
+class JsonlSink:
+    """Appends events to a JSONL file; the file is flushed once per drained batch."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, events):
+        for event in events:
+            self.file.write(json.dumps(event.dict(), default=str) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ConsoleSink:
+    """Prints each event's message, prefixed per level (e.g. a color code); events without one are skipped."""
+
+    def __init__(self, prefixes=None, suffix="", stream=None):
+        self.prefixes = prefixes or {}
+        self.suffix = suffix
+        self.stream = stream
+
+    def write(self, events):
+        # Resolved per batch, so a redirected sys.stdout is honored.
+        stream = self.stream or sys.stdout
+        for event in events:
+            if event.message:
+                stream.write(self.prefixes.get(event.level, "") + event.message + self.suffix + "\n")
+        stream.flush()
+
+    def close(self):
+        pass
+
+
+class EventLog:
+    """Ring buffer of events drained to sinks by a background writer thread."""
+
+    def __init__(self, sinks=(), capacity=RING_CAPACITY, interval=FLUSH_SECONDS):
+        self.sinks = list(sinks)
+        self.ring = deque(maxlen=capacity)
+        self.interval = interval
+        self._seq = itertools.count(1)
+        self.last_seq = 0
+        self.written_seq = 0
+        self.drained = 0
+        self.dropped = 0
+        self.sink_errors = 0
+        self.last_error = None
+        self.thread = None
+        self.lock = threading.Lock()
+        self.drained_cond = threading.Condition()
+        self.wake = threading.Event()
+        self.stop_event = threading.Event()
+
+    def add_sink(self, sink):
+        with self.lock:
+            self.sinks.append(sink)
+
+    # -- Hot path ---------------------------------------------------------
+
+    def emit(self, kind, message="", level="info", **fields):
+        """Queues an event; never blocks on I/O."""
+        # Numbered and queued together, so the ring stays in order and last_seq never goes back.
+        with self.lock:
+            seq = next(self._seq)
+            self.ring.append(Event(seq, time.time(), kind, level, message, fields))
+            self.last_seq = seq
+        if self.thread is None:
+            self.start()
+
+    # -- Writer -----------------------------------------------------------
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+        return self
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self.ring.popleft())
+            except IndexError:
+                break
+        if batch:
+            with self.lock:
+                sinks = list(self.sinks)
+            for sink in sinks:
+                try:
+                    sink.write(batch)
+                except Exception as e:
+                    self.sink_errors += 1
+                    self.last_error = e
+            self.drained += len(batch)
+            self.written_seq = max(self.written_seq, max(e.seq for e in batch))
+            # Sequence numbers never written were overwritten in the ring.
+            self.dropped = max(0, self.written_seq - self.drained)
+        with self.drained_cond:
+            self.drained_cond.notify_all()
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            self._drain()
+        self._drain()
+
+    def flush(self, timeout=5.0):
+        """Waits until every event emitted so far has been written; returns False on timeout."""
+        target = self.last_seq
+        if self.thread is None or self.written_seq >= target:
+            return True
+        deadline = time.monotonic() + timeout
+        with self.drained_cond:
+            while self.written_seq < target:
+                self.wake.set()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.drained_cond.wait(min(remaining, self.interval))
+        return True
+
+    def close(self):
+        """Writes the remaining events, stops the writer and closes the sinks."""
+        self.stop_event.set()
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join()
+        for sink in self.sinks:
+            sink.close()
+
+    def stats(self):
+        return {"emitted": self.last_seq, "written": self.drained, "pending": len(self.ring),
+                "dropped": self.dropped, "sink_errors": self.sink_errors}
@@ -0,0 +1,188 @@
+"""Per-token market metadata cache: tick size, neg risk flag and fee rate.
+
+Signing an order needs all three. The client looks each one up lazily, and its
+tick sizes expire, so any order can wait on up to three metadata round trips
+before it is posted. `MetadataCache` keeps them off the order path:
+
+- `warm` loads many tokens up front: tick size and neg risk come from batched
+  `get_order_books` requests, fee rates from concurrent lookups;
+- once attached, the client's `get_tick_size`, `get_neg_risk` and
+  `get_fee_rate_bps` are answered from memory. An entry older than the TTL is
+  still returned and refreshed in the background, so only a token that was
+  never warmed costs a request;
+- tick size changes are applied from `tick_size_change` market events, from
+  every book seen by a `BookCache` listener, and from orders rejected for
+  their tick size.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from py_clob_client.clob_types import BookParams
+from books import BOOKS_PER_REQUEST
+
+DEFAULT_TTL = 300.0
+FETCH_WORKERS = 8
+
+
+def _tick_str(tick_size):
+    # Tick sizes are keyed as strings ("0.01"); books and events may carry floats.
+    return str(float(tick_size)) if not isinstance(tick_size, str) else tick_size
+
+
+class TokenMetadata:
+    """Cached metadata for one token."""
+    __slots__ = ("token_id", "tick_size", "neg_risk", "fee_rate_bps", "fetched_at")
+
+    def __init__(self, token_id, tick_size, neg_risk, fee_rate_bps, fetched_at=None):
+        self.token_id = token_id
+        self.tick_size = tick_size
+        self.neg_risk = neg_risk
+        self.fee_rate_bps = fee_rate_bps
+        self.fetched_at = time.monotonic() if fetched_at is None else fetched_at
+
+
+class MetadataCache:
+    """Tick size, neg risk and fee rate per token, shared by every client it is attached to."""
+
+    def __init__(self, client, ttl=DEFAULT_TTL):
+        self.client = client
+        self.ttl = ttl
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.tick_changes = 0
+        self._refreshing = set()
+        self._background = ThreadPoolExecutor(max_workers=1)
+        # The client's own lookups, kept before attach() replaces them.
+        self._get_tick_size = client.get_tick_size
+        self._get_neg_risk = client.get_neg_risk
+        self._get_fee_rate_bps = client.get_fee_rate_bps
+
+    # -- Loading ----------------------------------------------------------
+
+    def _fetch_one(self, token_id):
+        self.client.clear_tick_size_cache(token_id)
+        return TokenMetadata(token_id, self._get_tick_size(token_id), bool(self._get_neg_risk(token_id)),
+                             self._get_fee_rate_bps(token_id))
+
+    def warm(self, token_ids):
+        """Loads metadata for token_ids in bulk and returns the number of tokens cached."""
+        token_ids = [t for t in dict.fromkeys(token_ids) if t]
+        if not token_ids:
+            return 0
+        books = {}
+        for i in range(0, len(token_ids), BOOKS_PER_REQUEST):
+            chunk = token_ids[i:i + BOOKS_PER_REQUEST]
+            for book in self.client.get_order_books([BookParams(token_id=t) for t in chunk]):
+                books[book.asset_id] = book
+        with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(token_ids))) as pool:
+            fees = dict(zip(token_ids, pool.map(self._get_fee_rate_bps, token_ids)))
+            # Tokens missing from the book response are looked up one by one.
+            missing = [t for t in token_ids if t not in books or not books[t].tick_size]
+            fetched = {e.token_id: e for e in pool.map(self._fetch_one, missing)}
+        now = time.monotonic()
+        with self.lock:
+            for token_id in token_ids:
+                entry = fetched.get(token_id)
+                if entry is None:
+                    book = books[token_id]
+                    entry = TokenMetadata(token_id, _tick_str(book.tick_size), bool(book.neg_risk), fees[token_id], now)
+                self.entries[token_id] = entry
+        return len(token_ids)
+
+    def _refresh(self, token_id):
+        try:
+            entry = self._fetch_one(token_id)
+            with self.lock:
+                self.entries[token_id] = entry
+        finally:
+            with self.lock:
+                self._refreshing.discard(token_id)
+
+    def get(self, token_id):
+        """Returns the TokenMetadata of token_id, fetching it only if it was never cached."""
+        entry = self.entries.get(token_id)
+        if entry is None:
+            self.misses += 1
+            entry = self._fetch_one(token_id)
+            with self.lock:
+                self.entries[token_id] = entry
+            return entry
+        self.hits += 1
+        if time.monotonic() - entry.fetched_at > self.ttl:
+            with self.lock:
+                refresh = token_id not in self._refreshing
+                self._refreshing.add(token_id)
+            if refresh:
+                self.stale += 1
+                self._background.submit(self._refresh, token_id)
+        return entry
+
+    def tick_size(self, token_id):
+        return self.get(token_id).tick_size
+
+    def neg_risk(self, token_id):
+        return self.get(token_id).neg_risk
+
+    def fee_rate_bps(self, token_id):
+        return self.get(token_id).fee_rate_bps
+
+    # -- Invalidation -----------------------------------------------------
+
+    def set_tick_size(self, token_id, tick_size):
+        """Applies a new tick size for token_id; returns True if it changed."""
+        tick_size = _tick_str(tick_size)
+        with self.lock:
+            entry = self.entries.get(token_id)
+            if entry is None or entry.tick_size == tick_size:
+                return False
+            entry.tick_size = tick_size
+            self.tick_changes += 1
+        return True
+
+    def on_tick_size_change(self, event):
+        """Handles a market channel `tick_size_change` event ({"asset_id", "new_tick_size", ...})."""
+        return self.set_tick_size(event["asset_id"], event["new_tick_size"])
+
+    def observe_book(self, view):
+        """BookCache listener: picks up tick size changes from every book seen."""
+        if view.tick_size:
+            self.set_tick_size(view.token_id, view.tick_size)
+
+    def invalidate(self, token_id=None):
+        """Drops token_id (or everything), so the next lookup fetches fresh metadata."""
+        with self.lock:
+            if token_id is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(token_id, None)
+
+    # -- Client integration -----------------------------------------------
+
+    def attach(self, client):
+        """Answers client's metadata lookups from this cache.
+
+        A post rejected for its tick size drops the token, so the next order
+        signs with a freshly fetched tick size.
+        """
+        post_order = client.post_order
+
+        def checked_post_order(order, *args, **kwargs):
+            try:
+                return post_order(order, *args, **kwargs)
+            except Exception as e:
+                if "tick" in str(e).lower():
+                    self.invalidate(str(order.dict()["tokenId"]))
+                raise
+
+        client.get_tick_size = self.tick_size
+        client.get_neg_risk = self.neg_risk
+        client.get_fee_rate_bps = self.fee_rate_bps
+        client.post_order = checked_post_order
+        return client
+
+    def stats(self):
+        return {"tokens": len(self.entries), "hits": self.hits, "misses": self.misses, "stale": self.stale,
+                "tick_changes": self.tick_changes}
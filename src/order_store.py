@@ -0,0 +1,287 @@
+"""Local order lifecycle state.
+
+`OrderStore` records every order posted through an attached client from the
+signed order and the post response. Cancel responses and periodic
+`get_orders` polling keep it current. Open orders are indexed by token and
+market, so status views, fill reports and cancel-all are served from memory
+instead of rediscovering orders over the network.
+"""
+import threading
+import time
+from py_clob_client.order_builder.constants import BUY, SELL
+
+TOKEN_DECIMALS = 1e6
+OPEN_STATUSES = ("LIVE", "DELAYED")
+
+
+def decode_signed_order(order):
+    """Converts a signed order payload into (token_id, side, price, size, expiration)."""
+    maker_amount = int(order["makerAmount"]) / TOKEN_DECIMALS
+    taker_amount = int(order["takerAmount"]) / TOKEN_DECIMALS
+    side = order["side"]
+    if side in (0, "0"):
+        side = BUY
+    elif side in (1, "1"):
+        side = SELL
+    if side == BUY:
+        size, price = taker_amount, (maker_amount / taker_amount if taker_amount else 0.0)
+    else:
+        size, price = maker_amount, (taker_amount / maker_amount if maker_amount else 0.0)
+    return str(order["tokenId"]), side, round(price, 4), size, int(order.get("expiration") or 0)
+
+
+class TrackedOrder:
+    """Local view of one order."""
+    __slots__ = ("order_id", "token_id", "market", "side", "price", "size", "size_matched",
+                 "order_type", "expiration", "status", "created_at", "updated_at", "risk_notional")
+
+    def __init__(self, order_id, token_id, side, price, size, order_type, status, market="", expiration=0):
+        self.order_id = order_id
+        self.token_id = token_id
+        self.market = market
+        self.side = side
+        self.price = price
+        self.size = size
+        self.size_matched = 0.0
+        self.order_type = order_type
+        self.expiration = expiration
+        self.status = status
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        # BUY notional this session's risk engine reserved for the order; 0 for orders it never checked.
+        self.risk_notional = 0.0
+
+    @property
+    def is_open(self):
+        return self.status in OPEN_STATUSES
+
+    @property
+    def remaining(self):
+        return max(0.0, self.size - self.size_matched)
+
+
+class OrderStore:
+    """Order state keyed by order ID, with open-order indexes by token and market."""
+
+    def __init__(self):
+        self.orders = {}
+        self.by_token = {}
+        self.by_market = {}
+        self.all_by_token = {}
+        self.lock = threading.RLock()
+        self.last_synced = None
+        self.last_error = None
+
+    # -- Updates ----------------------------------------------------------
+
+    def _index(self, order):
+        if order.is_open:
+            self.by_token.setdefault(order.token_id, set()).add(order.order_id)
+            if order.market:
+                self.by_market.setdefault(order.market, set()).add(order.order_id)
+        else:
+            self.by_token.get(order.token_id, set()).discard(order.order_id)
+            if order.market:
+                self.by_market.get(order.market, set()).discard(order.order_id)
+
+    def _set_status(self, order, status, size_matched=None):
+        if order.market:
+            self.by_market.get(order.market, set()).discard(order.order_id)
+        if size_matched is not None:
+            order.size_matched = size_matched
+        order.status = status
+        order.updated_at = time.time()
+        self._index(order)
+
+    def record_post(self, signed_order, order_type, resp):
+        """Records an order from its signed payload and the `post_order` response."""
+        if not isinstance(resp, dict) or not resp.get("orderID"):
+            return None
+        token_id, side, price, size, expiration = decode_signed_order(signed_order.dict())
+        status = str(resp.get("status") or "live").upper()
+        # Tokens filled on arrival: taken by a BUY, given by a SELL.
+        filled = resp.get("takingAmount") if side == BUY else resp.get("makingAmount")
+        try:
+            size_matched = min(size, float(filled or 0))
+        except (TypeError, ValueError):
+            size_matched = 0.0
+        if status == "MATCHED" and order_type in ("FOK", "FAK"):
+            size_matched = size_matched or size
+        if status == "LIVE" and size_matched >= size:
+            status = "MATCHED"
+        order = TrackedOrder(resp["orderID"], token_id, side, price, size, str(order_type), status, expiration=expiration)
+        order.size_matched = size_matched
+        with self.lock:
+            if order.order_id not in self.orders:
+                self.all_by_token.setdefault(token_id, []).append(order.order_id)
+            self.orders[order.order_id] = order
+            self._index(order)
+        return order
+
+    def record_risk(self, order_id, notional):
+        """Notes the notional a risk check reserved for order_id, so only that much is released when it is replaced."""
+        with self.lock:
+            order = self.orders.get(order_id)
+            if order is not None:
+                order.risk_notional = notional
+
+    def record_cancel(self, resp):
+        """Marks the orders in a cancel response as canceled."""
+        if not isinstance(resp, dict):
+            return
+        with self.lock:
+            for order_id in resp.get("canceled") or []:
+                order = self.orders.get(order_id)
+                if order is not None:
+                    self._set_status(order, "CANCELED")
+
+    def apply(self, record):
+        """Applies an order record from `get_orders` / `get_order`, adding unknown orders."""
+        order_id = record.get("id")
+        if not order_id:
+            return None
+        with self.lock:
+            order = self.orders.get(order_id)
+            if order is None:
+                order = TrackedOrder(order_id, str(record.get("asset_id", "")), record.get("side", ""),
+                                     float(record.get("price") or 0), float(record.get("original_size") or 0),
+                                     record.get("order_type", ""), "", record.get("market", ""),
+                                     int(record.get("expiration") or 0))
+                if record.get("created_at"):
+                    order.created_at = float(record["created_at"])
+                self.orders[order_id] = order
+                self.all_by_token.setdefault(order.token_id, []).append(order_id)
+            elif record.get("market") and not order.market:
+                order.market = record["market"]
+            self._set_status(order, str(record.get("status") or "LIVE").upper(), float(record.get("size_matched") or 0))
+        return order
+
+    def sync(self, client):
+        """Reconciles local state with `get_orders`.
+
+        Orders open locally but missing from the response have left the book;
+        each is looked up once to learn whether it filled or was canceled.
+        """
+        remote = client.get_orders()
+        seen = set()
+        for record in remote:
+            order = self.apply(record)
+            if order is not None:
+                seen.add(order.order_id)
+        with self.lock:
+            vanished = [o.order_id for o in self.orders.values() if o.is_open and o.order_id not in seen]
+        for order_id in vanished:
+            try:
+                record = client.get_order(order_id)
+            except Exception:
+                record = None
+            if record:
+                self.apply(record)
+            with self.lock:
+                order = self.orders[order_id]
+                if order.is_open:
+                    self._set_status(order, "CLOSED")
+        self.last_synced = time.time()
+        return len(remote)
+
+    def poll(self, client, interval, stop_event, on_error=None):
+        """Syncs every interval seconds until stop_event is set."""
+        while not stop_event.is_set():
+            started = time.monotonic()
+            try:
+                self.sync(client)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                if on_error is None:
+                    raise
+                on_error(e)
+            stop_event.wait(max(0.0, interval - (time.monotonic() - started)))
+
+    def attach(self, client):
+        """Wraps the client's post and cancel methods so every call updates the store."""
+        post_order, post_orders = client.post_order, client.post_orders
+        cancel, cancel_orders = client.cancel, client.cancel_orders
+        cancel_all, cancel_market_orders = client.cancel_all, client.cancel_market_orders
+
+        def tracked_post_order(order, orderType="GTC", *args, **kwargs):
+            resp = post_order(order, orderType, *args, **kwargs)
+            self.record_post(order, orderType, resp)
+            return resp
+
+        def tracked_post_orders(args, *rest, **kwargs):
+            resp = post_orders(args, *rest, **kwargs)
+            if isinstance(resp, list):
+                for arg, item in zip(args, resp):
+                    self.record_post(arg.order, arg.orderType, item)
+            return resp
+
+        def tracked(method):
+            def wrapper(*args, **kwargs):
+                resp = method(*args, **kwargs)
+                self.record_cancel(resp)
+                return resp
+            return wrapper
+
+        client.post_order = tracked_post_order
+        client.post_orders = tracked_post_orders
+        client.cancel = tracked(cancel)
+        client.cancel_orders = tracked(cancel_orders)
+        client.cancel_all = tracked(cancel_all)
+        client.cancel_market_orders = tracked(cancel_market_orders)
+        return client
+
+    # -- Queries ----------------------------------------------------------
+
+    def get(self, order_id):
+        return self.orders.get(order_id)
+
+    def open_orders(self, token_id=None, market=None):
+        """Returns open orders, optionally only those of one token or market."""
+        with self.lock:
+            if token_id is not None:
+                ids = self.by_token.get(token_id, ())
+            elif market is not None:
+                ids = self.by_market.get(market, ())
+            else:
+                return [o for o in self.orders.values() if o.is_open]
+            return [self.orders[i] for i in ids]
+
+    def sell_commitment(self, token_id, since):
+        """Tokens of token_id that a balance fetched at since (Unix time) still counts but our SELLs took.
+
+        Open SELLs hold their remaining size; SELLs created at or after since
+        also sold their matched size, which that balance does not reflect yet.
+        """
+        total = 0.0
+        with self.lock:
+            for order_id in self.all_by_token.get(token_id, ()):
+                order = self.orders[order_id]
+                if order.side != SELL:
+                    continue
+                if order.is_open:
+                    total += order.remaining
+                if order.created_at >= since:
+                    total += order.size_matched
+        return total
+
+    def open_order_ids(self, token_id=None, market=None):
+        return [o.order_id for o in self.open_orders(token_id, market)]
+
+    def fill_report(self):
+        """Returns one row per token and side: orders, filled size, average fill price and open size."""
+        rows = {}
+        with self.lock:
+            for order in self.orders.values():
+                row = rows.setdefault((order.token_id, order.side), {
+                    "token_id": order.token_id, "side": order.side, "orders": 0,
+                    "filled": 0.0, "notional": 0.0, "open": 0.0,
+                })
+                row["orders"] += 1
+                row["filled"] += order.size_matched
+                row["notional"] += order.size_matched * order.price
+                if order.is_open:
+                    row["open"] += order.remaining
+        for row in rows.values():
+            row["avg_price"] = row["notional"] / row["filled"] if row["filled"] else None
+        return list(rows.values())
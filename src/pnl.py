@@ -0,0 +1,231 @@
+"""Position and PnL accounting over the fills of the trade store.
+
+`PnlBook` keeps one slot per token with its position, cost basis and realized
+PnL (average cost method), stored column-wise:
+
+- `refresh` reads only the fills stored since the last refresh (by SQLite
+  rowid) and folds them in. If a late fill is older than fills already
+  applied, the book is rebuilt from all fills, because average cost depends on
+  fill order. So is a book whose fills changed FAILED status since it read
+  them (the store's `status_revision` moved);
+- folding a fill is O(1). It has to run in fill order, because each SELL
+  realizes against the average cost left by the fills before it;
+- `value` marks every position at once: unrealized PnL, market value and the
+  per-event totals are computed over whole columns. With NumPy installed that
+  is one array expression per column plus a `bincount` per event total; without
+  it, the same runs as plain list passes.
+
+Marks are the token prices of `get_sampling_markets`. Tokens of markets no
+longer sampled (e.g. resolved) have no mark and are reported as unmarked
+instead of being valued at a stale price.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EPSILON = 1e-9
+
+
+def market_marks(markets):
+    """Returns ({token_id: price}, {token_id: event key}, {event key: label}) from sampling markets.
+
+    Markets of one neg risk event share their neg_risk_market_id; other
+    markets are their own event.
+    """
+    prices, events, labels = {}, {}, {}
+    for market in markets:
+        event = market.get("neg_risk_market_id") or market.get("condition_id") or ""
+        labels.setdefault(event, market.get("market_slug") or market.get("question") or event)
+        for token in market.get("tokens") or []:
+            token_id = token.get("token_id")
+            if not token_id:
+                continue
+            events[token_id] = event
+            try:
+                prices[token_id] = float(token.get("price"))
+            except (TypeError, ValueError):
+                pass
+    return prices, events, labels
+
+
+class PnlBook:
+    """Average cost positions per token, updated incrementally from a TradeStore."""
+
+    def __init__(self, account=None):
+        self.account = account
+        self.reset()
+
+    def reset(self):
+        self.slots = {}
+        self.tokens = []
+        self.markets = []
+        self.position = []
+        self.cost = []
+        self.realized = []
+        self.volume = []
+        self.fills = 0
+        self.last_rowid = 0
+        self.last_match_time = None
+        self.status_revision = 0
+        self.rebuilds = 0
+
+    def _slot(self, token_id, market):
+        slot = self.slots.get(token_id)
+        if slot is None:
+            slot = self.slots[token_id] = len(self.tokens)
+            self.tokens.append(token_id)
+            self.markets.append(market)
+            self.position.append(0.0)
+            self.cost.append(0.0)
+            self.realized.append(0.0)
+            self.volume.append(0.0)
+        return slot
+
+    def apply(self, rows):
+        """Folds (rowid, token_id, market, side, price, size, match_time) rows in, in match time order."""
+        slots, position, cost, realized, volume = self.slots, self.position, self.cost, self.realized, self.volume
+        for _, token_id, market, side, price, size, _ in rows:
+            slot = slots.get(token_id)
+            if slot is None:
+                slot = self._slot(token_id, market)
+            pos, basis = position[slot], cost[slot]
+            signed = size if side == "BUY" else -size
+            if pos == 0.0 or (pos > 0) == (signed > 0):
+                pos += signed
+                basis += price * signed
+            else:
+                # Closes (part of) the position at its average cost, then opens the rest at price.
+                closed = min(size, abs(pos))
+                avg = basis / pos
+                direction = 1.0 if pos > 0 else -1.0
+                realized[slot] += closed * (price - avg) * direction
+                pos -= closed * direction
+                basis = avg * pos
+                if size > closed:
+                    pos = signed + closed * direction
+                    basis = price * pos
+            if -EPSILON < pos < EPSILON:
+                pos = basis = 0.0
+            position[slot], cost[slot] = pos, basis
+            volume[slot] += price * size
+        if rows:
+            self.last_rowid = max(self.last_rowid, max(row[0] for row in rows))
+            latest = max(row[6] for row in rows)
+            if self.last_match_time is None or latest > self.last_match_time:
+                self.last_match_time = latest
+        self.fills += len(rows)
+
+    def refresh(self, store):
+        """Applies the fills stored since the last refresh; returns how many were applied."""
+        revision = store.status_revision
+        rows = store.fill_rows(self.last_rowid, self.account)
+        late = rows and self.last_match_time is not None and rows[0][6] < self.last_match_time
+        if late or (self.last_rowid and revision != self.status_revision):
+            rebuilds = self.rebuilds
+            self.reset()
+            self.rebuilds = rebuilds + 1
+            rows = store.fill_rows(0, self.account)
+        self.status_revision = revision
+        self.apply(rows)
+        return len(rows)
+
+    def value(self, prices, events=None):
+        """Marks every position at prices ({token_id: price}); returns a Valuation.
+
+        events maps token IDs to event keys; tokens missing from it are
+        grouped by their market (condition ID).
+        """
+        events = events or {}
+        keys = [events.get(t) or m for t, m in zip(self.tokens, self.markets)]
+        return Valuation(self.tokens, keys, self.position, self.cost, self.realized, self.volume, prices)
+
+
+class Valuation:
+    """Positions of a PnlBook marked at one set of prices, one entry per token."""
+
+    COLUMNS = ("position", "avg_cost", "mark", "value", "cost", "realized", "unrealized", "volume")
+
+    def __init__(self, tokens, events, position, cost, realized, volume, prices):
+        self.tokens = tokens
+        self.events = events
+        n = len(tokens)
+        if np is not None:
+            self.position = np.fromiter(position, float, n)
+            self.cost = np.fromiter(cost, float, n)
+            self.realized = np.fromiter(realized, float, n)
+            self.volume = np.fromiter(volume, float, n)
+            self.mark = np.fromiter((prices.get(t, np.nan) for t in tokens), float, n)
+            self.marked = ~np.isnan(self.mark)
+            self.avg_cost = np.divide(self.cost, self.position, out=np.zeros(n), where=self.position != 0)
+            self.value = np.where(self.marked, self.position * np.nan_to_num(self.mark), 0.0)
+            self.unrealized = np.where(self.marked, self.value - self.cost, 0.0)
+        else:
+            self.position, self.cost, self.realized, self.volume = list(position), list(cost), list(realized), list(volume)
+            self.mark = [prices.get(t) for t in tokens]
+            self.marked = [m is not None for m in self.mark]
+            self.avg_cost = [c / p if p else 0.0 for c, p in zip(self.cost, self.position)]
+            self.value = [p * m if m is not None else 0.0 for p, m in zip(self.position, self.mark)]
+            self.unrealized = [v - c if m is not None else 0.0 for v, c, m in zip(self.value, self.cost, self.mark)]
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def _row(self, i):
+        row = {"token_id": self.tokens[i], "event": self.events[i], "marked": bool(self.marked[i])}
+        for column in self.COLUMNS:
+            row[column] = float(getattr(self, column)[i]) if column != "mark" or row["marked"] else None
+        return row
+
+    def totals(self):
+        """Portfolio totals over marked and unmarked positions."""
+        if np is not None:
+            held = self.position != 0
+            return {
+                "positions": int(held.sum()), "unmarked": int((held & ~self.marked).sum()),
+                "value": float(self.value.sum()), "cost": float(self.cost.sum()),
+                "realized": float(self.realized.sum()), "unrealized": float(self.unrealized.sum()),
+                "volume": float(self.volume.sum()),
+            }
+        return {
+            "positions": sum(1 for p in self.position if p), "unmarked": sum(1 for p, m in zip(self.position, self.marked) if p and not m),
+            "value": sum(self.value), "cost": sum(self.cost), "realized": sum(self.realized),
+            "unrealized": sum(self.unrealized), "volume": sum(self.volume),
+        }
+
+    def rows(self, limit=None, sort_by="unrealized", open_only=True):
+        """Per token rows, largest absolute sort_by first."""
+        column = getattr(self, sort_by)
+        if np is not None:
+            order = np.argsort(-np.abs(column), kind="stable")
+            if open_only:
+                order = order[self.position[order] != 0]
+            order = order.tolist()
+        else:
+            order = sorted(range(len(self.tokens)), key=lambda i: -abs(column[i]))
+            if open_only:
+                order = [i for i in order if self.position[i]]
+        return [self._row(i) for i in order[:limit]]
+
+    def by_event(self):
+        """Value, cost, realized and unrealized PnL summed per event; largest absolute total PnL first."""
+        keys = list(dict.fromkeys(self.events))
+        index = {key: i for i, key in enumerate(keys)}
+        columns = ("value", "cost", "realized", "unrealized", "volume")
+        if np is not None:
+            ids = np.fromiter((index[e] for e in self.events), np.intp, len(self.events))
+            sums = {c: np.bincount(ids, weights=getattr(self, c), minlength=len(keys)).tolist() for c in columns}
+            tokens = np.bincount(ids, weights=self.position != 0, minlength=len(keys)).tolist()
+        else:
+            sums = {c: [0.0] * len(keys) for c in columns}
+            tokens = [0] * len(keys)
+            values = [(sums[c], getattr(self, c)) for c in columns]
+            for i, event in enumerate(self.events):
+                slot = index[event]
+                for total, column in values:
+                    total[slot] += column[i]
+                tokens[slot] += 1 if self.position[i] else 0
+        names = ("event", "positions") + columns
+        rows = [dict(zip(names, values)) for values in zip(keys, map(int, tokens), *(sums[c] for c in columns))]
+        rows.sort(key=lambda r: -abs(r["realized"] + r["unrealized"]))
+        return rows
@@ -0,0 +1,117 @@
+"""Cached position and collateral balances for position-aware order paths.
+
+Balances are fetched once per batch (concurrently, one request per token) and
+then checked and reserved locally, so SELL orders can be validated without an
+extra round trip in front of every post. Reservations survive refreshes; our
+open and recent SELL orders come from the order store.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from py_clob_client.clob_types import AssetType, BalanceAllowanceParams
+
+TOKEN_DECIMALS = 1e6
+
+
+class InsufficientPosition(Exception):
+    """Raised when an order needs more tokens than the snapshot holds."""
+
+
+class PositionSnapshot:
+    """Conditional token balances and USDC collateral, cached with a TTL.
+
+    The exchange balance still includes tokens offered by our resting SELL
+    orders, and a cached balance misses what was sold since it was fetched.
+    With orders (the client's OrderStore), both are subtracted from the
+    balance: open SELLs with their remaining size, SELLs created after the
+    fetch with what they sold as well. Sizes reserved by orders in flight are
+    subtracted until the order is posted (`settle`), after which the store
+    accounts for it. Without a store, reservations are kept until released,
+    so a snapshot cannot oversell but may understate what is left.
+    """
+
+    def __init__(self, client, ttl=30.0, workers=8, orders=None):
+        self.client = client
+        self.ttl = ttl
+        self.workers = workers
+        self.orders = orders
+        self.balances = {}
+        self.fetched_at = {}
+        self.fetch_started = {}
+        self.reserved = {}
+        self.collateral = 0.0
+        self.lock = threading.Lock()
+
+    def _fetch_balance(self, token_id):
+        resp = self.client.get_balance_allowance(
+            BalanceAllowanceParams(asset_type=AssetType.CONDITIONAL, token_id=token_id)
+        )
+        return float(resp.get("balance", 0)) / TOKEN_DECIMALS
+
+    def _fetch_collateral(self):
+        resp = self.client.get_balance_allowance(BalanceAllowanceParams(asset_type=AssetType.COLLATERAL))
+        return float(resp.get("balance", 0)) / TOKEN_DECIMALS
+
+    def _store(self, token_id, balance, started):
+        # Called with self.lock held; a slower, older fetch never replaces a newer one.
+        if self.fetch_started.get(token_id, float("-inf")) <= started:
+            self.balances[token_id] = balance
+            self.fetched_at[token_id] = time.monotonic()
+            self.fetch_started[token_id] = started
+
+    def refresh(self, token_ids=()):
+        """Fetches collateral and the balance of every token concurrently."""
+        token_ids = list(dict.fromkeys(t for t in token_ids if t))
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(token_ids) + 1))) as pool:
+            collateral = pool.submit(self._fetch_collateral)
+            balances = dict(zip(token_ids, pool.map(self._fetch_balance, token_ids)))
+            collateral = collateral.result()
+        with self.lock:
+            self.collateral = collateral
+            for token_id, balance in balances.items():
+                self._store(token_id, balance, started)
+        return balances
+
+    def balance(self, token_id):
+        """Returns the cached exchange balance, fetching it if missing or older than the TTL."""
+        with self.lock:
+            fetched_at = self.fetched_at.get(token_id)
+            expired = fetched_at is None or time.monotonic() - fetched_at > self.ttl
+        if expired:
+            started = time.time()
+            balance = self._fetch_balance(token_id)
+            with self.lock:
+                self._store(token_id, balance, started)
+        with self.lock:
+            return self.balances[token_id]
+
+    def _available(self, token_id):
+        # Called with self.lock held, after balance() has loaded the token.
+        committed = self.orders.sell_commitment(token_id, self.fetch_started[token_id]) if self.orders is not None else 0.0
+        return self.balances[token_id] - committed - self.reserved.get(token_id, 0.0)
+
+    def available(self, token_id):
+        """Returns the tokens that can still be sold: balance minus open and recent SELLs and in-flight reservations."""
+        self.balance(token_id)
+        with self.lock:
+            return max(0.0, self._available(token_id))
+
+    def reserve(self, token_id, size):
+        """Atomically reserves size tokens for a SELL, raising InsufficientPosition if not held."""
+        self.balance(token_id)
+        with self.lock:
+            available = self._available(token_id)
+            if size > available + 1e-9:
+                raise InsufficientPosition(f"cannot sell {size:.4f} of token {token_id}: only {max(0.0, available):.4f} available")
+            self.reserved[token_id] = self.reserved.get(token_id, 0.0) + size
+
+    def release(self, token_id, size):
+        """Returns an unused reservation, e.g. after a rejected or partially filled SELL."""
+        with self.lock:
+            self.reserved[token_id] = max(0.0, self.reserved.get(token_id, 0.0) - size)
+
+    def settle(self, token_id, size):
+        """Marks size reserved tokens as posted: the order store counts them from now on."""
+        if self.orders is not None:
+            self.release(token_id, size)
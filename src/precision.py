@@ -0,0 +1,140 @@
+"""Spin-then-fire timer for time-critical orders.
+
+`time.sleep` can wake milliseconds late, and under the GIL another thread can
+hold the interpreter for a whole switch interval (5 ms by default) just as an
+order is due. `FireTimer.wait`:
+
+1. sleeps coarsely until `spin` seconds (50 ms) before the target;
+2. optionally pins the calling thread to one core;
+3. raises the interpreter switch interval so the spinning thread keeps the
+   GIL, then busy-waits on the monotonic clock until the target.
+
+Targets are Unix timestamps on the clock given by `now` (e.g.
+`ServerClock.now`) and are converted to a monotonic deadline once, so clock
+adjustments during the wait do not move the fire time. Every fire records
+how late it was against that deadline, so the timer's accuracy can be
+checked on the machine that runs it.
+
+`fire_all` then starts a group of posts concurrently, in priority order, and
+records when each left and was acknowledged, so the spread between the
+first and last post of a group can be reported.
+"""
+import os
+import sys
+import threading
+import time
+
+SPIN_SECONDS = 0.05
+
+
+def percentile(values, pct):
+    """Returns the pct-th percentile of values (nearest rank)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class FireTimer:
+    """Fires at precise times and records the fire error of every wait."""
+
+    def __init__(self, now=time.time, spin=SPIN_SECONDS, cpu=None):
+        self.now = now
+        self.spin = spin
+        self.cpu = cpu
+        self.errors = []
+        self.lock = threading.Lock()
+
+    def deadline(self, target):
+        """Converts a target timestamp on the `now` clock into a monotonic deadline."""
+        return time.monotonic() + (target - self.now())
+
+    def wait_deadline(self, deadline):
+        """Sleeps, then spins until the monotonic deadline; returns how late it returned, in seconds."""
+        while True:
+            remaining = deadline - time.monotonic() - self.spin
+            if remaining <= 0:
+                break
+            time.sleep(remaining)
+        affinity = None
+        if self.cpu is not None and hasattr(os, "sched_setaffinity"):
+            affinity = os.sched_getaffinity(0)
+            os.sched_setaffinity(0, {self.cpu})
+        interval = sys.getswitchinterval()
+        # Other threads only get the GIL back after the fire.
+        sys.setswitchinterval(max(interval, self.spin * 4))
+        try:
+            while time.monotonic() < deadline:
+                pass
+            error = time.monotonic() - deadline
+        finally:
+            sys.setswitchinterval(interval)
+            if affinity is not None:
+                os.sched_setaffinity(0, affinity)
+        with self.lock:
+            self.errors.append(error)
+        return error
+
+    def wait(self, target):
+        """Waits until target on the `now` clock; returns the fire error in seconds."""
+        return self.wait_deadline(self.deadline(target))
+
+    def fire(self, target, action, *args):
+        """Calls action(*args) at target and returns (result, fire error in seconds)."""
+        error = self.wait(target)
+        return action(*args), error
+
+    def stats(self):
+        """Fire error distribution in microseconds."""
+        with self.lock:
+            errors = list(self.errors)
+        if not errors:
+            return {"fires": 0}
+        return {
+            "fires": len(errors),
+            "mean_us": round(sum(errors) / len(errors) * 1e6, 1),
+            "p50_us": round(percentile(errors, 50) * 1e6, 1),
+            "p99_us": round(percentile(errors, 99) * 1e6, 1),
+            "max_us": round(max(errors) * 1e6, 1),
+        }
+
+
+class FireResult:
+    """Outcome of one call started by fire_all; times are perf_counter seconds."""
+    __slots__ = ("result", "error", "started", "finished")
+
+    def __init__(self, result, error, started, finished):
+        self.result = result
+        self.error = error
+        self.started = started
+        self.finished = finished
+
+
+def warm_executor(executor, workers):
+    """Makes sure executor has started `workers` threads before a fire."""
+    gate = threading.Barrier(workers)
+    for future in [executor.submit(gate.wait) for _ in range(workers)]:
+        future.result()
+
+
+def fire_all(executor, calls):
+    """Starts calls on executor in the given order and returns one FireResult per call, in order."""
+    def timed(call):
+        started = time.perf_counter()
+        try:
+            result, error = call(), None
+        except Exception as e:
+            result, error = None, e
+        return FireResult(result, error, started, time.perf_counter())
+
+    futures = [executor.submit(timed, call) for call in calls]
+    return [future.result() for future in futures]
+
+
+def fire_spread(results):
+    """Returns (first-to-last start, first-to-last acknowledgement) in seconds."""
+    if not results:
+        return 0.0, 0.0
+    started = [r.started for r in results]
+    finished = [r.finished for r in results]
+    return max(started) - min(started), max(finished) - min(finished)
@@ -0,0 +1,89 @@
+"""Book-aware pre-sizing of FOK orders.
+
+A FOK order fills completely or is rejected. Signing one needs the price of
+the deepest level it reaches, which the client looks up with one book request
+per order. `presize_order` does both from a book already in hand, before the
+order is signed:
+
+- `estimate_fill` walks the levels a FOK would take and returns the part of the
+  amount the book can fill, the tokens, and the average and worst price;
+- if the whole amount fits, the order keeps its amount and carries the worst
+  price as its `market_price`, so signing needs no book request;
+- otherwise the policy decides: `downsize` shrinks the amount to what the book
+  fills, less DOWNSIZE_MARGIN because the book keeps moving. `fok_max` turns a
+  BUY into a FOK_MAX sweep (a SELL into FOK_MIN) that takes what is there, down
+  to the row's price if it has one and the last level of the book otherwise.
+  `skip` drops the order before it is signed.
+
+An empty side of the book skips the order under every policy. Amounts are USD
+for BUY and tokens for SELL, as in FOK rows.
+"""
+import math
+from py_clob_client.order_builder.constants import BUY
+
+POLICIES = ("downsize", "fok_max", "skip")
+DOWNSIZE_MARGIN = 0.98
+EPSILON = 1e-9
+
+FITS = "fits"
+DOWNSIZED = "downsized"
+CONVERTED = "converted"
+SKIPPED = "skipped"
+
+
+class FillEstimate:
+    """What a FOK for amount would take from one side of a book."""
+    __slots__ = ("side", "amount", "fillable", "tokens", "average_price", "worst_price")
+
+    def __init__(self, side, amount, fillable, tokens, average_price, worst_price):
+        self.side = side
+        self.amount = amount
+        self.fillable = fillable
+        self.tokens = tokens
+        self.average_price = average_price
+        self.worst_price = worst_price
+
+    @property
+    def complete(self):
+        return self.fillable >= self.amount - EPSILON
+
+
+def estimate_fill(view, side, amount):
+    """Walks the asks (BUY, amount in USD) or bids (SELL, amount in tokens) of a BookView."""
+    filled = tokens = notional = 0.0
+    worst = None
+    for price, size in view.asks if side == BUY else view.bids:
+        if size <= 0 or price <= 0:
+            continue
+        take = min(price * size if side == BUY else size, amount - filled)
+        level_tokens = take / price if side == BUY else take
+        filled += take
+        tokens += level_tokens
+        notional += level_tokens * price
+        worst = price
+        if filled >= amount - EPSILON:
+            break
+    return FillEstimate(side, amount, filled, tokens, notional / tokens if tokens else None, worst)
+
+
+def presize_order(order, side, amount, view, policy):
+    """Checks a FOK order against view; returns (order to run or None, FillEstimate, action).
+
+    The returned order is a copy of order, which is left unchanged.
+    """
+    estimate = estimate_fill(view, side, amount)
+    if estimate.complete:
+        return dict(order, market_price=str(estimate.worst_price)), estimate, FITS
+    if estimate.fillable <= EPSILON or policy == "skip":
+        return None, estimate, SKIPPED
+    if policy == "downsize":
+        # Rounded down, so the new amount never exceeds what the book showed.
+        downsized = math.floor(estimate.fillable * DOWNSIZE_MARGIN * 10000) / 10000
+        if downsized <= 0:
+            return None, estimate, SKIPPED
+        worst = estimate_fill(view, side, downsized).worst_price
+        return dict(order, amount=str(downsized), market_price=str(worst)), estimate, DOWNSIZED
+    if policy == "fok_max":
+        order_type = "FOK_MAX" if side == BUY else "FOK_MIN"
+        return dict(order, order_type=order_type, price=order.get("price") or str(estimate.worst_price)), estimate, CONVERTED
+    raise ValueError(f"unknown FOK pre-check policy '{policy}'")
@@ -0,0 +1,271 @@
+"""Quote ladders: keep a ladder of GTC orders around mid for a set of tokens.
+
+Each `QuoteEngine.cycle`:
+
+1. refreshes every quoted book with batched `get_order_books` requests;
+2. computes the desired ladder per token and diffs it against the engine's
+   resting quotes from the order store, so a level is only replaced when its
+   price drifted more than `reprice_ticks` or it was mostly filled. A token
+   whose book has no two-sided mid has all its quotes canceled;
+3. signs every new quote, then sends all cancels in one `cancel_orders`
+   request and the new quotes in `post_orders` batches.
+
+The CPU time, wall time and requests of every cycle are recorded, so a single
+process can be sized to quote many markets.
+"""
+import math
+import time
+from py_clob_client.clob_types import OrderArgs, OrderType, PostOrdersArgs
+from py_clob_client.order_builder.constants import BUY, SELL
+from amend import POST_ORDERS_BATCH
+from books import BOOKS_PER_REQUEST, BookCache, BookView
+
+LADDER_FIELDNAMES = ["token_id", "levels", "spacing_ticks", "offset_ticks", "size", "reprice_ticks", "sides"]
+
+
+class LadderConfig:
+    """Ladder for one token: `levels` orders per side, `spacing_ticks` apart, starting `offset_ticks` from mid.
+
+    max_spread (cents) is the reward market's maximum distance from mid, if any.
+    """
+    __slots__ = ("token_id", "levels", "spacing_ticks", "offset_ticks", "size", "reprice_ticks", "sides", "max_spread")
+
+    def __init__(self, token_id, levels=3, spacing_ticks=1, offset_ticks=1, size=5.0, reprice_ticks=1,
+                 sides=(BUY, SELL), max_spread=None):
+        self.token_id = token_id
+        self.levels = levels
+        self.spacing_ticks = spacing_ticks
+        self.offset_ticks = offset_ticks
+        self.size = size
+        self.reprice_ticks = reprice_ticks
+        self.sides = tuple(sides)
+        self.max_spread = max_spread
+
+
+def load_ladders(rows, rewards=None):
+    """Builds LadderConfigs from CSV rows.
+
+    rewards maps token_id to a market row with min_size and max_spread (cents)
+    from the market screener. An empty size defaults to the reward min_size,
+    and levels are trimmed so the whole ladder stays inside max_spread of mid.
+    """
+    configs = []
+    for row in rows:
+        token_id = (row.get("token_id") or "").strip()
+        if not token_id:
+            continue
+        market = (rewards or {}).get(token_id) or {}
+
+        def number(field, default, cast=int):
+            value = str(row.get(field) or "").strip()
+            return cast(value) if value else default
+
+        size = number("size", market.get("min_size") or 5.0, float)
+        configs.append(LadderConfig(
+            token_id,
+            levels=number("levels", 3),
+            spacing_ticks=number("spacing_ticks", 1),
+            offset_ticks=number("offset_ticks", 1),
+            size=max(size, market.get("min_size") or 0.0),
+            reprice_ticks=number("reprice_ticks", 1),
+            sides=[s.strip().upper() for s in (row.get("sides") or "BUY,SELL").split(",") if s.strip()],
+            max_spread=market.get("max_spread"),
+        ))
+    return configs
+
+
+def without_own_orders(view, own_orders):
+    """Returns a copy of view with the remaining size of own_orders taken out, so our quotes do not move our mid."""
+    if not own_orders:
+        return view
+    own = {}
+    for order in own_orders:
+        key = (order.side, round(order.price, 4))
+        own[key] = own.get(key, 0.0) + order.remaining
+
+    def strip(levels, side):
+        kept = []
+        for price, size in levels:
+            size -= own.get((side, round(price, 4)), 0.0)
+            if size > 1e-9:
+                kept.append((price, size))
+        return kept
+
+    return BookView(view.token_id, strip(view.bids, BUY), strip(view.asks, SELL), view.tick_size,
+                    view.market, view.neg_risk, view.timestamp)
+
+
+def desired_quotes(config, view, available=None):
+    """Returns the [(side, price, size)] ladder for a book, or [] when the book has no two-sided mid.
+
+    Bids are rounded down and asks up to the tick, and neither crosses the
+    opposite best price. available caps the total ask size (tokens held).
+    """
+    if view.mid is None:
+        return []
+    tick = view.tick_size
+    mid_ticks = view.mid / tick
+    max_ticks = int(round(1 / tick)) - 1
+    levels = config.levels
+    if config.max_spread:
+        # Reward spread is quoted in cents around mid.
+        reach = int(config.max_spread / 100 / tick + 1e-9)
+        levels = min(levels, max(0, (reach - config.offset_ticks) // max(1, config.spacing_ticks) + 1))
+    quotes = []
+    if BUY in config.sides:
+        top = min(math.floor(mid_ticks - config.offset_ticks + 1e-9), int(round(view.best_ask / tick)) - 1)
+        for k in range(levels):
+            ticks = top - k * config.spacing_ticks
+            if ticks < 1:
+                break
+            quotes.append((BUY, round(ticks * tick, 4), config.size))
+    if SELL in config.sides:
+        remaining = available if available is not None else float("inf")
+        bottom = max(math.ceil(mid_ticks + config.offset_ticks - 1e-9), int(round(view.best_bid / tick)) + 1)
+        for k in range(levels):
+            ticks = bottom + k * config.spacing_ticks
+            if ticks > max_ticks or remaining < config.size:
+                break
+            remaining -= config.size
+            quotes.append((SELL, round(ticks * tick, 4), config.size))
+    return quotes
+
+
+def diff_quotes(desired, resting, tolerance, min_remaining):
+    """Matches desired levels to resting orders and returns (orders to cancel, quotes to post).
+
+    A resting order keeps a level when it is on the same side, within
+    tolerance of the desired price and still has at least min_remaining left.
+    """
+    unmatched = list(resting)
+    posts = []
+    for side, price, size in desired:
+        best = None
+        for order in unmatched:
+            if order.side != side or order.remaining < min_remaining:
+                continue
+            distance = abs(order.price - price)
+            if distance <= tolerance + 1e-9 and (best is None or distance < abs(best.price - price)):
+                best = order
+        if best is None:
+            posts.append((side, price, size))
+        else:
+            unmatched.remove(best)
+    return unmatched, posts
+
+
+class QuoteEngine:
+    """Maintains quote ladders for many tokens from one process."""
+
+    def __init__(self, client, store, configs, risk=None, positions=None):
+        self.client = client
+        self.store = store
+        self.configs = {c.token_id: c for c in configs}
+        self.risk = risk
+        self.positions = positions
+        self.books = BookCache(client)
+        self.quote_ids = set()
+        self.cycles = []
+
+    def resting_quotes(self, token_id):
+        return [o for o in self.store.open_orders(token_id=token_id) if o.order_id in self.quote_ids]
+
+    def cycle(self):
+        """Runs one refresh/diff/cancel/post cycle and returns its stats."""
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        token_ids = list(self.configs)
+        views = {v.token_id: v for v in self.books.refresh(token_ids)}
+        requests = math.ceil(len(token_ids) / BOOKS_PER_REQUEST)
+        cancels, posts = [], []
+        for token_id, config in self.configs.items():
+            view = views.get(token_id)
+            if view is None:
+                continue
+            resting = self.resting_quotes(token_id)
+            available = None
+            if SELL in config.sides and self.positions is not None:
+                # Tokens already resting in our asks count as available to re-quote.
+                held = sum(o.remaining for o in resting if o.side == SELL)
+                available = self.positions.available(token_id) + held
+            desired = desired_quotes(config, without_own_orders(view, resting), available)
+            if not desired:
+                # One-sided or empty book: no mid to quote around, so pull what is resting.
+                cancels += resting
+                continue
+            stale, new = diff_quotes(desired, resting, config.reprice_ticks * view.tick_size, config.size / 2)
+            cancels += stale
+            posts += [(token_id, side, price, size) for side, price, size in new]
+        # Sign first, so the gap between the cancels and the new quotes is only network time.
+        signed = []
+        for token_id, side, price, size in posts:
+            notional = price * size if side == BUY else 0.0
+            try:
+                if self.risk is not None:
+                    self.risk.check(token_id, side, notional)
+                order = self.client.create_order(OrderArgs(price=price, size=size, side=side, token_id=token_id))
+            except Exception:
+                if self.risk is not None:
+                    self.risk.release(token_id, side, notional)
+                continue
+            signed.append((token_id, side, notional, order))
+        canceled = 0
+        if cancels:
+            resp = self.client.cancel_orders([o.order_id for o in cancels])
+            requests += 1
+            canceled_ids = set(resp.get("canceled") or [])
+            canceled = len(canceled_ids)
+            self.quote_ids -= canceled_ids
+            if self.risk is not None:
+                for o in cancels:
+                    if o.order_id in canceled_ids:
+                        self.risk.release(o.token_id, o.side, o.price * o.remaining)
+        posted = 0
+        for start in range(0, len(signed), POST_ORDERS_BATCH):
+            chunk = signed[start:start + POST_ORDERS_BATCH]
+            resp = self.client.post_orders([PostOrdersArgs(order=order, orderType=OrderType.GTC) for *_, order in chunk])
+            requests += 1
+            for (token_id, side, notional, _), item in zip(chunk, resp if isinstance(resp, list) else []):
+                if isinstance(item, dict) and item.get("orderID") and item.get("success", True):
+                    self.quote_ids.add(item["orderID"])
+                    if self.risk is not None:
+                        self.store.record_risk(item["orderID"], notional)
+                    posted += 1
+                elif self.risk is not None:
+                    self.risk.release(token_id, side, notional)
+        stats = {
+            "tokens": len(token_ids),
+            "canceled": canceled,
+            "posted": posted,
+            "requests": requests,
+            "cpu_ms": (time.process_time() - cpu_start) * 1000,
+            "wall_ms": (time.perf_counter() - wall_start) * 1000,
+        }
+        self.cycles.append(stats)
+        return stats
+
+    def run(self, interval, stop_event, on_cycle=None, on_error=None):
+        """Runs cycles every interval seconds until stop_event is set, then cancels every quote."""
+        try:
+            while not stop_event.is_set():
+                started = time.monotonic()
+                try:
+                    stats = self.cycle()
+                    if on_cycle is not None:
+                        on_cycle(stats)
+                except Exception as e:
+                    if on_error is None:
+                        raise
+                    on_error(e)
+                stop_event.wait(max(0.0, interval - (time.monotonic() - started)))
+        finally:
+            self.cancel_quotes()
+
+    def cancel_quotes(self):
+        """Cancels every resting quote of this engine and returns the number canceled."""
+        order_ids = [o.order_id for token_id in self.configs for o in self.resting_quotes(token_id)]
+        if not order_ids:
+            return 0
+        resp = self.client.cancel_orders(order_ids)
+        canceled = set(resp.get("canceled") or [])
+        self.quote_ids -= canceled
+        return len(canceled)
@@ -0,0 +1,185 @@
+"""Read-through cache with single-flight for the client's market catalog reads.
+
+Several views fetch the same payloads independently: every page of
+`get_sampling_markets`, the `get_markets` pages walked to find a slug, one
+`get_market` and the full `get_sampling_simplified_markets`. Once attached,
+`ReadCache` answers those client methods:
+
+- entries are keyed by method and arguments and live for a per-method TTL
+  (`DEFAULT_TTLS`). Sampling markets carry prices, so they expire sooner than
+  the market catalog;
+- the cache is bounded by the size of its payloads (their JSON length) and
+  evicts least recently used entries first;
+- concurrent callers asking for the same missing entry share one request:
+  the first one fetches, the others wait for its result (or its error, which
+  is not cached).
+
+Cached payloads are shared between callers and must be treated as read-only.
+Order books, prices, orders and trades are never cached.
+"""
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTLS = {
+    "get_sampling_markets": 30.0,
+    "get_sampling_simplified_markets": 30.0,
+    "get_markets": 300.0,
+    "get_simplified_markets": 300.0,
+    "get_market": 300.0,
+}
+MAX_BYTES = 64 * 1024 * 1024
+
+
+def call_key(method, signature, args, kwargs):
+    """Cache key of one call: method plus its arguments bound to the signature, defaults included."""
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    key = [method]
+    for name, value in bound.arguments.items():
+        kind = signature.parameters[name].kind
+        if kind is inspect.Parameter.VAR_KEYWORD:
+            value = tuple(sorted(value.items()))
+        key.append((name, value))
+    return tuple(key)
+
+
+def payload_size(value):
+    """Approximate size of a JSON payload in bytes."""
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires_at")
+
+    def __init__(self, value, size, expires_at):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+
+
+class _Flight:
+    """A request in progress; callers for the same key wait on it."""
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ReadCache:
+    """LRU cache of read-only API payloads, bounded by bytes, with per-method TTLs."""
+
+    def __init__(self, ttls=None, max_bytes=MAX_BYTES):
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.flights = {}
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.evictions = 0
+
+    def _count(self, method, outcome):
+        counts = self.counts.setdefault(method, {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0})
+        counts[outcome] += 1
+
+    def get(self, method, key, fetch):
+        """Returns the cached payload for key, or calls fetch() once for all concurrent callers."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry.expires_at > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self._count(method, "hits")
+                    return entry.value
+                self._remove(key)
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = _Flight()
+                self._count(method, "misses")
+            else:
+                self._count(method, "coalesced")
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        succeeded = False
+        try:
+            flight.value = fetch()
+            succeeded = True
+        except Exception as e:
+            flight.error = e
+            with self.lock:
+                self._count(method, "errors")
+            raise
+        finally:
+            if not succeeded and flight.error is None:
+                # KeyboardInterrupt and the like stop the leader; its waiters still get an error.
+                flight.error = RuntimeError(f"{method} was interrupted before it returned")
+            # Sized outside the lock: serializing a large catalog page takes a while.
+            size = payload_size(flight.value) if succeeded else 0
+            with self.lock:
+                self.flights.pop(key, None)
+                if succeeded:
+                    self._store(key, flight.value, size, self.ttls.get(method, 0.0))
+            flight.done.set()
+        return flight.value
+
+    def _store(self, key, value, size, ttl):
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = _Entry(value, size, time.monotonic() + ttl)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def _remove(self, key):
+        entry = self.entries.pop(key)
+        self.bytes -= entry.size
+
+    def invalidate(self, method=None):
+        """Drops the entries of method (or everything)."""
+        with self.lock:
+            for key in [k for k in self.entries if method is None or k[0] == method]:
+                self._remove(key)
+
+    # -- Client integration -----------------------------------------------
+
+    def attach(self, client):
+        """Routes client's cacheable read methods (those with a TTL) through this cache."""
+        for method in self.ttls:
+            original = getattr(client, method, None)
+            if original is None:
+                continue
+            signature = inspect.signature(original)
+
+            def cached(*args, _method=method, _original=original, _signature=signature, **kwargs):
+                # Keyed by bound arguments, so f() and f(next_cursor="MA==") share an entry.
+                key = call_key(_method, _signature, args, kwargs)
+                return self.get(_method, key, lambda: _original(*args, **kwargs))
+
+            setattr(client, method, cached)
+        return client
+
+    def stats(self):
+        """Entries, bytes and evictions, plus hits, misses, coalesced waits and errors per method."""
+        with self.lock:
+            per_method = {method: dict(counts) for method, counts in self.counts.items()}
+            hits = sum(c["hits"] + c["coalesced"] for c in per_method.values())
+            lookups = hits + sum(c["misses"] for c in per_method.values())
+            return {
+                "entries": len(self.entries), "bytes": self.bytes, "evictions": self.evictions,
+                "hit_rate": round(hits / lookups, 3) if lookups else None, "methods": per_method,
+            }
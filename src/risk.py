@@ -0,0 +1,163 @@
+"""Pre-trade risk checks for every order path.
+
+`RiskEngine.check` runs in front of each post. It enforces:
+
+- a kill switch, which can be set in memory or by creating the kill file;
+- an order rate limit (token bucket);
+- maximum BUY notional per token and per market;
+- maximum BUY spend per batch.
+
+It then reserves the order's notional in in-memory counters, all under one
+lock, so concurrent order paths cannot overshoot a limit. SELL orders reduce
+exposure and only pass the kill switch and rate checks. Limits are read from
+the environment by `RiskLimits.from_env`; unset limits are not enforced.
+"""
+import os
+import threading
+import time
+
+KILL_FILE_CHECK_SECONDS = 0.5
+
+
+class RiskRejected(Exception):
+    """Raised when an order would breach a risk limit or the kill switch is on."""
+
+
+class RiskLimits:
+    """Risk limits; None disables a limit."""
+
+    ENV_VARS = {
+        "max_token_notional": "POLYBOT_MAX_TOKEN_NOTIONAL",
+        "max_market_notional": "POLYBOT_MAX_MARKET_NOTIONAL",
+        "max_batch_spend": "POLYBOT_MAX_BATCH_SPEND",
+        "max_orders_per_second": "POLYBOT_MAX_ORDERS_PER_SECOND",
+    }
+
+    def __init__(self, max_token_notional=None, max_market_notional=None, max_batch_spend=None,
+                 max_orders_per_second=None, kill_file="polybot.kill"):
+        self.max_token_notional = max_token_notional
+        self.max_market_notional = max_market_notional
+        self.max_batch_spend = max_batch_spend
+        self.max_orders_per_second = max_orders_per_second
+        self.kill_file = kill_file
+
+    @classmethod
+    def from_env(cls):
+        """Reads limits from POLYBOT_* environment variables (see ENV_VARS and POLYBOT_KILL_FILE)."""
+        values = {}
+        for field, var in cls.ENV_VARS.items():
+            value = os.getenv(var, "").strip()
+            values[field] = float(value) if value else None
+        return cls(kill_file=os.getenv("POLYBOT_KILL_FILE", "polybot.kill") or None, **values)
+
+    def describe(self):
+        """Returns (label, value) pairs for display."""
+        return [(var, getattr(self, field)) for field, var in self.ENV_VARS.items()] + [("POLYBOT_KILL_FILE", self.kill_file)]
+
+
+class RiskEngine:
+    """In-memory exposure counters checked and updated atomically before each order."""
+
+    def __init__(self, limits=None):
+        self.limits = limits or RiskLimits()
+        self.lock = threading.Lock()
+        self.token_notional = {}
+        self.market_notional = {}
+        self.market_of = {}
+        self.batch_spend = 0.0
+        self.killed = False
+        self.kill_reason = ""
+        self.orders_checked = 0
+        self.orders_rejected = 0
+        rate = self.limits.max_orders_per_second
+        self._bucket = float(rate) if rate else 0.0
+        self._bucket_at = time.monotonic()
+        self._kill_file_checked_at = 0.0
+
+    def register_market(self, market, token_ids):
+        """Maps token_ids to their market for the per-market limit; unmapped tokens count as their own market."""
+        with self.lock:
+            for token_id in token_ids:
+                self.market_of[token_id] = market
+
+    def kill(self, reason="manual"):
+        """Engages the kill switch: every following check is rejected until reset."""
+        with self.lock:
+            self.killed = True
+            self.kill_reason = reason
+
+    def reset_kill(self):
+        """Releases the kill switch and removes the kill file if present."""
+        kill_file = self.limits.kill_file
+        if kill_file and os.path.exists(kill_file):
+            os.remove(kill_file)
+        with self.lock:
+            self.killed = False
+            self.kill_reason = ""
+
+    def start_batch(self):
+        """Resets the per-batch spend counter at the start of a CSV run or task loop."""
+        with self.lock:
+            self.batch_spend = 0.0
+
+    def _poll_kill_file(self, now):
+        # A stat per order would dominate the check, so the kill file is
+        # polled at most every KILL_FILE_CHECK_SECONDS.
+        if now - self._kill_file_checked_at < KILL_FILE_CHECK_SECONDS:
+            return
+        self._kill_file_checked_at = now
+        if self.limits.kill_file and os.path.exists(self.limits.kill_file):
+            self.killed = True
+            self.kill_reason = f"kill file '{self.limits.kill_file}' present"
+
+    def check(self, token_id, side, notional):
+        """Checks an order and reserves its notional, raising RiskRejected on a breach.
+
+        notional is the USD value of the order (amount for FOK buys, price * size
+        for limit orders). Call release() with whatever was not spent.
+        """
+        limits = self.limits
+        now = time.monotonic()
+        with self.lock:
+            self.orders_checked += 1
+            self._poll_kill_file(now)
+            if self.killed:
+                self.orders_rejected += 1
+                raise RiskRejected(f"kill switch engaged ({self.kill_reason})")
+            rate = limits.max_orders_per_second
+            if rate:
+                bucket = min(rate, self._bucket + (now - self._bucket_at) * rate)
+                self._bucket_at = now
+                if bucket < 1.0:
+                    self._bucket = bucket
+                    self.orders_rejected += 1
+                    raise RiskRejected(f"order rate above {rate:g}/s")
+                self._bucket = bucket - 1.0
+            if side != "BUY":
+                return
+            token_total = self.token_notional.get(token_id, 0.0) + notional
+            if limits.max_token_notional is not None and token_total > limits.max_token_notional + 1e-9:
+                self.orders_rejected += 1
+                raise RiskRejected(f"token {token_id} notional {token_total:.2f} above {limits.max_token_notional:.2f}")
+            market = self.market_of.get(token_id, token_id)
+            market_total = self.market_notional.get(market, 0.0) + notional
+            if limits.max_market_notional is not None and market_total > limits.max_market_notional + 1e-9:
+                self.orders_rejected += 1
+                raise RiskRejected(f"market {market} notional {market_total:.2f} above {limits.max_market_notional:.2f}")
+            batch_total = self.batch_spend + notional
+            if limits.max_batch_spend is not None and batch_total > limits.max_batch_spend + 1e-9:
+                self.orders_rejected += 1
+                raise RiskRejected(f"batch spend {batch_total:.2f} above {limits.max_batch_spend:.2f}")
+            self.token_notional[token_id] = token_total
+            self.market_notional[market] = market_total
+            self.batch_spend = batch_total
+
+    def release(self, token_id, side, notional):
+        """Returns notional reserved by check() that was not spent, e.g. a failed post or an unfilled budget."""
+        if side != "BUY" or notional <= 0:
+            return
+        with self.lock:
+            market = self.market_of.get(token_id, token_id)
+            self.token_notional[token_id] = max(0.0, self.token_notional.get(token_id, 0.0) - notional)
+            self.market_notional[market] = max(0.0, self.market_notional.get(market, 0.0) - notional)
+            self.batch_spend = max(0.0, self.batch_spend - notional)
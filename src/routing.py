@@ -0,0 +1,130 @@
+"""Best execution across the two tokens of a binary market.
+
+Yes and No of one market always pay 1 between them. Holding No, selling it
+at a bid b gives the same exposure change as buying Yes at 1 - b (in both
+cases we end up longer Yes relative to No), so the bids of the complement
+token are extra asks for the token we want to buy:
+
+- `synthetic_asks` merges the native asks with the complement's bids mapped
+  to 1 - b into one book sorted by effective price. The complement levels
+  are capped by the complement tokens we hold, because those legs are SELLs;
+- `plan_buy` walks the merged book for a USD budget or a token amount,
+  under a maximum price, and returns one leg per level taken;
+- planned on the native asks alone, the same walk gives the single-book
+  baseline, and `RoutePlan.improvement` reports the difference;
+- `execute_plan` signs every leg, then posts them concurrently.
+
+Costs of complement legs are effective costs (1 - b per token): the SELL
+itself brings in b.
+"""
+import math
+from concurrent.futures import ThreadPoolExecutor
+from py_clob_client.clob_types import OrderArgs, OrderType
+from py_clob_client.order_builder.constants import BUY, SELL
+from precision import fire_all
+
+NATIVE = "native"
+COMPLEMENT = "complement"
+ROUTE_WORKERS = 8
+
+
+def complement_map(rows):
+    """Maps each token of a two-token market to the other; rows are screener rows or sampling markets."""
+    pairs = {}
+    for row in rows:
+        tokens = row.get("token_ids") or [t.get("token_id") for t in row.get("tokens") or []]
+        if len(tokens) == 2 and all(tokens):
+            pairs[tokens[0]], pairs[tokens[1]] = tokens[1], tokens[0]
+    return pairs
+
+
+def synthetic_asks(native_asks, complement_bids, complement_available=math.inf):
+    """Merges native asks with complement bids as (effective price, size, source, order price) levels.
+
+    Levels are (price, size) pairs, best first. At equal effective prices the
+    native level comes first.
+    """
+    levels = [(price, size, NATIVE, price) for price, size in native_asks if size > 0]
+    left = complement_available
+    for bid, size in complement_bids:
+        if left <= 0:
+            break
+        size = min(size, left)
+        if size > 0:
+            levels.append((round(1.0 - bid, 6), size, COMPLEMENT, bid))
+            left -= size
+    levels.sort(key=lambda level: (level[0], level[2] != NATIVE))
+    return levels
+
+
+class RouteLeg:
+    """One order of a route: a BUY of the native token or a SELL of the complement at its own book price."""
+    __slots__ = ("source", "price", "size", "effective_price")
+
+    def __init__(self, source, price, size, effective_price):
+        self.source = source
+        self.price = price
+        self.size = size
+        self.effective_price = effective_price
+
+
+class RoutePlan:
+    """Legs chosen from a (synthetic) book, with the tokens they buy and their effective cost."""
+
+    def __init__(self, legs):
+        self.legs = legs
+        self.tokens = sum(leg.size for leg in legs)
+        self.cost = sum(leg.size * leg.effective_price for leg in legs)
+
+    @property
+    def average_price(self):
+        return self.cost / self.tokens if self.tokens else None
+
+    def size(self, source):
+        return sum(leg.size for leg in self.legs if leg.source == source)
+
+    def improvement(self, baseline):
+        """Compares with a single-book baseline plan: extra tokens, average price and the USD saved on the tokens both buy."""
+        saved = 0.0
+        if self.tokens and baseline.tokens:
+            saved = (baseline.average_price - self.average_price) * min(self.tokens, baseline.tokens)
+        return {
+            "tokens": self.tokens, "baseline_tokens": baseline.tokens,
+            "average_price": self.average_price, "baseline_average_price": baseline.average_price,
+            "extra_tokens": self.tokens - baseline.tokens, "saved_usd": saved,
+        }
+
+
+def plan_buy(levels, max_price, usd=None, tokens=None):
+    """Walks levels (from synthetic_asks) under max_price until usd is spent or tokens are bought."""
+    if usd is None and tokens is None:
+        raise ValueError("plan_buy needs a USD budget or a token amount")
+    legs = []
+    usd_left = math.inf if usd is None else usd
+    tokens_left = math.inf if tokens is None else tokens
+    for effective, size, source, price in levels:
+        if effective > max_price + 1e-9 or usd_left <= 1e-9 or tokens_left <= 1e-9:
+            break
+        take = min(size, tokens_left, usd_left / effective if effective > 0 else math.inf)
+        if take <= 0:
+            continue
+        legs.append(RouteLeg(source, price, take, effective))
+        usd_left -= take * effective
+        tokens_left -= take
+    return RoutePlan(legs)
+
+
+def execute_plan(client, plan, token_id, complement_id, order_type=OrderType.GTC, workers=ROUTE_WORKERS):
+    """Signs every leg, then posts them concurrently; returns (leg, FireResult) pairs in leg order."""
+    signed = []
+    for leg in plan.legs:
+        if leg.source == NATIVE:
+            args = OrderArgs(price=leg.price, size=leg.size, side=BUY, token_id=token_id)
+        else:
+            args = OrderArgs(price=leg.price, size=leg.size, side=SELL, token_id=complement_id)
+        signed.append(client.create_order(args))
+    if not signed:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(signed)))) as executor:
+        results = fire_all(executor, [lambda order=order: client.post_order(order, order_type) for order in signed])
+    return list(zip(plan.legs, results))
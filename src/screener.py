@@ -0,0 +1,201 @@
+"""Market screener over a cached table of all sampling markets.
+
+`MarketScreener` downloads every page of `get_sampling_markets` once, keeps it
+for `ttl` seconds and builds:
+
+- sorted indexes on end date, price, reward rate, max spread, min size and
+  liquidity, so range filters are a pair of binary searches;
+- an inverted index of words in the question, slug and category/tags, with a
+  sorted vocabulary so each search term also matches as a prefix.
+
+Compound queries intersect the candidate sets, smallest first, and only the
+requested page of results is materialized.
+"""
+import bisect
+import re
+import time
+from py_clob_client.clob_types import BookParams
+
+END_CURSOR = "LTE="
+NUMERIC_FIELDS = ("end_date", "price", "rewards_daily_rate", "max_spread", "min_size", "liquidity")
+WORD_RE = re.compile(r"[a-z0-9]+")
+BOOKS_PER_REQUEST = 50
+
+
+def tokenize(text):
+    """Splits text into lowercase alphanumeric words."""
+    return WORD_RE.findall(str(text or "").lower())
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def market_row(market):
+    """Flattens a sampling market into the screener's row format."""
+    tokens = market.get("tokens") or []
+    rewards = market.get("rewards") or {}
+    rates = rewards.get("rates") or []
+    tags = market.get("tags") or []
+    end_date = market.get("end_date_iso") or ""
+    return {
+        "condition_id": market.get("condition_id", ""),
+        "market_slug": market.get("market_slug", ""),
+        "question": market.get("question", ""),
+        "category": market.get("category") or ", ".join(str(t) for t in tags),
+        "end_date": end_date[:10] or None,
+        "price": _float(tokens[0].get("price")) if tokens else None,
+        "rewards_daily_rate": sum(_float(r.get("rewards_daily_rate")) or 0.0 for r in rates) if rates else None,
+        "max_spread": _float(rewards.get("max_spread")),
+        "min_size": _float(rewards.get("min_size")),
+        "liquidity": _float(market.get("liquidity")),
+        "active": bool(market.get("active")) and not market.get("closed"),
+        "accepting_orders": bool(market.get("accepting_orders")),
+        "token_ids": [t.get("token_id") for t in tokens if t.get("token_id")],
+        "outcomes": [t.get("outcome") for t in tokens],
+    }
+
+
+class SortedIndex:
+    """Row positions sorted by one field; rows without a value are left out."""
+    __slots__ = ("values", "positions")
+
+    def __init__(self, rows, field):
+        pairs = sorted((row[field], i) for i, row in enumerate(rows) if row[field] is not None)
+        self.values = [v for v, _ in pairs]
+        self.positions = [i for _, i in pairs]
+
+    def range(self, low=None, high=None):
+        """Returns the positions with low <= value <= high (either bound may be None)."""
+        start = 0 if low is None else bisect.bisect_left(self.values, low)
+        end = len(self.values) if high is None else bisect.bisect_right(self.values, high)
+        return self.positions[start:end]
+
+
+class MarketScreener:
+    """Cached, indexed table of sampling markets."""
+
+    def __init__(self, client, ttl=300.0):
+        self.client = client
+        self.ttl = ttl
+        self.rows = []
+        self.indexes = {}
+        self.postings = {}
+        self.vocabulary = []
+        self.loaded_at = None
+
+    def fetch_markets(self):
+        """Downloads every page of `get_sampling_markets`."""
+        markets = []
+        next_cursor = "MA=="
+        while next_cursor and next_cursor != END_CURSOR:
+            response = self.client.get_sampling_markets(next_cursor=next_cursor)
+            if not isinstance(response, dict):
+                markets.extend(response or [])
+                break
+            markets.extend(response.get("data", []))
+            next_cursor = response.get("next_cursor")
+        return markets
+
+    def load(self, markets=None):
+        """Builds the table and indexes from markets (downloaded if not given)."""
+        if markets is None:
+            markets = self.fetch_markets()
+        self.rows = [market_row(m) for m in markets]
+        self._build_indexes()
+        self.loaded_at = time.monotonic()
+        return len(self.rows)
+
+    def _build_indexes(self):
+        self.indexes = {field: SortedIndex(self.rows, field) for field in NUMERIC_FIELDS}
+        postings = {}
+        for i, row in enumerate(self.rows):
+            words = set(tokenize(row["question"]))
+            words.update(tokenize(row["market_slug"]))
+            words.update(tokenize(row["category"]))
+            for word in words:
+                postings.setdefault(word, []).append(i)
+        self.postings = postings
+        self.vocabulary = sorted(postings)
+
+    def ensure_loaded(self):
+        """Reloads the table when it was never loaded or is older than the TTL."""
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > self.ttl:
+            self.load()
+
+    def load_liquidity(self, book_cache=None, active_only=True):
+        """Sets each row's liquidity to the USD resting on both sides of its books.
+
+        The sampling markets endpoint has no liquidity figure, so it is
+        computed from batched `get_order_books` requests and the liquidity
+        index is rebuilt.
+        """
+        rows = [r for r in self.rows if r["token_ids"] and (r["active"] or not active_only)]
+        token_ids = [t for r in rows for t in r["token_ids"]]
+        totals = {}
+        for i in range(0, len(token_ids), BOOKS_PER_REQUEST):
+            chunk = token_ids[i:i + BOOKS_PER_REQUEST]
+            for book in self.client.get_order_books([BookParams(token_id=t) for t in chunk]):
+                if book_cache is not None:
+                    book_cache.update(book)
+                levels = (book.bids or []) + (book.asks or [])
+                totals[book.asset_id] = sum(float(o.price) * float(o.size) for o in levels)
+        for row in rows:
+            row["liquidity"] = round(sum(totals.get(t, 0.0) for t in row["token_ids"]), 2)
+        self.indexes["liquidity"] = SortedIndex(self.rows, "liquidity")
+
+    def _match_term(self, term):
+        """Returns the positions of rows containing a word that starts with term."""
+        start = bisect.bisect_left(self.vocabulary, term)
+        matched = set()
+        for word in self.vocabulary[start:]:
+            if not word.startswith(term):
+                break
+            matched.update(self.postings[word])
+        return matched
+
+    def search(self, text=None, ranges=None, active_only=False, sort_by=None, descending=False, page=1, page_size=20,
+               slug_contains=None):
+        """Runs a compound query and returns (rows of the requested page, total matches).
+
+        text: every word must match (as a prefix) a word of the question, slug or category.
+        slug_contains: the slug must contain this substring; a scan, not an index lookup.
+        ranges: {field: (low, high)} over NUMERIC_FIELDS; end_date bounds are 'YYYY-MM-DD'.
+        """
+        self.ensure_loaded()
+        candidates = []
+        for term in tokenize(text):
+            candidates.append(self._match_term(term))
+        for field, (low, high) in (ranges or {}).items():
+            if field not in self.indexes:
+                raise ValueError(f"Unknown screener field '{field}'")
+            candidates.append(self.indexes[field].range(low, high))
+        if candidates:
+            candidates.sort(key=len)
+            matched = set(candidates[0])
+            for other in candidates[1:]:
+                if not matched:
+                    break
+                matched.intersection_update(other)
+        else:
+            matched = set(range(len(self.rows)))
+        if active_only:
+            matched = {i for i in matched if self.rows[i]["active"]}
+        if slug_contains:
+            needle = slug_contains.lower()
+            matched = {i for i in matched if needle in (self.rows[i]["market_slug"] or "").lower()}
+        if sort_by:
+            if sort_by not in self.indexes:
+                raise ValueError(f"Unknown screener field '{sort_by}'")
+            # Rows without a value for sort_by go last in either direction.
+            rows = self.rows
+            ordered = sorted((i for i in matched if rows[i][sort_by] is not None),
+                             key=lambda i: rows[i][sort_by], reverse=descending)
+            ordered += sorted(i for i in matched if rows[i][sort_by] is None)
+        else:
+            ordered = sorted(matched)
+        start = max(0, (page - 1) * page_size)
+        return [self.rows[i] for i in ordered[start:start + page_size]], len(ordered)
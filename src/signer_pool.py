@@ -0,0 +1,107 @@
+"""Process-pool order signing for large batches.
+
+Signing an order (EIP-712 hashing plus secp256k1 ECDSA) is pure Python and
+holds the GIL, so a big CSV run signs one order at a time no matter how many
+threads post. `SignerPool` moves signing into worker processes:
+
+- the parent resolves tick size, neg risk, fee rate and market prices through
+  the client, exactly as `create_order` / `create_market_order` do, so every
+  network lookup and client cache stays in one process;
+- workers receive plain order arguments plus the account's signing identity,
+  keep one `FastSigner` per identity, and return the signed payload;
+- the parent wraps each payload in a `PresignedOrder`, which `post_order`,
+  `post_orders` and the order store accept like a `SignedOrder`.
+
+Workers are started with `spawn`, so they never inherit the parent's
+connection pools or poller threads.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from py_clob_client.clob_types import MarketOrderArgs
+from signing import FastSigner, PresignedOrder, resolve_options
+
+MIN_POOL_BATCH = 8
+
+# Worker-process state: one FastSigner per signing identity.
+_signers = {}
+
+
+def _sign(identity, order_args, tick_size, neg_risk):
+    signer = _signers.get(identity)
+    if signer is None:
+        signer = _signers[identity] = FastSigner(*identity)
+    return signer.sign(order_args, tick_size, neg_risk).payload
+
+
+def signing_identity(client):
+    """Returns what a worker needs to sign for client: (key, chain_id, signature_type, funder)."""
+    client.assert_level_1_auth()
+    return (client.signer.private_key, client.signer.get_chain_id(), client.builder.sig_type, client.builder.funder)
+
+
+class SignerPool:
+    """Signs orders in worker processes; one pool serves every account."""
+
+    def __init__(self, processes=None):
+        self.processes = processes or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(max_workers=self.processes,
+                                            mp_context=multiprocessing.get_context("spawn"))
+
+    def warm(self):
+        """Starts every worker process now instead of on the first batch."""
+        for future in [self.executor.submit(os.getpid) for _ in range(self.processes)]:
+            future.result()
+
+    def submit(self, client, order_args):
+        """Resolves order_args in this process and queues its signing; returns a future of the payload."""
+        tick_size, neg_risk = resolve_options(client, order_args)
+        return self.executor.submit(_sign, signing_identity(client), order_args, tick_size, neg_risk)
+
+    def sign_orders(self, client, orders):
+        """Signs OrderArgs / MarketOrderArgs in parallel.
+
+        Returns one entry per order, in order: a PresignedOrder, or the
+        exception that stopped that order from being signed.
+        """
+        futures = []
+        for order_args in orders:
+            try:
+                futures.append(self.submit(client, order_args))
+            except Exception as e:
+                futures.append(e)
+        results = []
+        for future in futures:
+            if isinstance(future, Exception):
+                results.append(future)
+                continue
+            try:
+                results.append(PresignedOrder(future.result()))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def sign_orders(client, orders, pool=None, min_batch=MIN_POOL_BATCH):
+    """Signs orders through pool when given and the batch is large enough, else inline with the client."""
+    if pool is not None and len(orders) >= min_batch:
+        return pool.sign_orders(client, orders)
+    results = []
+    for order_args in orders:
+        try:
+            if isinstance(order_args, MarketOrderArgs):
+                results.append(client.create_market_order(order_args))
+            else:
+                results.append(client.create_order(order_args))
+        except Exception as e:
+            results.append(e)
+    return results
@@ -0,0 +1,177 @@
+"""Order signing fast path.
+
+`ClobClient.create_order` builds a new `py_order_utils` builder and signer for
+every order. That derives the public key from the private key twice (once for
+the signer address, once inside `Account._sign_hash`), rebuilds the EIP-712
+domain and runs the generic struct encoder. Together that is about twice the
+cost of the ECDSA signature itself.
+
+`FastSigner` produces byte-identical signed orders with only the signature
+computed per order:
+
+- the key, the signer and funder addresses and the Order type hash are
+  prepared once;
+- the domain separator is computed once per exchange (regular / neg risk);
+- each token's ABI-encoded template words are built on first use, so an order
+  only encodes its salt, amounts, expiration, nonce, fee and side.
+
+`attach` replaces the client's `create_order` / `create_market_order`, so
+every order path uses the fast path. If `coincurve` is installed, `eth_keys`
+uses it for the signature and signing gets faster again.
+"""
+from eth_keys import keys
+from eth_utils import decode_hex, keccak
+from poly_eip712_structs import make_domain
+from py_clob_client.clob_types import MarketOrderArgs
+from py_clob_client.config import get_contract_config
+from py_clob_client.order_builder.builder import OrderBuilder, ROUNDING_CONFIG
+from py_clob_client.signer import Signer
+from py_clob_client.utilities import is_tick_size_smaller, price_valid
+from py_order_utils.model.order import Order
+from py_order_utils.utils import generate_seed, normalize_address
+
+EXCHANGE_DOMAIN_NAME = "Polymarket CTF Exchange"
+EXCHANGE_DOMAIN_VERSION = "1"
+ORDER_TYPE_HASH = Order.type_hash()
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+SIDES = {0: "BUY", 1: "SELL"}
+
+
+def _word(value):
+    return int(value).to_bytes(32, "big")
+
+
+def _address_word(address):
+    return bytes(12) + decode_hex(address)
+
+
+class PresignedOrder:
+    """A signed order payload; accepted by `post_order`, `post_orders` and the order store like a `SignedOrder`."""
+    __slots__ = ("payload",)
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def dict(self):
+        return dict(self.payload)
+
+
+def resolve_options(client, order_args, options=None):
+    """Resolves tick size, market price, neg risk and fee rate like `ClobClient.create_order`.
+
+    Fills in order_args.price (market orders) and order_args.fee_rate_bps and
+    returns (tick_size, neg_risk).
+    """
+    client.assert_level_1_auth()
+    token_id = order_args.token_id
+    tick_size = client.get_tick_size(token_id)
+    if options is not None and options.tick_size is not None:
+        if is_tick_size_smaller(options.tick_size, tick_size):
+            raise Exception(f"invalid tick size ({options.tick_size}), minimum for the market is {tick_size}")
+        tick_size = options.tick_size
+    if isinstance(order_args, MarketOrderArgs) and (order_args.price is None or order_args.price <= 0):
+        order_args.price = client.calculate_market_price(token_id, order_args.side, order_args.amount,
+                                                         order_args.order_type)
+    if not price_valid(order_args.price, tick_size):
+        raise Exception(f"price ({order_args.price}), min: {tick_size} - max: {1 - float(tick_size)}")
+    neg_risk = options.neg_risk if options is not None and options.neg_risk else client.get_neg_risk(token_id)
+    fee_rate_bps = client.get_fee_rate_bps(token_id)
+    user_fee = order_args.fee_rate_bps
+    if fee_rate_bps and user_fee and user_fee != fee_rate_bps:
+        raise Exception(f"invalid user provided fee rate: ({user_fee}), fee rate for the market must be {fee_rate_bps}")
+    order_args.fee_rate_bps = fee_rate_bps
+    return tick_size, neg_risk
+
+
+class FastSigner:
+    """Signs orders for one key with cached key material, domain separators and token templates."""
+
+    def __init__(self, key, chain_id, signature_type=None, funder=None):
+        # The client's builder is kept for its amount rounding, so amounts match it exactly.
+        self.builder = OrderBuilder(Signer(key, chain_id), signature_type, funder)
+        self.chain_id = chain_id
+        self.private_key = keys.PrivateKey(decode_hex(key))
+        self.address = normalize_address(self.builder.signer.address())
+        self.maker = normalize_address(self.builder.funder)
+        self.signature_type = self.builder.sig_type
+        self._maker_signer = _address_word(self.maker) + _address_word(self.address)
+        self._signature_type_word = _word(self.signature_type)
+        self._domains = {}
+        self._tokens = {}
+
+    @classmethod
+    def from_client(cls, client):
+        client.assert_level_1_auth()
+        return cls(client.signer.private_key, client.signer.get_chain_id(), client.builder.sig_type,
+                   client.builder.funder)
+
+    def domain_separator(self, neg_risk):
+        separator = self._domains.get(neg_risk)
+        if separator is None:
+            exchange = get_contract_config(self.chain_id, neg_risk).exchange
+            separator = self._domains[neg_risk] = make_domain(
+                name=EXCHANGE_DOMAIN_NAME,
+                version=EXCHANGE_DOMAIN_VERSION,
+                chainId=str(self.chain_id),
+                verifyingContract=normalize_address(exchange),
+            ).hash_struct()
+        return separator
+
+    def _token(self, token_id):
+        template = self._tokens.get(token_id)
+        if template is None:
+            template = self._tokens[token_id] = (str(int(token_id)), _word(token_id))
+        return template
+
+    def sign(self, order_args, tick_size, neg_risk, salt=None):
+        """Signs OrderArgs or MarketOrderArgs with resolved options and returns a PresignedOrder.
+
+        salt fixes the order salt (to reproduce a signature); it is random by default.
+        """
+        round_config = ROUNDING_CONFIG[tick_size]
+        if isinstance(order_args, MarketOrderArgs):
+            side, maker_amount, taker_amount = self.builder.get_market_order_amounts(
+                order_args.side, order_args.amount, order_args.price, round_config)
+            expiration = 0
+        else:
+            side, maker_amount, taker_amount = self.builder.get_order_amounts(
+                order_args.side, order_args.size, order_args.price, round_config)
+            expiration = int(order_args.expiration)
+        nonce, fee_rate_bps = int(order_args.nonce), int(order_args.fee_rate_bps)
+        if min(expiration, nonce, fee_rate_bps) < 0:
+            raise ValueError("Invalid order inputs")
+        salt = int(generate_seed() if salt is None else salt)
+        token_id, token_word = self._token(order_args.token_id)
+        taker = normalize_address(order_args.taker or ZERO_ADDRESS)
+        struct_hash = keccak(
+            ORDER_TYPE_HASH + _word(salt) + self._maker_signer + _address_word(taker) + token_word
+            + _word(maker_amount) + _word(taker_amount) + _word(expiration) + _word(nonce)
+            + _word(fee_rate_bps) + _word(side) + self._signature_type_word
+        )
+        digest = keccak(b"\x19\x01" + self.domain_separator(neg_risk) + struct_hash)
+        signature = self.private_key.sign_msg_hash(digest)
+        return PresignedOrder({
+            "salt": salt,
+            "maker": self.maker,
+            "signer": self.address,
+            "taker": taker,
+            "tokenId": token_id,
+            "makerAmount": str(maker_amount),
+            "takerAmount": str(taker_amount),
+            "expiration": str(expiration),
+            "nonce": str(nonce),
+            "feeRateBps": str(fee_rate_bps),
+            "side": SIDES[side],
+            "signatureType": self.signature_type,
+            "signature": "0x" + (_word(signature.r) + _word(signature.s) + bytes([signature.v + 27])).hex(),
+        })
+
+    def attach(self, client):
+        """Replaces the client's create_order and create_market_order with the fast path."""
+        def create_order(order_args, options=None):
+            tick_size, neg_risk = resolve_options(client, order_args, options)
+            return self.sign(order_args, tick_size, neg_risk)
+
+        client.create_order = create_order
+        client.create_market_order = create_order
+        return client
@@ -2,6 +2,7 @@ from dotenv import load_dotenv
 import os
 from py_clob_client.client import ClobClient
 from py_clob_client.clob_types import ApiCreds
+from accounts import AccountRegistry
 
 # Load environment variables from .env file
 load_dotenv()
@@ -25,3 +26,14 @@ try:
     print("API-Verbindung erfolgreich")
 except Exception as e:
     print(f"API-Verbindungsfehler: {str(e)}")
+
+# Test every additional account from accounts.json
+try:
+    registry = AccountRegistry.load("accounts.json", client)
+    for name, error in registry.warm().items():
+        if error:
+            print(f"Konto '{name}': Verbindungsfehler: {error}")
+        else:
+            print(f"Konto '{name}': Verbindung erfolgreich")
+except Exception as e:
+    print(f"Kontenkonfiguration fehlerhaft: {str(e)}")
@@ -0,0 +1,268 @@
+"""Local trade history: incremental sync of `/data/trades` into SQLite.
+
+`ClobClient.get_trades` walks every page of the history before returning, so
+it cannot resume and always downloads everything. `TradeStore.sync` pages
+through the trades endpoint itself:
+
+- each page is converted to fills and upserted in one transaction together
+  with the page's `next_cursor`, so an interrupted sync resumes from the
+  last stored page instead of starting over;
+- a completed sync keeps the latest match time as a watermark. The next sync
+  asks only for trades after the watermark (minus a small overlap, so late
+  indexed trades and status changes are picked up). A refresh therefore
+  costs one or two pages, however long the history is;
+- a trade is stored as the fill of our own order. As taker, that is the
+  trade's side, price and size; as maker, it is the matched maker order(s)
+  of our address.
+
+Fills are keyed by (account, trade, order) and indexed by token, market and
+match time. A fill that turns FAILED (or stops being FAILED) on a later sync
+bumps `status_revision`, so readers that fold fills in incrementally know to
+start over.
+"""
+import sqlite3
+import threading
+import time
+from py_clob_client.clob_types import RequestArgs, TradeParams
+from py_clob_client.endpoints import TRADES
+from py_clob_client.headers.headers import create_level_2_headers
+from py_clob_client.http_helpers.helpers import add_query_trade_params, get
+
+FIRST_CURSOR = "MA=="
+END_CURSOR = "LTE="
+OVERLAP_SECONDS = 120
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fills (
+    account TEXT NOT NULL,
+    trade_id TEXT NOT NULL,
+    order_id TEXT NOT NULL,
+    token_id TEXT NOT NULL,
+    market TEXT NOT NULL DEFAULT '',
+    outcome TEXT NOT NULL DEFAULT '',
+    side TEXT NOT NULL,
+    price REAL NOT NULL,
+    size REAL NOT NULL,
+    fee_rate_bps REAL NOT NULL DEFAULT 0,
+    role TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT '',
+    match_time INTEGER NOT NULL,
+    transaction_hash TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (account, trade_id, order_id)
+);
+CREATE INDEX IF NOT EXISTS fills_token_time ON fills (token_id, match_time);
+CREATE INDEX IF NOT EXISTS fills_market_time ON fills (market, match_time);
+CREATE INDEX IF NOT EXISTS fills_time ON fills (match_time);
+CREATE TABLE IF NOT EXISTS sync_state (
+    account TEXT PRIMARY KEY,
+    watermark INTEGER,
+    cursor TEXT,
+    cursor_after INTEGER,
+    synced_at REAL
+);
+"""
+
+FILL_COLUMNS = ("account", "trade_id", "order_id", "token_id", "market", "outcome", "side", "price", "size",
+                "fee_rate_bps", "role", "status", "match_time", "transaction_hash")
+
+
+class Fill:
+    """One fill of one of our orders."""
+    __slots__ = FILL_COLUMNS
+
+    def __init__(self, *values):
+        for name, value in zip(FILL_COLUMNS, values):
+            setattr(self, name, value)
+
+    def row(self):
+        return tuple(getattr(self, name) for name in FILL_COLUMNS)
+
+
+def fetch_trades_page(client, params=None, cursor=FIRST_CURSOR):
+    """Fetches one page of the trades endpoint; returns (trades, next cursor)."""
+    client.assert_level_2_auth()
+    headers = create_level_2_headers(client.signer, client.creds, RequestArgs(method="GET", request_path=TRADES))
+    response = get(add_query_trade_params(f"{client.host}{TRADES}", params, cursor), headers=headers)
+    return response.get("data") or [], response.get("next_cursor") or END_CURSOR
+
+
+def trade_fills(trade, account, address="", owner=""):
+    """Returns the fills of our orders in one trade record.
+
+    address is our maker (funder) address and owner our API key; either
+    identifies our side of the maker orders when we were the maker.
+    """
+    common = (trade.get("market") or "", int(trade.get("match_time") or 0), trade.get("status") or "",
+              trade.get("transaction_hash") or "")
+    trade_id = str(trade["id"])
+    if (trade.get("trader_side") or "TAKER").upper() == "TAKER":
+        return [Fill(account, trade_id, trade.get("taker_order_id") or "", str(trade["asset_id"]), common[0],
+                     trade.get("outcome") or "", trade["side"].upper(), float(trade["price"]), float(trade["size"]),
+                     float(trade.get("fee_rate_bps") or 0), "TAKER", common[2], common[1], common[3])]
+    address = address.lower()
+    fills = []
+    for maker in trade.get("maker_orders") or []:
+        if (address and (maker.get("maker_address") or "").lower() == address) or (owner and maker.get("owner") == owner):
+            fills.append(Fill(account, trade_id, maker.get("order_id") or "", str(maker["asset_id"]), common[0],
+                              maker.get("outcome") or "", maker["side"].upper(), float(maker["price"]),
+                              float(maker["matched_amount"]), float(maker.get("fee_rate_bps") or 0), "MAKER",
+                              common[2], common[1], common[3]))
+    return fills
+
+
+class TradeStore:
+    """SQLite store of our fills, synced incrementally from the trades endpoint."""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self.status_revision = 0
+
+    # -- Sync -------------------------------------------------------------
+
+    def state(self, account):
+        """Returns (watermark, cursor, cursor_after, synced_at) of account's last sync."""
+        with self.lock:
+            row = self.conn.execute("SELECT watermark, cursor, cursor_after, synced_at FROM sync_state WHERE account = ?",
+                                    (account,)).fetchone()
+        return row or (None, None, None, None)
+
+    def _failed_flips(self, account, fills):
+        """Counts fills already stored whose status moves into or out of FAILED."""
+        trade_ids = list({f.trade_id for f in fills})
+        prior = {}
+        for start in range(0, len(trade_ids), 500):
+            chunk = trade_ids[start:start + 500]
+            for trade_id, order_id, status in self.conn.execute(
+                    f"SELECT trade_id, order_id, status FROM fills WHERE account = ? AND trade_id IN ({', '.join('?' * len(chunk))})",
+                    [account] + chunk):
+                prior[(trade_id, order_id)] = status
+        return sum(1 for f in fills if (f.trade_id, f.order_id) in prior
+                   and (prior[(f.trade_id, f.order_id)] == "FAILED") != (f.status == "FAILED"))
+
+    def store_page(self, account, fills, cursor, after):
+        """Upserts one page of fills and records where the sync stands, in one transaction.
+
+        Returns how many fills already stored moved into or out of FAILED.
+        """
+        with self.lock, self.conn:
+            flips = self._failed_flips(account, fills) if fills else 0
+            self.conn.executemany(
+                f"INSERT INTO fills ({', '.join(FILL_COLUMNS)}) VALUES ({', '.join('?' * len(FILL_COLUMNS))}) "
+                "ON CONFLICT (account, trade_id, order_id) DO UPDATE SET "
+                "status = excluded.status, transaction_hash = excluded.transaction_hash",
+                [f.row() for f in fills])
+            latest = max((f.match_time for f in fills), default=None)
+            self.conn.execute(
+                "INSERT INTO sync_state (account, watermark, cursor, cursor_after, synced_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (account) DO UPDATE SET watermark = max(coalesce(watermark, 0), coalesce(excluded.watermark, 0)), "
+                "cursor = excluded.cursor, cursor_after = excluded.cursor_after, synced_at = excluded.synced_at",
+                (account, latest, None if cursor == END_CURSOR else cursor, after, time.time()))
+            self.status_revision += flips
+        return flips
+
+    def sync(self, client, account="default", on_page=None):
+        """Downloads trades newer than the last sync (or resumes an interrupted one).
+
+        Returns {"pages", "trades", "fills", "seconds"}. on_page(pages, fills)
+        is called after every stored page.
+        """
+        started = time.perf_counter()
+        watermark, cursor, cursor_after, _ = self.state(account)
+        if cursor:
+            after = cursor_after
+        else:
+            after = max(0, watermark - OVERLAP_SECONDS) if watermark else None
+            cursor = FIRST_CURSOR
+        address = getattr(client.builder, "funder", "") or ""
+        owner = client.creds.api_key if client.creds is not None else ""
+        pages = trades = fills = 0
+        while cursor != END_CURSOR:
+            page, cursor = fetch_trades_page(client, TradeParams(after=after), cursor)
+            page_fills = [f for trade in page for f in trade_fills(trade, account, address, owner)]
+            self.store_page(account, page_fills, cursor, after)
+            pages += 1
+            trades += len(page)
+            fills += len(page_fills)
+            if on_page is not None:
+                on_page(pages, fills)
+        return {"pages": pages, "trades": trades, "fills": fills, "seconds": round(time.perf_counter() - started, 3)}
+
+    # -- Queries ----------------------------------------------------------
+
+    def fills(self, token_id=None, market=None, since=None, until=None, account=None, limit=None):
+        """Returns fills, newest first, filtered by token or market, match time range and account."""
+        clauses, args = [], []
+        for column, value in (("token_id", token_id), ("market", market), ("account", account)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                args.append(value)
+        if since is not None:
+            clauses.append("match_time >= ?")
+            args.append(int(since))
+        if until is not None:
+            clauses.append("match_time < ?")
+            args.append(int(until))
+        sql = f"SELECT {', '.join(FILL_COLUMNS)} FROM fills"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY match_time DESC"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with self.lock:
+            return [Fill(*row) for row in self.conn.execute(sql, args)]
+
+    def fill_rows(self, after_rowid=0, account=None):
+        """Returns (rowid, token_id, market, side, price, size, match_time) of fills stored after after_rowid.
+
+        Rows are in match time order. Upserts keep a fill's rowid, so rowids
+        above the last one read are exactly the fills added since. Failed
+        trades are left out; a fill read before its trade failed is only
+        dropped by reading again from 0 (see status_revision).
+        """
+        sql = ("SELECT rowid, token_id, market, side, price, size, match_time FROM fills "
+               "WHERE rowid > ? AND status != 'FAILED'")
+        args = [int(after_rowid)]
+        if account is not None:
+            sql += " AND account = ?"
+            args.append(account)
+        sql += " ORDER BY match_time, rowid"
+        with self.lock:
+            return self.conn.execute(sql, args).fetchall()
+
+    def token_summary(self, account=None):
+        """Per token: fills, size bought and sold, their average prices and the last match time."""
+        sql = ("SELECT token_id, market, count(*), "
+               "sum(CASE WHEN side = 'BUY' THEN size ELSE 0 END), "
+               "sum(CASE WHEN side = 'BUY' THEN size * price ELSE 0 END), "
+               "sum(CASE WHEN side = 'SELL' THEN size ELSE 0 END), "
+               "sum(CASE WHEN side = 'SELL' THEN size * price ELSE 0 END), "
+               "max(match_time) FROM fills")
+        args = []
+        if account is not None:
+            sql += " WHERE account = ?"
+            args.append(account)
+        sql += " GROUP BY token_id, market ORDER BY max(match_time) DESC"
+        rows = []
+        with self.lock:
+            for token_id, market, count, bought, bought_usd, sold, sold_usd, last in self.conn.execute(sql, args):
+                rows.append({
+                    "token_id": token_id, "market": market, "fills": count,
+                    "bought": bought, "avg_buy": bought_usd / bought if bought else None,
+                    "sold": sold, "avg_sell": sold_usd / sold if sold else None,
+                    "last_match_time": last,
+                })
+        return rows
+
+    def count(self, account=None):
+        with self.lock:
+            if account is None:
+                return self.conn.execute("SELECT count(*) FROM fills").fetchone()[0]
+            return self.conn.execute("SELECT count(*) FROM fills WHERE account = ?", (account,)).fetchone()[0]
+
+    def close(self):
+        self.conn.close()
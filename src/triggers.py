@@ -0,0 +1,138 @@
+"""Event-triggered orders: fire an order when a condition on a live book holds.
+
+Supported conditions (evaluated on the book of `watch_token_id`):
+
+- `ask_lte`: best ask <= threshold
+- `bid_gte`: best bid >= threshold
+- `spread_lt`: best ask - best bid < threshold
+- `ask_depth_gt` / `bid_depth_gt`: size within `ticks` ticks of the best ask/bid > threshold
+
+Armed triggers are indexed per token and condition in sorted threshold lists,
+so a book update costs one binary search per index plus the triggers it fires,
+instead of a scan over every armed trigger.
+"""
+import bisect
+import itertools
+
+CONDITIONS = ("ask_lte", "bid_gte", "spread_lt", "ask_depth_gt", "bid_depth_gt")
+
+
+class Trigger:
+    """An armed order waiting for its condition."""
+    __slots__ = ("trigger_id", "watch_token_id", "condition", "threshold", "ticks", "order", "fired")
+
+    def __init__(self, trigger_id, watch_token_id, condition, threshold, ticks, order):
+        self.trigger_id = trigger_id
+        self.watch_token_id = watch_token_id
+        self.condition = condition
+        self.threshold = threshold
+        self.ticks = ticks
+        self.order = order
+        self.fired = False
+
+
+class ThresholdIndex:
+    """Triggers sorted by key; a book value fires the suffix of keys above it.
+
+    Every condition is mapped onto "key > value" (or >= when inclusive), so
+    firing is a bisect plus slicing off the tail of the sorted lists.
+    """
+    __slots__ = ("keys", "triggers")
+
+    def __init__(self):
+        self.keys = []
+        self.triggers = []
+
+    def add(self, key, trigger):
+        i = bisect.bisect_right(self.keys, key)
+        self.keys.insert(i, key)
+        self.triggers.insert(i, trigger)
+
+    def pop_fired(self, value, inclusive):
+        i = bisect.bisect_left(self.keys, value) if inclusive else bisect.bisect_right(self.keys, value)
+        if i == len(self.keys):
+            return []
+        fired = self.triggers[i:]
+        del self.keys[i:]
+        del self.triggers[i:]
+        return fired
+
+    def remove(self, trigger):
+        for i, candidate in enumerate(self.triggers):
+            if candidate is trigger:
+                del self.keys[i]
+                del self.triggers[i]
+                return True
+        return False
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class TriggerEngine:
+    """Holds armed triggers and evaluates them incrementally on book updates."""
+
+    def __init__(self):
+        # token_id -> {(condition, ticks): ThresholdIndex}
+        self.indexes = {}
+        self.triggers = {}
+        self._ids = itertools.count(1)
+
+    def arm(self, watch_token_id, condition, threshold, order, ticks=0):
+        """Arms a trigger and returns it. The order fires at most once."""
+        if condition not in CONDITIONS:
+            raise ValueError(f"Unknown trigger condition '{condition}'")
+        threshold = float(threshold)
+        ticks = int(ticks or 0)
+        trigger = Trigger(next(self._ids), watch_token_id, condition, threshold, ticks, order)
+        index_key = (condition, ticks if condition.endswith("_depth_gt") else 0)
+        index = self.indexes.setdefault(watch_token_id, {}).setdefault(index_key, ThresholdIndex())
+        index.add(self._key(condition, threshold), trigger)
+        self.triggers[trigger.trigger_id] = trigger
+        return trigger
+
+    def disarm(self, trigger_id):
+        trigger = self.triggers.pop(trigger_id, None)
+        if trigger is None:
+            return False
+        index_key = (trigger.condition, trigger.ticks if trigger.condition.endswith("_depth_gt") else 0)
+        self.indexes[trigger.watch_token_id][index_key].remove(trigger)
+        return True
+
+    @staticmethod
+    def _key(condition, threshold):
+        # ask_lte and spread_lt fire for thresholds above the book value;
+        # bid_gte and depth_gt fire for thresholds below it, so they are negated.
+        if condition in ("ask_lte", "spread_lt"):
+            return threshold
+        return -threshold
+
+    def watched_tokens(self):
+        """Returns the tokens that still have armed triggers."""
+        return [token_id for token_id, indexes in self.indexes.items() if any(len(i) for i in indexes.values())]
+
+    def on_book(self, view):
+        """Evaluates the triggers of view.token_id against a `BookView` and returns those that fired."""
+        indexes = self.indexes.get(view.token_id)
+        if not indexes:
+            return []
+        fired = []
+        for (condition, ticks), index in indexes.items():
+            if not index:
+                continue
+            if condition == "ask_lte":
+                if view.best_ask is not None:
+                    fired += index.pop_fired(view.best_ask, inclusive=True)
+            elif condition == "bid_gte":
+                if view.best_bid is not None:
+                    fired += index.pop_fired(-view.best_bid, inclusive=True)
+            elif condition == "spread_lt":
+                if view.spread is not None:
+                    fired += index.pop_fired(view.spread, inclusive=False)
+            else:
+                depth = view.depth("asks" if condition == "ask_depth_gt" else "bids", ticks)
+                fired += index.pop_fired(-depth, inclusive=False)
+        for trigger in fired:
+            trigger.fired = True
+            self.triggers.pop(trigger.trigger_id, None)
+        return fired